@@ -1,8 +1,13 @@
+import argparse
 import time
 import datetime
 import os
+from typing import Optional
 from core.rule_engine import RuleEngine
 from core.fsm_client import send_event
+from core.sensor_delta import SensorReplica, latest_sensors
+from core.state_store import TopicWatcher, get_state_store
+from utils.latency import LatencyHistogram
 
 # --- Banner ---
 def banner(title: str, description: str):
@@ -21,25 +26,114 @@ banner(
 )
 # --- End Banner ---
 
-def run_auto_controller():
-    """The main loop for the autonomous decision-making process."""
+WATCHED_TOPICS = ("telemetry", "sensors", "fsm_state")
+MIN_INTERVAL = 0.05   # Minimum seconds between two rule evaluations
+DEBOUNCE = 0.01       # Wait this long after a change to batch writes that land together
+IDLE_TIMEOUT = 2.0    # Evaluate anyway if no data arrived for this long
+RESEND_INTERVAL = 2.0 # Repeat an event whose rule keeps firing this often (in case it was lost)
+REPORT_INTERVAL = 60.0
+
+
+def read_context(store, replica: SensorReplica):
+    """The (telemetry, sensors, fsm_state) the rules are evaluated against:
+    the latest of each topic in ``store``, with sensors taken from the delta
+    replica when it is at least as fresh as the last full snapshot."""
+    return store.read("telemetry"), latest_sensors(store, replica), store.read("fsm_state").get("state")
+
+
+class EventLatch:
+    """Turns the event proposed on every cycle into sends: an event is sent
+    when it starts firing (or replaces another one) and repeated every
+    ``resend_interval`` seconds while it keeps firing, not on every cycle."""
+
+    def __init__(self, resend_interval: float = RESEND_INTERVAL):
+        self.resend_interval = resend_interval
+        self.active = None
+        self._sent_at = 0.0
+
+    def update(self, event: Optional[str], now: Optional[float] = None) -> Optional[str]:
+        """Returns the event to send this cycle, or None."""
+        now = time.monotonic() if now is None else now
+        send = event is not None and (event != self.active or now - self._sent_at >= self.resend_interval)
+        self.active = event
+        if send:
+            self._sent_at = now
+            return event
+        return None
+
+
+def run_auto_controller(min_interval: float = MIN_INTERVAL, debounce: float = DEBOUNCE,
+                        idle_timeout: float = IDLE_TIMEOUT):
+    """The main loop for the autonomous decision-making process.
+    Rules are evaluated as soon as telemetry, sensor or FSM state data lands."""
     print("[Auto Controller] Process started.")
     engine = RuleEngine()
+    # Edits to config/rules.json take effect on the next cycle, no restart needed
+    engine.start_rule_watcher()
+
+    store = get_state_store()
+    # Sensor updates between full snapshots only arrive as deltas
+    replica = SensorReplica()
+    watcher = TopicWatcher(store, WATCHED_TOPICS, files={"sensor_deltas": replica.path})
+    replica.poll()
+    latency = LatencyHistogram("auto_controller reaction (data write -> event enqueue)")
+    # Rules are evaluated on every data change; a held condition must not flood the FSM queue
+    latch = EventLatch()
+    last_run = 0.0
+    last_report = time.time()
+
+    def poll_changes(changed, timeout=0.0):
+        for name in watcher.wait(timeout=timeout):
+            # A wake-up for records the replica already applied is no change
+            if name == "sensor_deltas" and not replica.poll():
+                continue
+            if name not in changed:
+                changed.append(name)
+        return changed
 
     while True:
+        changed = poll_changes([], timeout=max(0.0, idle_timeout - (time.monotonic() - last_run)))
+        if not changed and time.monotonic() - last_run < idle_timeout:
+            continue
+        if changed:
+            if debounce > 0:
+                time.sleep(debounce)
+                poll_changes(changed)
+            wait = min_interval - (time.monotonic() - last_run)
+            if wait > 0:
+                time.sleep(wait)
+                poll_changes(changed)
+        last_run = time.monotonic()
+
         # The rule engine evaluates the current state of the world
-        triggered_event = engine.run_once()
+        telemetry, sensors, fsm_state = read_context(store, replica)
+        proposed = engine.run_once(telemetry=telemetry, sensors=sensors, fsm_state=fsm_state)
+        started = proposed != latch.active
+        triggered_event = latch.update(proposed)
 
         if triggered_event:
             print(f"[Auto Controller] Rule engine triggered event: '{triggered_event}'. Sending to Gatekeeper.")
             # Send the event to the FSM Gatekeeper instead of triggering directly
             send_event(event=triggered_event, source="auto_controller")
-        else:
-            # This is normal, means no rules met their conditions
+            written = [t for t in (replica.written_at if topic == "sensor_deltas" else store.written_at(topic)
+                                   for topic in changed) if t is not None]
+            if written and started:  # Repeats are no reaction to the data
+                latency.record(max(0.0, time.time() - max(written)) * 1000.0)
+        elif not changed and proposed is None:
+            # This is normal, means no data arrived and no rules met their conditions
             print("[Auto Controller] No rules triggered this cycle.")
 
-        # The controller sleeps for a cycle
-        time.sleep(2)
+        if time.time() - last_report >= REPORT_INTERVAL and latency.count:
+            print(f"[Auto Controller] {latency.summary()}")
+            last_report = time.time()
 
 if __name__ == "__main__":
-    run_auto_controller()
+    parser = argparse.ArgumentParser(description="Event-driven rule controller")
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL,
+                        help="Minimum seconds between rule evaluations")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE,
+                        help="Seconds to wait after a change so that related writes are evaluated together")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="Evaluate rules at least this often even without new data")
+    args = parser.parse_args()
+    run_auto_controller(args.min_interval, args.debounce, args.idle_timeout)
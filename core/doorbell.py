@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Doorbell - cross-process wake-up over a Unix datagram socket.
+
+The listener binds the socket and blocks in ``wait()``; any process can
+``ring()`` it. A ring carries no data: the durable payload lives elsewhere
+(e.g. the FSM event log), the doorbell only says "look now". Rings sent while
+the listener is busy stay queued in the socket buffer, so none are lost
+between a drain and the next ``wait()``.
+"""
+import os
+import select
+import socket
+from typing import Optional
+
+
+class Doorbell:
+    """Listening side. Only one process should listen on a given path."""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            os.unlink(path)  # Left behind by a listener that crashed
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(path)
+        self._sock.setblocking(False)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until rung or ``timeout``. Returns True if it was rung."""
+        readable, _, _ = select.select([self._sock], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while self._sock.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        self._sock.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class DoorbellClient:
+    """Ringing side; cheap enough to use on every enqueue."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def ring(self) -> bool:
+        """Returns False if nobody is listening or the buffer is full; the
+        listener then picks the work up on its next wake-up anyway."""
+        try:
+            self._sock.sendto(b"\0", self.path)
+            return True
+        except OSError:
+            return False
+
+    def close(self) -> None:
+        self._sock.close()
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Event Log - append-only, segmented FSM request queue.
+
+Producers append one JSON line per event with a single O_APPEND write, so
+enqueue cost does not depend on queue depth. The single consumer (the FSM
+gatekeeper) reads in batches from a cursor (segment number + byte offset)
+that it persists in ``cursor.json`` after processing.
+
+Segments are compacted without a separate job: once the active segment
+grows past ``segment_bytes`` and has been read, the consumer seals it (it
+takes an exclusive flock, creates the next segment and marks the old one
+read-only), drains what producers appended in the meantime, and deletes it
+on the next commit. Producers hold a shared flock only around their write,
+and move on to the newest segment when they see theirs was sealed.
+
+After each append the producer rings a doorbell socket (core.doorbell), so
+the consumer can block in ``wait()`` instead of polling the directory.
+
+A line left incomplete by a producer that crashed mid-write is skipped once
+the producer side has moved past it: the next append glues onto it and is
+recovered from the tail, or the segment is sealed and the consumer moves on.
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+import stat
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from core.doorbell import Doorbell, DoorbellClient
+from core.file_paths import FSM_QUEUE_DIR
+
+log = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{8})\.jsonl$")
+_READ_CHUNK = 256 * 1024
+
+
+class EventLog:
+    """Multi-producer, single-consumer append-only queue in ``directory``."""
+
+    def __init__(self, directory: str = FSM_QUEUE_DIR, segment_bytes: int = 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.cursor_path = os.path.join(directory, "cursor.json")
+        self.doorbell_path = os.path.join(directory, "doorbell.sock")
+        os.makedirs(directory, exist_ok=True)
+
+        self._producer_lock = threading.Lock()
+        self._producer_fd: Optional[int] = None
+        self._doorbell_client: Optional[DoorbellClient] = None
+        self._doorbell: Optional[Doorbell] = None
+
+        # Consumer position; loaded from cursor.json on first read
+        self._segment: Optional[int] = None
+        self._offset = 0
+        self._consumer_fd: Optional[int] = None
+        self._committed = None
+        self._retired: List[int] = []
+
+    # --- Segments ------------------------------------------------------------
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment-{number:08d}.jsonl")
+
+    def _segments(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _create_segment(self, number: int) -> None:
+        try:
+            os.close(os.open(self._segment_path(number), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+        except FileExistsError:
+            pass
+
+    @staticmethod
+    def _is_sealed(fd: int) -> bool:
+        return not os.fstat(fd).st_mode & stat.S_IWUSR
+
+    # --- Producer ------------------------------------------------------------
+    def append(self, record: Dict[str, Any]) -> None:
+        """Appends one record. Safe to call from many threads and processes."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._producer_lock:
+            for _ in range(16):
+                fd = self._open_producer()
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                try:
+                    written = not self._is_sealed(fd)
+                    if written:
+                        os.write(fd, line)
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                if written:
+                    self._ring()
+                    return
+                # The consumer sealed this segment; the next one already exists
+                os.close(fd)
+                self._producer_fd = None
+        raise OSError(f"No writable segment in {self.directory}")
+
+    def _ring(self) -> None:
+        if self._doorbell_client is None:
+            self._doorbell_client = DoorbellClient(self.doorbell_path)
+        self._doorbell_client.ring()
+
+    def _open_producer(self) -> int:
+        while self._producer_fd is None:
+            segments = self._segments()
+            if not segments:
+                self._create_segment(1)
+                continue
+            try:
+                # No O_CREAT: never resurrect a segment the consumer already deleted
+                self._producer_fd = os.open(self._segment_path(segments[-1]), os.O_WRONLY | os.O_APPEND)
+            except FileNotFoundError:
+                continue
+        return self._producer_fd
+
+    # --- Consumer ------------------------------------------------------------
+    def _load_cursor(self) -> None:
+        try:
+            with open(self.cursor_path, "r") as f:
+                cursor = json.load(f)
+            self._segment, self._offset = int(cursor["segment"]), int(cursor["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self._segment, self._offset = None, 0
+        self._committed = (self._segment, self._offset)
+
+    def _open_consumer(self) -> bool:
+        """Opens the segment at the cursor, skipping to the oldest existing
+        segment if the cursor's one is gone. Returns False if there is none."""
+        if self._consumer_fd is not None:
+            return True
+        if self._segment is None:
+            self._load_cursor()
+        while True:
+            segments = self._segments()
+            if not segments:
+                return False
+            if self._segment not in segments:
+                self._segment, self._offset = segments[0], 0
+            try:
+                self._consumer_fd = os.open(self._segment_path(self._segment), os.O_RDONLY)
+                return True
+            except FileNotFoundError:
+                continue
+
+    def _seal(self) -> None:
+        """Stops producers from appending to the current segment."""
+        path = self._segment_path(self._segment)
+        with open(path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)  # waits for in-flight appends
+            try:
+                self._create_segment(self._segment + 1)
+                os.chmod(path, 0o444)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def listen(self) -> None:
+        """Binds the doorbell so ``wait()`` can block. Consumer side only."""
+        if self._doorbell is None:
+            try:
+                self._doorbell = Doorbell(self.doorbell_path)
+            except OSError as e:
+                log.warning(f"Doorbell unavailable ({e}); the consumer will poll.")
+
+    def wait(self, timeout: Optional[float] = None, poll_interval: float = 0.2) -> bool:
+        """Blocks until a producer appends or ``timeout`` expires. Returns True
+        when woken by a producer. Without a doorbell it sleeps ``poll_interval``."""
+        if self._doorbell is None:
+            time.sleep(poll_interval if timeout is None else min(poll_interval, timeout))
+            return False
+        return self._doorbell.wait(timeout)
+
+    def read_batch(self, max_records: int = 1000) -> List[Dict[str, Any]]:
+        """Returns up to ``max_records`` new records. Call ``commit()`` once
+        they are processed, otherwise they are delivered again after a restart."""
+        records: List[Dict[str, Any]] = []
+        size = _READ_CHUNK
+        while len(records) < max_records and self._open_consumer():
+            chunk = os.pread(self._consumer_fd, size, self._offset)
+            start = 0
+            while len(records) < max_records:
+                end = chunk.find(b"\n", start)
+                if end < 0:
+                    break  # Only complete lines are consumed
+                line = chunk[start:end]
+                start = end + 1
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    record = self._recover(line)
+                    if record is not None:
+                        records.append(record)
+            self._offset += start
+            if start:
+                continue
+            if len(chunk) == size:
+                size *= 2  # One record longer than the buffer
+                continue
+
+            # Nothing new in this segment
+            if self._is_sealed(self._consumer_fd):
+                if chunk:
+                    log.warning(f"Skipping partial queue record at the end of segment {self._segment}: "
+                                f"{chunk[:80]!r}")
+                os.close(self._consumer_fd)
+                self._consumer_fd = None
+                self._retired.append(self._segment)
+                self._segment, self._offset = self._segment + 1, 0
+            elif self._offset >= self.segment_bytes:
+                self._seal()  # Loop again to drain appends that raced the seal
+            else:
+                break
+        return records
+
+    def _recover(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """A line that does not parse is a record torn by a crashed producer,
+        possibly followed by the next producer's complete record (appends
+        continue right after the torn bytes). Returns that record, if any."""
+        pos = line.find(b"{", 1)
+        while pos > 0:
+            try:
+                record = json.loads(line[pos:])
+            except ValueError:
+                pos = line.find(b"{", pos + 1)
+                continue
+            log.warning(f"Skipping torn queue record in segment {self._segment}: {line[:min(pos, 80)]!r}")
+            return record
+        log.warning(f"Skipping corrupt queue record in segment {self._segment}: {line[:80]!r}")
+        return None
+
+    def commit(self) -> None:
+        """Persists the consumer cursor and deletes fully consumed segments."""
+        position = (self._segment, self._offset)
+        if position != self._committed and self._segment is not None:
+            temp_path = self.cursor_path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump({"segment": self._segment, "offset": self._offset}, f)
+            os.rename(temp_path, self.cursor_path)
+            self._committed = position
+        for number in self._retired:
+            try:
+                os.remove(self._segment_path(number))
+            except FileNotFoundError:
+                pass
+        self._retired = []
+
+    def discard_pending(self) -> int:
+        """Drops everything queued so far (used when resetting the bot)."""
+        dropped = 0
+        while True:
+            batch = self.read_batch()
+            if not batch:
+                break
+            dropped += len(batch)
+        self.commit()
+        return dropped
+
+    def close(self) -> None:
+        for fd in (self._producer_fd, self._consumer_fd):
+            if fd is not None:
+                os.close(fd)
+        self._producer_fd = self._consumer_fd = None
+        for bell in (self._doorbell, self._doorbell_client):
+            if bell is not None:
+                bell.close()
+        self._doorbell = self._doorbell_client = None
@@ -8,12 +8,31 @@ FSM_STATE_FILE = os.path.join(BASE_DIR, "fsm_state.json")
 SHARED_BUS_FILE = os.path.join(BASE_DIR, "shared_bus.json")
 CONFIG_FILE = os.path.join(BASE_DIR, "config", "config.json")
 RULES_FILE = os.path.join(BASE_DIR, "config", "rules.json")
-FSM_REQUESTS_FILE = os.path.join(BASE_DIR, "fsm_requests.json")
+SENSOR_RANGES_FILE = os.path.join(BASE_DIR, "config", "sensor_ranges.json")  # core.sensor_preprocessor
+SENSOR_FILTERS_FILE = os.path.join(BASE_DIR, "config", "sensor_filters.json")  # core.sensor_filters
+FSM_REQUESTS_FILE = os.path.join(BASE_DIR, "fsm_requests.json")  # legacy queue, drained once at gatekeeper start
+FSM_QUEUE_DIR = os.path.join(BASE_DIR, "fsm_queue")
 FSM_LOG_FILE = os.path.join(BASE_DIR, "logs", "fsm_log.txt")
-RULES_LOG_FILE = os.path.join(BASE_DIR, "logs", "rules_log.txt")
+FSM_HISTORY_FILE = os.path.join(BASE_DIR, "logs", "fsm_history.jsonl")  # transitions evicted from the in-memory window
+RULES_LOG_FILE = os.path.join(BASE_DIR, "logs", "rules_log.jsonl")  # one JSON record per rule fire
+RECORDINGS_DIR = os.path.join(BASE_DIR, "logs", "recordings")  # core.telemetry_recorder runs
 MISSION_FILE = os.path.join(BASE_DIR, "config", "mission.json")
 MISSION_STATUS_FILE = os.path.join(BASE_DIR, "mission_status.json")
 QIKI_BOOT_LOG_FILE = os.path.join(BASE_DIR, "qiki_boot_log.json")
 LOCALES_FILE = os.path.join(BASE_DIR, "config", "locales.json")
 SENSOR_LOG_FILE = os.path.join(BASE_DIR, "logs", "sensor_log.txt")
 HEALTH_REPORT_LOG_FILE = os.path.join(BASE_DIR, "logs", "health_report.log")
+
+# Topics exchanged through core.state_store. The JSON backend maps each topic
+# to its file above; the segment backend keeps them in STATE_SEGMENT_FILE.
+STATE_TOPICS = {
+    "telemetry": TELEMETRY_FILE,
+    "sensors": SENSORS_FILE,
+    "fsm_state": FSM_STATE_FILE,
+    "mission_status": MISSION_STATUS_FILE,
+}
+STATE_SEGMENT_FILE = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else BASE_DIR, "qiki_state.seg")
+# Memory-mapped telemetry history (core.telemetry_series), next to the segment
+TELEMETRY_SERIES_FILE = os.path.join(os.path.dirname(STATE_SEGMENT_FILE), "qiki_telemetry.ts")
+# Sensor keyframes + deltas appended by the sensor bus (core.sensor_delta)
+SENSOR_DELTA_FILE = os.path.join(os.path.dirname(STATE_SEGMENT_FILE), "qiki_sensor_deltas.jsonl")
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+File Watcher - change notifications for the JSON state files.
+
+Uses Linux inotify (through ctypes, no extra dependencies) when it is
+available and falls back to mtime polling everywhere else. Both watchers
+expose the same ``wait()`` / ``interrupt()`` / ``close()`` interface.
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_libc():
+    """Returns libc with inotify symbols, or None when inotify is missing."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+_libc = _load_libc()
+
+
+def inotify_available() -> bool:
+    """True if the platform libc provides inotify."""
+    return _libc is not None
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Returns (inode, mtime_ns, size) for ``path`` or None if it is missing.
+
+    The inode changes on every temp-file + rename write, so this catches
+    rewrites that land within the filesystem's mtime resolution.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def file_signature_fd(fd: int) -> Tuple[int, int, int]:
+    """Same as ``file_signature`` for an already opened file descriptor."""
+    st = os.fstat(fd)
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _BaseWatcher:
+    """Common bookkeeping and the self-pipe used to interrupt ``wait()``."""
+    mode = "base"
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._paths: Dict[str, str] = {}  # absolute path -> path as registered
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        for path in paths:
+            self.add(path)
+
+    def add(self, path: str) -> None:
+        self._paths[os.path.abspath(path)] = path
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Blocks until a watched file changes, ``timeout`` expires or
+        ``interrupt()`` is called. Returns the changed paths."""
+        raise NotImplementedError
+
+    def interrupt(self) -> None:
+        """Wakes up a thread blocked in ``wait()``."""
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    def _drain_wake(self) -> None:
+        try:
+            while os.read(self._wake_r, 512):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self) -> None:
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class PollingWatcher(_BaseWatcher):
+    """Fallback watcher comparing file signatures every ``interval`` seconds."""
+    mode = "poll"
+
+    def __init__(self, paths: Iterable[str] = (), interval: float = 0.5):
+        self._interval = interval
+        self._signatures: Dict[str, Optional[Tuple[int, int, int]]] = {}
+        super().__init__(paths)
+
+    def add(self, path: str) -> None:
+        super().add(path)
+        self._signatures[path] = file_signature(path)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        remaining = timeout
+        while True:
+            changed = set()
+            for path in self._paths.values():
+                signature = file_signature(path)
+                if signature != self._signatures.get(path):
+                    self._signatures[path] = signature
+                    changed.add(path)
+            if changed:
+                return changed
+
+            sleep_for = self._interval if remaining is None else min(self._interval, remaining)
+            readable, _, _ = select.select([self._wake_r], [], [], max(sleep_for, 0))
+            if readable:
+                self._drain_wake()
+                return set()
+            if remaining is not None:
+                remaining -= sleep_for
+                if remaining <= 0:
+                    return set()
+
+
+class InotifyWatcher(_BaseWatcher):
+    """Watches the parent directories for IN_CLOSE_WRITE / IN_MOVED_TO.
+
+    Watching the directory rather than the file is what lets us see atomic
+    temp-file + rename writes, which replace the inode of the target.
+    """
+    mode = "inotify"
+
+    def __init__(self, paths: Iterable[str] = ()):
+        if _libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, str] = {}  # watch descriptor -> directory
+        self._dir_wds: Dict[str, int] = {}
+        super().__init__(paths)
+
+    def add(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in self._dir_wds:
+            wd = _libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err), directory)
+            self._dirs[wd] = directory
+            self._dir_wds[directory] = wd
+        super().add(path)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        changed = self._read_events() if self._fd in readable else set()
+        if self._wake_r in readable:
+            self._drain_wake()
+        return changed
+
+    def _read_events(self) -> Set[str]:
+        changed = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0")
+                offset += length
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = self._paths.get(os.path.join(directory, os.fsdecode(name)))
+                if path is not None:
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+        super().close()
+
+
+def create_watcher(paths: Iterable[str] = (), mode: str = "auto", interval: float = 0.5) -> _BaseWatcher:
+    """Builds a watcher for ``paths``.
+
+    ``mode`` is "inotify", "poll" or "auto" (inotify with a polling fallback).
+    """
+    paths = list(paths)
+    if mode == "poll":
+        return PollingWatcher(paths, interval=interval)
+    if mode not in ("auto", "inotify"):
+        raise ValueError(f"Unknown watch mode: {mode}")
+    try:
+        return InotifyWatcher(paths)
+    except OSError as e:
+        if mode == "inotify":
+            raise
+        log.info(f"inotify unavailable ({e}). Falling back to polling every {interval}s.")
+        return PollingWatcher(paths, interval=interval)
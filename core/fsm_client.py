@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 """FSM Client
-Provides validated access to ``fsm_state.json`` and a helper to send events
+Provides validated access to the ``fsm_state`` topic (``fsm_state.json`` or
+the state segment, see core.state_store) and a helper to send events
 through the gatekeeper.
 """
 
-import json
 import os
 import logging
 from datetime import datetime
@@ -13,6 +13,8 @@ from typing import Any, Dict, Optional
 from core.file_paths import FSM_STATE_FILE
 from core.fsm_logger import log_transition
 from core.fsm_io import enqueue_event
+from core.state_store import topic_store
+from utils.frozen import thaw
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,31 +28,48 @@ FSM_SCHEMA = ["IDLE", "MISSION_ACTIVE", "CHARGING", "AVOIDING", "ERROR"]
 class FSMClient:
     """Central access point to the FSM state."""
 
-    def __init__(self, path: str = FSM_STATE_FILE) -> None:
+    def __init__(self, path: str = FSM_STATE_FILE, store=None) -> None:
         self.path = path
         self.schema = FSM_SCHEMA
+        # The configured state backend for the standard file, else that file alone
+        self.store = store if store is not None else topic_store("fsm_state", path)
+        self._generation = None  # store generation of the last state read or written
         self.state = self.load_state()
 
     def load_state(self) -> Dict[str, Any]:
-        """Load state from disk. On failure return default state."""
+        """Load state from the store. On failure return default state."""
         try:
-            with open(self.path, "r") as f:
-                return json.load(f)
+            generation, state = self.store.read_with_generation("fsm_state")
+            if not state:
+                raise ValueError(f"no state stored for {self.path}")
+            self._generation = generation
+            return thaw(state)
         except Exception as exc:
             self.log_error(f"Failed to load state: {exc}")
             return {"state": "IDLE", "last_trigger": None, "context": {}}
 
+    def refresh_if_changed(self) -> bool:
+        """Reloads the state if it was written since the last read or write.
+        Only a stat() (or a segment header read) when it was not."""
+        if self.store.generation("fsm_state") == self._generation:
+            return False
+        generation, state = self.store.read_with_generation("fsm_state")
+        if not state:
+            return False  # Missing or caught mid-write; keep the cached state and retry next time
+        self.state, self._generation = thaw(state), generation
+        return True
+
     def save_state(self) -> None:
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        with open(self.path, "w") as f:
-            json.dump(self.state, f, indent=2)
+        self.store.write("fsm_state", self.state)
+        self._generation = self.store.generation("fsm_state")
 
     def get_state(self) -> Dict[str, Any]:
         """Return the currently cached state."""
         return self.state
 
-    def set_state(self, new_state: str, metadata: Dict[str, Any]) -> bool:
-        """Validate ``new_state`` and persist it with metadata."""
+    def set_state(self, new_state: str, metadata: Dict[str, Any], log: bool = True) -> bool:
+        """Validate ``new_state`` and persist it with metadata.
+        Pass ``log=False`` when the caller logs the transitions itself."""
         if new_state not in self.schema:
             self.log_error(f"Invalid state '{new_state}'")
             return False
@@ -63,7 +82,8 @@ class FSMClient:
             "timestamp": datetime.now().isoformat(),
         }
         self.save_state()
-        self.log_transition(from_state, new_state, metadata)
+        if log:
+            self.log_transition(from_state, new_state, metadata)
         return True
 
     # --- Logging helpers -------------------------------------------------
@@ -5,21 +5,77 @@ QIKI Bot
 Finite State Machine (FSM) Core Logic
 """
 import time
+from typing import NamedTuple
+
+# Transitions kept in memory (and exported to fsm_state.json)
+HISTORY_SIZE = 100
+
+
+class HistoryRecord(NamedTuple):
+    timestamp: float
+    from_state: str
+    to_state: str
+    event: str
+    meta: object
+
+
+class HistoryBuffer:
+    """
+    Fixed-capacity ring buffer of HistoryRecord tuples.
+    When full, the oldest record is handed to ``on_evict`` (if set) and
+    overwritten, so memory and export size stay constant.
+    """
+
+    def __init__(self, capacity=HISTORY_SIZE, on_evict=None):
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.capacity = capacity
+        self.on_evict = on_evict
+        self._slots = [None] * capacity
+        self._start = 0
+        self._size = 0
+
+    def append(self, record):
+        end = (self._start + self._size) % self.capacity
+        if self._size == self.capacity:
+            evicted = self._slots[end]
+            self._start = (self._start + 1) % self.capacity
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+        else:
+            self._size += 1
+        self._slots[end] = record
+
+    def clear(self):
+        self._slots = [None] * self.capacity
+        self._start = self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._slots[(self._start + i) % self.capacity]
+
+    def to_dicts(self):
+        return [record._asdict() for record in self]
 
 
 class FiniteStateMachine:
     """
     A pure, in-memory Finite State Machine core.
     It handles states, transitions, and events without any I/O operations.
+    Only the last ``history_size`` transitions are kept; older ones are passed
+    to ``on_history_evict`` so the caller can persist them.
     """
 
-    def __init__(self, initial_state="UNKNOWN", transitions=None):
+    def __init__(self, initial_state="UNKNOWN", transitions=None, history_size=HISTORY_SIZE, on_history_evict=None):
         self.current_state = initial_state
         self.transitions = transitions if transitions is not None else {}
         self.state_register = {initial_state: {"enter_time": time.time(), "exit_time": None}}
         self.last_event = None
         self.last_event_time = None
-        self.history = []
+        self._history = HistoryBuffer(history_size, on_history_evict)
 
     def trigger_event(self, event, meta=None):
         """
@@ -42,17 +98,16 @@ class FiniteStateMachine:
             # Create a new entry for the new state
             self.state_register[new_state] = {"enter_time": time.time(), "exit_time": None, "triggered_by": event, "meta": meta}
             
-            self.history.append({
-                "timestamp": time.time(),
-                "from_state": old_state,
-                "to_state": new_state,
-                "event": event,
-                "meta": meta
-            })
+            self._history.append(HistoryRecord(self.last_event_time, old_state, new_state, event, meta))
             
             return True
         return False
 
+    @property
+    def history(self):
+        """Recent transitions, oldest first, as dictionaries."""
+        return self._history.to_dicts()
+
     def get_current_state(self):
         """Returns the current state of the FSM."""
         return self.current_state
@@ -68,7 +123,11 @@ class FiniteStateMachine:
         self.state_register = state_dict.get("state_register", {})
         self.last_event = state_dict.get("last_event")
         self.last_event_time = state_dict.get("last_event_time")
-        self.history = state_dict.get("history", [])
+        self._history.clear()
+        for entry in state_dict.get("history", []):
+            self._history.append(HistoryRecord(
+                entry.get("timestamp"), entry.get("from_state"), entry.get("to_state"), entry.get("event"), entry.get("meta")
+            ))
 
     def export_state(self):
         """Exports the FSM state to a dictionary."""
@@ -83,3 +142,182 @@ class FiniteStateMachine:
             "history": self.history
         }
 
+
+
+class StateEntry:
+    """State register entry with fixed slots instead of a per-transition dict."""
+    __slots__ = ("enter_time", "exit_time", "triggered_by", "meta", "entered_by_event")
+
+    def __init__(self, enter_time, exit_time=None, triggered_by=None, meta=None, entered_by_event=False):
+        self.enter_time = enter_time
+        self.exit_time = exit_time
+        self.triggered_by = triggered_by
+        self.meta = meta
+        self.entered_by_event = entered_by_event
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(entry.get("enter_time"), entry.get("exit_time"), entry.get("triggered_by"),
+                   entry.get("meta"), "triggered_by" in entry)
+
+    def to_dict(self):
+        entry = {"enter_time": self.enter_time, "exit_time": self.exit_time}
+        if self.entered_by_event:
+            entry["triggered_by"] = self.triggered_by
+            entry["meta"] = self.meta
+        return entry
+
+
+class CompiledStateMachine:
+    """
+    FiniteStateMachine with the transitions compiled into a dense table.
+
+    State and event names are interned to integer IDs once; a transition is
+    then one dict lookup for the event ID and one list index into the
+    ``states x events`` table. Each transition takes a single timestamp,
+    register entries are StateEntry slots and history records are plain
+    tuples. Dictionaries are only built when exporting. The public API and the
+    export format match FiniteStateMachine.
+    """
+    NO_TRANSITION = -1
+
+    def __init__(self, initial_state="UNKNOWN", transitions=None, history_size=HISTORY_SIZE, on_history_evict=None):
+        self.on_history_evict = on_history_evict
+        self._history = HistoryBuffer(history_size, self._evict if on_history_evict else None)
+        self._compile(transitions if transitions is not None else {})
+        self._state = self._state_id(initial_state)
+        self._register = {self._state: StateEntry(time.time())}
+        self._last_event = None
+        self.last_event_time = None
+
+    # --- Compilation -------------------------------------------------------
+    def _compile(self, transitions):
+        self._table = None
+        self.state_names = []
+        self.state_ids = {}
+        self.event_names = []
+        self.event_ids = {}
+        for state, events in transitions.items():
+            self._state_id(state)
+            for event, target in events.items():
+                self._state_id(target)
+                if event not in self.event_ids:
+                    self.event_ids[event] = len(self.event_names)
+                    self.event_names.append(event)
+        self._rebuild_table(transitions)
+
+    def _rebuild_table(self, transitions):
+        width = len(self.event_names)
+        table = [self.NO_TRANSITION] * (len(self.state_names) * width)
+        for state, events in transitions.items():
+            row = self.state_ids[state] * width
+            for event, target in events.items():
+                table[row + self.event_ids[event]] = self.state_ids[target]
+        self._width = width
+        self._table = table
+        self._transitions = transitions
+
+    def _state_id(self, name):
+        """Interns a state name. States only seen in a loaded register or as
+        the initial state get an ID with an empty table row."""
+        state_id = self.state_ids.get(name)
+        if state_id is None:
+            state_id = self.state_ids[name] = len(self.state_names)
+            self.state_names.append(name)
+            if self._table is not None:
+                self._table.extend([self.NO_TRANSITION] * self._width)
+        return state_id
+
+    # --- Transitions -------------------------------------------------------
+    def trigger_event(self, event, meta=None):
+        """
+        Triggers a state transition based on an event.
+        Returns True if the state changed, False otherwise.
+        """
+        event_id = self.event_ids.get(event)
+        if event_id is None:
+            return False
+        old_state = self._state
+        new_state = self._table[old_state * self._width + event_id]
+        if new_state < 0:
+            return False
+
+        now = time.time()
+        old_entry = self._register.get(old_state)
+        if old_entry is not None:
+            old_entry.exit_time = now
+        self._state = new_state
+        self._last_event = event_id
+        self.last_event_time = now
+        self._register[new_state] = StateEntry(now, None, event, meta, True)
+        names = self.state_names
+        self._history.append((now, names[old_state], names[new_state], event, meta))
+        return True
+
+    def _evict(self, raw):
+        self.on_history_evict(HistoryRecord(*raw))
+
+    # --- Accessors ---------------------------------------------------------
+    @property
+    def current_state(self):
+        return self.state_names[self._state]
+
+    @property
+    def last_event(self):
+        return None if self._last_event is None else self.event_names[self._last_event]
+
+    @property
+    def transitions(self):
+        return self._transitions
+
+    @property
+    def state_register(self):
+        return {self.state_names[s]: entry.to_dict() for s, entry in self._register.items()}
+
+    @property
+    def history(self):
+        """Recent transitions, oldest first, as dictionaries."""
+        return [HistoryRecord(*raw)._asdict() for raw in self._history]
+
+    def get_current_state(self):
+        """Returns the current state of the FSM."""
+        return self.state_names[self._state]
+
+    def get_possible_transitions(self):
+        """Returns a list of possible events from the current state."""
+        row = self._state * self._width
+        return [name for event_id, name in enumerate(self.event_names)
+                if self._table[row + event_id] != self.NO_TRANSITION]
+
+    # --- Persistence -------------------------------------------------------
+    def load_state(self, state_dict):
+        """Loads the FSM state from a dictionary written by either FSM class."""
+        self._compile(state_dict.get("transitions", {}))
+        self._state = self._state_id(state_dict.get("current_state", "UNKNOWN"))
+        self._register = {
+            self._state_id(name): StateEntry.from_dict(entry)
+            for name, entry in state_dict.get("state_register", {}).items()
+        }
+        last_event = state_dict.get("last_event")
+        self._last_event = self.event_ids.get(last_event)
+        self.last_event_time = state_dict.get("last_event_time")
+        self._history.clear()
+        for entry in state_dict.get("history", []):
+            self._history.append((entry.get("timestamp"), entry.get("from_state"), entry.get("to_state"),
+                                  entry.get("event"), entry.get("meta")))
+
+    def export_state(self):
+        """Exports the FSM state to a dictionary."""
+        now = time.time()
+        entry = self._register.get(self._state)
+        enter_time = entry.enter_time if entry is not None and entry.enter_time is not None else now
+        return {
+            "current_state": self.current_state,
+            "last_event": self.last_event,
+            "last_event_time": self.last_event_time,
+            "state_duration": now - enter_time,
+            "possible_transitions": self.get_possible_transitions(),
+            "transitions": self._transitions,
+            "state_register": self.state_register,
+            "history": self.history
+        }
@@ -6,6 +6,8 @@ import datetime
 import fcntl
 
 from core.fsm_interface import FSMInterface
+from core.fsm_io import get_event_queue
+from utils.latency import LatencyHistogram
 from core.file_paths import FSM_REQUESTS_FILE, FSM_LOG_FILE, FSM_STATE_FILE, BASE_DIR
 
 # --- Logging Setup ---
@@ -35,9 +37,18 @@ banner(
 )
 # --- End Banner ---
 
-def get_requests():
+def get_requests(max_requests: int = 1000):
     """
-    Safely reads and clears the request queue file.
+    Reads the next batch of requests from the append-only queue.
+    The caller commits the queue cursor once they are processed.
+    """
+    return get_event_queue().read_batch(max_requests)
+
+
+def drain_legacy_requests():
+    """
+    Safely reads and clears the old fsm_requests.json queue, so requests
+    written by an older producer are not lost after an upgrade.
     Returns a list of requests.
     """
     if not os.path.exists(FSM_REQUESTS_FILE):
@@ -67,6 +78,12 @@ def get_requests():
     return requests if isinstance(requests, list) else []
 
 
+# Longest the idle gatekeeper sleeps without a doorbell ring (safety net only)
+IDLE_TIMEOUT = 5.0
+# How often the end-to-end latency histogram is logged, in seconds
+REPORT_INTERVAL = 60.0
+
+
 def run_gatekeeper():
     """The main loop for the FSM Gatekeeper process."""
     log.info("FSM Gatekeeper process starting.")
@@ -74,30 +91,46 @@ def run_gatekeeper():
     # Initialize the FSM Interface
     fsm_interface = FSMInterface()
 
+    queue = get_event_queue()
+    queue.listen()  # Producers ring this after every enqueue
+    pending_legacy = drain_legacy_requests()
+    latency = LatencyHistogram("enqueue->fsm_state")
+    last_report = time.time()
+
     log.info("Gatekeeper is now running...")
     while True:
-        requests = get_requests()
+        requests = pending_legacy or get_requests()
+        pending_legacy = []
 
         if requests:
             log.info(f"Processing {len(requests)} command(s) from queue.")
+            batch = []
+            valid = []
             for req in requests:
                 if isinstance(req, dict) and "event" in req:
                     event = req["event"]
                     source = req.get("from", "unknown")
                     metadata = req.get("metadata") # Optional metadata
                     log.info(f"Executing event '{event}' from '{source}'.")
-                    
-                    # Use the FSM Interface to trigger the event
-                    fsm_interface.trigger_event(event, metadata)
+                    batch.append((event, metadata))
+                    valid.append(req)
                 else:
                     log.warning(f"Received invalid request format: {req}")
-        
-        time.sleep(0.2) # Prevent busy-waiting
+
+            # Apply the whole drain in memory; fsm_state.json is written once
+            fsm_interface.apply_events(batch)
+            done = time.time()
+            for req in valid:
+                if isinstance(req.get("enqueued_at"), (int, float)):
+                    latency.record((done - req["enqueued_at"]) * 1000.0)
+            queue.commit()
+            if time.time() - last_report >= REPORT_INTERVAL and latency.count:
+                log.info(latency.summary())
+                last_report = time.time()
+            continue  # Keep draining until the queue is empty
+
+        # Block until a producer rings; the timeout only guards against lost rings
+        queue.wait(timeout=IDLE_TIMEOUT)
 
 if __name__ == "__main__":
-    # Ensure the request file exists to avoid startup race conditions
-    if not os.path.exists(FSM_REQUESTS_FILE):
-        with open(FSM_REQUESTS_FILE, 'w') as f:
-            json.dump([], f)
-            
     run_gatekeeper()
\ No newline at end of file
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+FSM History Log - append-only, size-rotated archive of FSM transitions.
+
+FiniteStateMachine keeps only a bounded window of recent transitions; the
+entries it evicts are appended here as JSON lines. When the active file
+exceeds ``max_bytes`` it is rotated like logging's RotatingFileHandler
+(fsm_history.jsonl -> .1 -> .2 ...), keeping ``backup_count`` old files.
+Records are written in time order, so ``query()`` can skip whole files.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.file_paths import FSM_HISTORY_FILE
+from utils.jsonl_log import rotate_file
+
+log = logging.getLogger(__name__)
+
+
+class FSMHistoryLog:
+    """Spill target for evicted history records, queryable by time range."""
+
+    def __init__(self, path: str = FSM_HISTORY_FILE, max_bytes: int = 1024 * 1024, backup_count: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def append(self, record) -> None:
+        """Appends one HistoryRecord (or a dict with the same keys)."""
+        entry = record._asdict() if hasattr(record, "_asdict") else dict(record)
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+                size = f.tell()
+            if size >= self.max_bytes:
+                rotate_file(self.path, self.backup_count)
+
+    def files(self) -> List[str]:
+        """Existing log files, oldest first."""
+        candidates = [f"{self.path}.{i}" for i in range(self.backup_count, 0, -1)] + [self.path]
+        return [p for p in candidates if os.path.exists(p)]
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Returns archived transitions with ``start <= timestamp <= end``, oldest first."""
+        return list(self._iter_range(start, end))
+
+    def _iter_range(self, start: Optional[float], end: Optional[float]) -> Iterator[Dict[str, Any]]:
+        for path in self.files():
+            try:
+                with open(path, "rb") as f:
+                    if start is not None and _last_timestamp(f) < start:
+                        continue  # The whole file is older than the range
+                    f.seek(0)
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # Torn line from a crash mid-write
+                        timestamp = entry.get("timestamp") or 0
+                        if end is not None and timestamp > end:
+                            return
+                        if start is None or timestamp >= start:
+                            yield entry
+            except FileNotFoundError:
+                continue  # Rotated away while we were reading
+
+
+def _last_timestamp(f) -> float:
+    """Timestamp of the last complete record, read from the end of the file."""
+    size = f.seek(0, os.SEEK_END)
+    f.seek(max(0, size - 4096))
+    for line in reversed(f.read().splitlines()):
+        try:
+            return json.loads(line).get("timestamp") or 0
+        except (ValueError, AttributeError):
+            continue
+    return float("inf")  # Unknown; do not skip the file
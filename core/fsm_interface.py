@@ -7,8 +7,11 @@ FSM Interface - Handles all I/O for the FSM.
 import json
 import time
 import os
-from .fsm_core import FiniteStateMachine
+from .fsm_core import CompiledStateMachine, FiniteStateMachine
 from .fsm_client import FSMClient
+from .fsm_history_log import FSMHistoryLog
+from .fsm_logger import log_transitions
+from .file_paths import FSM_HISTORY_FILE, FSM_STATE_FILE
 
 # Assuming shared_json_cache and system_logger are available
 # from .shared_json_cache import SharedJSONCache
@@ -18,21 +21,29 @@ class FSMInterface:
     """
     Manages the FSM's state persistence and interaction with the filesystem.
     """
-    def __init__(self, fsm_state_file, mission_file=None):
+    def __init__(self, fsm_state_file=FSM_STATE_FILE, mission_file=None, history_file=FSM_HISTORY_FILE, compiled=True):
         self.fsm_state_file = fsm_state_file
         self.mission_file = mission_file
+        # The compiled table is the fast path; both classes share one state format
+        self.fsm_class = CompiledStateMachine if compiled else FiniteStateMachine
+        # Transitions that fall out of the FSM's in-memory window are archived here
+        self.history_log = FSMHistoryLog(history_file)
+        # One long-lived client: the gatekeeper is the only writer of the state file
+        self.fsm_client = FSMClient(path=fsm_state_file or FSM_STATE_FILE)
         self.fsm = self._load_or_initialize_fsm()
         # self.logger = SystemLogger("FSM_Interface")
 
     def _load_or_initialize_fsm(self):
         """Loads the FSM state from file or initializes a new one using FSMClient."""
-        fsm_client = FSMClient()
-        state_data = fsm_client.get_state()
+        state_data = self.fsm_client.get_state()
         
         if state_data and not state_data.get("error"): # Check if state_data is valid and not an error state
-            fsm = FiniteStateMachine()
-            fsm.load_state(state_data)
-            return fsm
+            # sync_state_to_disk stores the exported FSM under "context"
+            exported = state_data.get("context") if "current_state" not in state_data else state_data
+            if isinstance(exported, dict) and exported.get("transitions"):
+                fsm = self.fsm_class(on_history_evict=self.history_log.append)
+                fsm.load_state(exported)
+                return fsm
         
         # Default transitions if no mission or state file or if there was an error loading state
         default_transitions = {
@@ -42,31 +53,61 @@ class FSMInterface:
             "AVOIDING": {"OBSTACLE_CLEARED": "MISSION_ACTIVE"},
             "ERROR": {"RESET": "IDLE"}
         }
-        return FiniteStateMachine(initial_state="IDLE", transitions=default_transitions)
+        return self.fsm_class(initial_state="IDLE", transitions=default_transitions,
+                              on_history_evict=self.history_log.append)
 
-    def sync_state_to_disk(self):
-        """Exports the current FSM state and writes it to the JSON file using FSMClient."""
+    def sync_state_to_disk(self, transitions=None):
+        """Exports the current FSM state and writes it to the JSON file using FSMClient.
+        ``transitions`` are (from_state, to_state, event, source) tuples logged in one go."""
         state_dict = self.fsm.export_state()
-        fsm_client = FSMClient()
         meta = {"trigger": "sync_to_disk", "context": state_dict, "source": "FSMInterface"}
-        fsm_client.set_state(state_dict.get("current_state", "UNKNOWN"), meta)
+        if transitions:
+            meta["trigger"] = transitions[-1][2]
+        self.fsm_client.set_state(state_dict.get("current_state", "UNKNOWN"), meta, log=not transitions)
+        if transitions:
+            log_transitions([
+                ({"state": from_s}, {"state": to_s}, event, source) for from_s, to_s, event, source in transitions
+            ])
+
+    def apply_events(self, events):
+        """
+        Applies a batch of (event, meta) pairs to the in-memory FSM, then
+        writes the final state once and logs all transitions together.
+        Returns a list with the trigger result of each event.
+        """
+        results = []
+        transitions = []
+        for event, meta in events:
+            from_state = self.fsm.get_current_state()
+            changed = self.fsm.trigger_event(event, meta)
+            results.append(changed)
+            if changed:
+                source = meta.get("source") if isinstance(meta, dict) else None
+                transitions.append((from_state, self.fsm.get_current_state(), event, source))
+        if transitions:
+            self.sync_state_to_disk(transitions)
+        return results
 
     def trigger_event(self, event, meta=None):
         """
         Triggers an event in the FSM core and syncs the new state to disk.
         """
-        # self.logger.log(f"Attempting to trigger event: '{event}' with meta: {meta}")
-        if self.fsm.trigger_event(event, meta):
-            # self.logger.log(f"Event '{event}' successful. State changed to {self.fsm.get_current_state()}")
-            self.sync_state_to_disk()
-            return True
-        # self.logger.log(f"Event '{event}' had no effect on state {self.fsm.get_current_state()}", level="WARNING")
-        return False
+        return self.apply_events([(event, meta)])[0]
 
     def get_status(self):
         """Returns the full exported state of the FSM."""
         return self.fsm.export_state()
 
+    def get_history(self, start=None, end=None):
+        """Returns transitions between ``start`` and ``end`` (epoch seconds),
+        combining the archive with the in-memory window."""
+        archived = self.history_log.query(start, end)
+        recent = [
+            entry for entry in self.fsm.history
+            if (start is None or entry["timestamp"] >= start) and (end is None or entry["timestamp"] <= end)
+        ]
+        return archived + recent
+
 # Example of how to use it with a CLI
 if __name__ == '__main__':
     import sys
@@ -3,49 +3,46 @@
 QIKI Bot
 FSM I/O - Enqueues FSM events.
 """
-import json
-import os
-import fcntl
 import logging
 import datetime
+import threading
+import time
 from typing import Dict, Any, Optional
 
-from .file_paths import FSM_REQUESTS_FILE
+from .event_log import EventLog
 
 # Setup logging
 log = logging.getLogger(__name__)
 
+_queue: Optional[EventLog] = None
+_queue_lock = threading.Lock()
+
+
+def get_event_queue() -> EventLog:
+    """Returns this process's handle on the FSM request queue."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = EventLog()
+    return _queue
+
+
 def enqueue_event(event: str, source: str, metadata: Optional[Dict[str, Any]] = None) -> None:
     """
-    Atomically adds a command to the fsm_requests.json queue.
+    Atomically appends a command to the FSM request queue (core.event_log).
     This is the method external modules should use to request a state change.
     """
     request = {
         "event": event, 
         "from": source,
         "timestamp": datetime.datetime.now().isoformat(),
+        "enqueued_at": time.time(),  # for end-to-end latency in the gatekeeper
         "metadata": metadata
     }
 
     try:
-        # Ensure the file exists before trying to lock it
-        if not os.path.exists(FSM_REQUESTS_FILE):
-            with open(FSM_REQUESTS_FILE, 'w') as f:
-                json.dump([], f)
-
-        with open(FSM_REQUESTS_FILE, "r+") as f:
-            fcntl.flock(f, fcntl.LOCK_EX)
-            try:
-                queue = json.load(f)
-                queue.append(request)
-                f.seek(0)
-                f.truncate()
-                json.dump(queue, f, indent=4)
-                log.info(f"Enqueued event '{event}' from '{source}'. Queue size: {len(queue)}")
-            except json.JSONDecodeError:
-                log.warning(f"Could not decode {FSM_REQUESTS_FILE}. Overwriting with new request.")
-                json.dump([request], f, indent=4)
-            finally:
-                fcntl.flock(f, fcntl.LOCK_UN)
-    except IOError as e:
-        log.error(f"Failed to enqueue event in {FSM_REQUESTS_FILE}: {e}")
\ No newline at end of file
+        get_event_queue().append(request)
+        log.info(f"Enqueued event '{event}' from '{source}'.")
+    except OSError as e:
+        log.error(f"Failed to enqueue event '{event}': {e}")
@@ -5,16 +5,65 @@ from core.file_paths import FSM_LOG_FILE
 
 os.makedirs(os.path.dirname(FSM_LOG_FILE), exist_ok=True)
 
+
+class BatchFileHandler(logging.FileHandler):
+    """FileHandler that can also write several records with one write and flush."""
+
+    def handle_batch(self, records: list) -> None:
+        """Like ``handle()`` for each record (level, filters, lock, formatting,
+        handleError), but with a single write and flush."""
+        records = [r for r in records if r.levelno >= self.level and self.filter(r)]
+        if not records:
+            return
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()  # delay=True: opened on the first emit
+            self.stream.write("".join(self.format(r) + self.terminator for r in records))
+            self.flush()
+        except Exception:  # noqa: BLE001
+            self.handleError(records[0])
+        finally:
+            self.release()
+
+
 logger = logging.getLogger("fsm_logger")
 if not logger.handlers:
-    handler = logging.FileHandler(FSM_LOG_FILE)
+    handler = BatchFileHandler(FSM_LOG_FILE)
     formatter = logging.Formatter("%(asctime)s - %(message)s")
     handler.setFormatter(formatter)
     logger.addHandler(handler)
     logger.setLevel(logging.INFO)
 
+def _format_transition(from_state: dict, to_state: dict, trigger: str | None, source: str | None) -> str:
+    from_name = from_state.get('mode') or from_state.get('state')
+    to_name = to_state.get('mode') or to_state.get('state')
+    return f"{from_name} -> {to_name} | trigger={trigger} | source={source} | value={to_state}"
+
+
 def log_transition(from_state: dict, to_state: dict, trigger: str | None, source: str | None):
     """Log FSM transition details."""
-    logger.info(
-        f"{from_state.get('mode')} -> {to_state.get('mode')} | trigger={trigger} | source={source} | value={to_state}"
-    )
+    logger.info(_format_transition(from_state, to_state, trigger, source))
+
+
+def log_transitions(transitions: list):
+    """Log several (from_state, to_state, trigger, source) transitions with a
+    single write and flush per BatchFileHandler; other handlers (including
+    those of ancestor loggers) get the records one by one, as logger.info would."""
+    if not transitions or not logger.isEnabledFor(logging.INFO):
+        return
+    records = [
+        logger.makeRecord(logger.name, logging.INFO, __file__, 0, _format_transition(*t), None, None)
+        for t in transitions
+    ]
+    records = [r for r in records if logger.filter(r)]
+    node = logger
+    while node is not None:
+        for handler in node.handlers:
+            if isinstance(handler, BatchFileHandler):
+                handler.handle_batch(records)
+                continue
+            for record in records:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        node = node.parent if node.propagate else None
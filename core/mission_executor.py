@@ -9,7 +9,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 from core.fsm_client import send_event
-from core.telemetry import TelemetryManager
+from core.telemetry import get_telemetry_manager
 from core.sensors import SensorManager
 from core.file_paths import MISSION_FILE
 
@@ -28,7 +28,7 @@ def banner(title: str, description: str):
 
 class MissionExecutor:
     def __init__(self):
-        self.telemetry_manager = TelemetryManager()
+        self.telemetry_manager = get_telemetry_manager()
         self.sensor_manager = SensorManager()
         self.mission = self._load_mission()
         print("[Mission Executor] Initialized.")
@@ -86,6 +86,7 @@ class MissionExecutor:
 
             # 1. Check condition
             if "condition" in step:
+                self.telemetry_manager.refresh_if_changed()
                 telemetry_data = self.telemetry_manager.get()
                 sensor_data = self.sensor_manager.get()
                 data_context = {"telemetry": telemetry_data, "sensors": sensor_data}
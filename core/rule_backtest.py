@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Rule Backtest - evaluates rules over recorded frames with NumPy.
+
+Frames are columnar: a mapping from a dotted context path (as used in rule
+conditions, e.g. "telemetry.battery_percent" or "fsm.state") to a 1-D array
+with one entry per frame. Every rule condition becomes a boolean mask over
+all frames at once; identical sub-conditions are computed only once.
+
+Missing data behaves as in RuleEngine.evaluate: a path absent from the
+frames, a NaN in a numeric column or None in an object column makes the
+comparison False for that frame.
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from core.rule_compiler import OPERATORS, compare_value, parse_condition
+
+_NUMPY_OPERATORS = {
+    "==": np.equal, "!=": np.not_equal,
+    ">=": np.greater_equal, "<=": np.less_equal,
+    ">": np.greater, "<": np.less,
+}
+
+
+class BacktestResult(NamedTuple):
+    names: List[str]          # Rule names, in priority order
+    actions: List[Any]        # Rule actions, in priority order
+    fired: np.ndarray         # bool, shape (rules, frames): condition true
+    winner: np.ndarray        # int, shape (frames,): index of the rule run_once() would pick, -1 if none
+
+    def timeline(self, name: str) -> np.ndarray:
+        """Boolean firing timeline of one rule."""
+        return self.fired[self.names.index(name)]
+
+    def fire_counts(self) -> Dict[str, int]:
+        return dict(zip(self.names, self.fired.sum(axis=1).tolist()))
+
+    def winning_actions(self) -> List[Any]:
+        """Action proposed in every frame (None where no rule fired)."""
+        return [self.actions[i] if i >= 0 else None for i in self.winner.tolist()]
+
+
+def frames_from_contexts(contexts: Iterable[Dict[str, Any]], paths: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Builds columnar frames from a sequence of nested context dicts.
+    Numeric paths become float arrays (NaN where missing), others object arrays."""
+    columns: Dict[str, list] = {path: [] for path in paths}
+    split = {path: path.split(".") for path in paths}
+    for context in contexts:
+        for path, keys in split.items():
+            value = context
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            columns[path].append(value)
+    frames = {}
+    for path, values in columns.items():
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+            frames[path] = np.array([np.nan if v is None else v for v in values], dtype=float)
+        else:
+            frames[path] = np.array(values, dtype=object)
+    return frames
+
+
+def condition_paths(conditions: Iterable[str]) -> List[str]:
+    """Dotted paths referenced by the given conditions."""
+    paths: Dict[str, None] = {}
+
+    def walk(tree):
+        if tree[0] == "cmp":
+            paths[".".join(tree[1])] = None
+        elif tree[0] == "not":
+            walk(tree[1])
+        else:
+            for child in tree[1]:
+                walk(child)
+
+    for condition in conditions:
+        walk(parse_condition(condition))
+    return list(paths)
+
+
+class _MaskBuilder:
+    def __init__(self, frames: Dict[str, Any], length: int):
+        self.frames = frames
+        self.length = length
+        self.cache: Dict[tuple, np.ndarray] = {}
+
+    def mask(self, tree: tuple) -> np.ndarray:
+        kind = tree[0]
+        key = ("cmp", tree[1], tree[2], type(tree[3]).__name__, tree[3]) if kind == "cmp" else tree
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if kind == "cmp":
+            result = self.compare(".".join(tree[1]), tree[2], tree[3])
+        elif kind == "not":
+            result = ~self.mask(tree[1])
+        else:
+            masks = [self.mask(child) for child in tree[1]]
+            result = np.logical_and.reduce(masks) if kind == "and" else np.logical_or.reduce(masks)
+        self.cache[key] = result
+        return result
+
+    def compare(self, path: str, op: str, constant) -> np.ndarray:
+        column = self.frames.get(path)
+        if column is None:
+            return np.zeros(self.length, dtype=bool)
+        column = np.asarray(column)
+        numeric_constant = isinstance(constant, (int, float))
+        kind = column.dtype.kind
+        if kind == "O":
+            # Mixed or missing values: fall back to the scalar comparison
+            compare = OPERATORS[op]
+            return np.fromiter((compare_value(v, compare, constant) for v in column), dtype=bool, count=len(column))
+        present = ~np.isnan(column) if kind == "f" else np.ones(len(column), dtype=bool)
+        if (kind in "biuf") != numeric_constant:
+            # Number vs string: only "!=" holds, like the scalar comparison
+            return present if op == "!=" else np.zeros(len(column), dtype=bool)
+        return _NUMPY_OPERATORS[op](column, constant) & present
+
+
+def backtest(rules: Sequence[Dict[str, Any]], frames: Dict[str, Any], length: Optional[int] = None) -> BacktestResult:
+    """Evaluates ``rules`` (valid conditions, in priority order) over ``frames``."""
+    if length is None:
+        lengths = {len(column) for column in frames.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Frame columns have different lengths: {sorted(lengths)}")
+        length = lengths.pop() if lengths else 0
+
+    builder = _MaskBuilder(frames, length)
+    fired = np.zeros((len(rules), length), dtype=bool)
+    for i, rule in enumerate(rules):
+        fired[i] = builder.mask(parse_condition(rule["condition"]))
+
+    # First rule in priority order wins; argmax finds the first True per column
+    if len(rules):
+        winner = np.where(fired.any(axis=0), np.argmax(fired, axis=0), -1)
+    else:
+        winner = np.full(length, -1)
+    return BacktestResult(
+        names=[rule.get("name", "Unnamed Rule") for rule in rules],
+        actions=[rule.get("action") for rule in rules],
+        fired=fired,
+        winner=winner,
+    )
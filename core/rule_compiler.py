@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Rule Compiler - turns rule condition strings into predicates once, at load.
+
+Grammar (lowest precedence first):
+    expr        := and_expr ("or" and_expr)*
+    and_expr    := not_expr ("and" not_expr)*
+    not_expr    := "not" not_expr | "(" expr ")" | comparison
+    comparison  := path OP literal        OP: == != >= <= > <
+    path        := name ("." name)*       e.g. sensors.thermal.core_temp.cpu
+    literal     := number | 'text' | "text" | true | false | bare_word
+
+``parse_condition`` returns the syntax tree as nested tuples:
+    ("cmp", keys, op, constant)   keys is the pre-split path tuple
+    ("and", children) / ("or", children) / ("not", child)
+
+``compile_condition`` turns it into a plain function ``predicate(context)``.
+Literals are converted once, so evaluation is only dictionary lookups and
+comparisons. A missing path or a comparison between incompatible types
+evaluates to False, as before.
+"""
+import operator
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+OPERATORS = {
+    "==": operator.eq, "!=": operator.ne,
+    ">=": operator.ge, "<=": operator.le,
+    ">": operator.gt, "<": operator.lt,
+}
+_KEYWORDS = {"and", "or", "not"}
+_LITERALS = {"true": True, "false": False}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<op>==|!=|>=|<=|>|<)
+      | (?P<paren>[()])
+      | (?P<name>[A-Za-z_][\w]*(?:\.[A-Za-z_0-9][\w]*)*)
+    )""", re.VERBOSE)
+
+
+class RuleSyntaxError(ValueError):
+    """Raised when a condition string cannot be compiled."""
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise RuleSyntaxError(f"Unexpected input at position {pos} in condition: {text!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "name" and value in _KEYWORDS:
+            kind = value
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+def _lookup(keys: Tuple[str, ...]) -> Callable[[Dict[str, Any]], Any]:
+    """Returns a function resolving ``keys`` in a nested dict, or None."""
+    if len(keys) == 2:
+        first, second = keys
+
+        def lookup2(context):
+            try:
+                return context[first][second]
+            except (KeyError, TypeError, IndexError):
+                return None
+        return lookup2
+
+    def lookup(context):
+        try:
+            for key in keys:
+                context = context[key]
+            return context
+        except (KeyError, TypeError, IndexError):
+            return None
+    return lookup
+
+
+def compare_value(value, compare, constant) -> bool:
+    """Applies one comparison to a looked-up value."""
+    if value is None or isinstance(value, (dict, list)):
+        return False
+    try:
+        return compare(value, constant)
+    except TypeError:
+        return False  # e.g. a string compared with a number
+
+
+def _comparison(keys: Tuple[str, ...], compare, constant) -> Predicate:
+    lookup = _lookup(keys)
+
+    def predicate(context):
+        return compare_value(lookup(context), compare, constant)
+    return predicate
+
+
+def _all(predicates: List[Predicate]) -> Predicate:
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda context: first(context) and second(context)
+    return lambda context: all(p(context) for p in predicates)
+
+
+def _any(predicates: List[Predicate]) -> Predicate:
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda context: first(context) or second(context)
+    return lambda context: any(p(context) for p in predicates)
+
+
+def _not(predicate: Predicate) -> Predicate:
+    return lambda context: not predicate(context)
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def error(self, message: str) -> RuleSyntaxError:
+        return RuleSyntaxError(f"{message} in condition: {self.text!r}")
+
+    def peek(self) -> str:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else "end"
+
+    def take(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise self.error("Unexpected end")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> tuple:
+        if not self.tokens:
+            raise self.error("Empty condition")
+        tree = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise self.error(f"Unexpected '{self.tokens[self.pos][1]}'")
+        return tree
+
+    def or_expr(self) -> tuple:
+        operands = [self.and_expr()]
+        while self.peek() == "or":
+            self.take()
+            operands.append(self.and_expr())
+        return operands[0] if len(operands) == 1 else ("or", tuple(operands))
+
+    def and_expr(self) -> tuple:
+        operands = [self.not_expr()]
+        while self.peek() == "and":
+            self.take()
+            operands.append(self.not_expr())
+        return operands[0] if len(operands) == 1 else ("and", tuple(operands))
+
+    def not_expr(self) -> tuple:
+        if self.peek() == "not":
+            self.take()
+            return ("not", self.not_expr())
+        if self.peek() == "paren":
+            _, value = self.take()
+            if value != "(":
+                raise self.error("Unexpected ')'")
+            tree = self.or_expr()
+            if self.take() != ("paren", ")"):
+                raise self.error("Missing ')'")
+            return tree
+        return self.comparison()
+
+    def comparison(self) -> tuple:
+        kind, path = self.take()
+        if kind != "name":
+            raise self.error(f"Expected a field path, got '{path}'")
+        kind, op = self.take()
+        if kind != "op":
+            raise self.error(f"Expected an operator after '{path}', got '{op}'")
+        return ("cmp", tuple(path.split(".")), op, self.literal())
+
+    def literal(self):
+        kind, value = self.take()
+        if kind == "number":
+            return float(value)
+        if kind == "string":
+            return value[1:-1]
+        if kind == "name":
+            return _LITERALS.get(value.lower(), value)  # A bare word is a string
+        raise self.error(f"Expected a value, got '{value}'")
+
+
+def parse_condition(text: str) -> tuple:
+    """Parses a condition string into its syntax tree.
+    Raises RuleSyntaxError if the condition is malformed."""
+    return _Parser(text).parse()
+
+
+def build_predicate(node: tuple) -> Predicate:
+    """Turns a syntax tree from ``parse_condition`` into a predicate."""
+    kind = node[0]
+    if kind == "cmp":
+        return _comparison(node[1], OPERATORS[node[2]], node[3])
+    if kind == "not":
+        return _not(build_predicate(node[1]))
+    children = [build_predicate(child) for child in node[1]]
+    return _all(children) if kind == "and" else _any(children)
+
+
+def compile_condition(text: str) -> Predicate:
+    """Compiles a condition string into ``predicate(context) -> bool``.
+    Raises RuleSyntaxError if the condition is malformed."""
+    return build_predicate(parse_condition(text))
+
+
+def condition_paths(node: tuple) -> List[Tuple[str, ...]]:
+    """The context paths a syntax tree reads, in order of first use."""
+    if node[0] == "cmp":
+        return [node[1]]
+    children = [node[1]] if node[0] == "not" else node[1]
+    paths: List[Tuple[str, ...]] = []
+    for child in children:
+        paths += [keys for keys in condition_paths(child) if keys not in paths]
+    return paths
@@ -1,5 +1,7 @@
+import hashlib
 import json
 import os
+import threading
 import time
 from datetime import datetime
 
@@ -8,9 +10,13 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(project_root)
 
-from core.telemetry import TelemetryManager
+from core.telemetry import get_telemetry_manager
 from core.sensors import SensorManager
 from core.fsm_client import FSMClient
+from core.rule_compiler import RuleSyntaxError, compile_condition, condition_paths, parse_condition
+from core.rule_matcher import RuleMatcher
+from core.file_watcher import create_watcher
+from utils.jsonl_log import AsyncJsonlWriter
 from core.file_paths import (
     TELEMETRY_FILE,
     SENSORS_FILE,
@@ -20,13 +26,25 @@ from core.file_paths import (
 )
 
 
-def log_rule_trigger(rule_id: str, event: str, source: str, value: str) -> None:
-    """Append information about a triggered rule to rules_log.txt."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    os.makedirs(os.path.dirname(RULES_LOG_FILE), exist_ok=True)
-    with open(RULES_LOG_FILE, "a") as f:
-        f.write(f"[{timestamp}] Rule {rule_id} TRIGGERED\n")
-        f.write(f"  Event: {event}, Source: {source}, Value: {value}\n\n")
+_rule_logs = {}
+_rule_logs_lock = threading.Lock()
+
+
+def get_rule_log(path: str = RULES_LOG_FILE) -> AsyncJsonlWriter:
+    """Returns the process-wide background writer for ``path``."""
+    with _rule_logs_lock:
+        writer = _rule_logs.get(path)
+        if writer is None:
+            writer = _rule_logs[path] = AsyncJsonlWriter(path, max_bytes=5 * 1024 * 1024, backup_count=3)
+        return writer
+
+
+def log_rule_trigger(rule_id: str, event: str, source: str, value,
+                     writer: AsyncJsonlWriter | None = None) -> None:
+    """Queue a record about a triggered rule for rules_log.jsonl.
+    Never blocks on disk; records are dropped (and counted) if the writer falls behind."""
+    (writer or get_rule_log()).write({"ts": datetime.now().isoformat(), "rule": rule_id, "event": event,
+                                      "source": source, "value": value})
 
 class RuleEngine:
     """Core rule evaluation engine with cached rules."""
@@ -34,10 +52,23 @@ class RuleEngine:
     def __init__(self, rule_path: str = RULES_FILE):
         self.rule_path = rule_path
         self.fsm = FSMClient()
-        self.telemetry_manager = TelemetryManager()
+        self.telemetry_manager = get_telemetry_manager()
         self.sensor_manager = SensorManager()
         self.rules_log_file = RULES_LOG_FILE
-        os.makedirs(os.path.dirname(self.rules_log_file), exist_ok=True)
+        self.rule_log = get_rule_log(self.rules_log_file)
+        self._condition_cache = {}
+        self._inputs_cache = {}  # condition -> [(dotted path, keys)] it reads
+        self._firing = None  # name of the rule that fired on the last cycle
+        # Hot reload: a background thread compiles new rule sets and stages
+        # them here; evaluate() swaps them in before its next cycle
+        self._staged = None
+        self._staged_lock = threading.Lock()
+        self._rules_digest = None
+        self._watcher = None
+        self._watcher_thread = None
+        self._stop_event = threading.Event()
+        self.reload_stats = {"reloads": 0, "failures": 0, "rule_count": 0,
+                             "last_compile_ms": 0.0, "last_error": None}
         self.rules = self.load_rules()
         print("RuleEngine initialized.")
 
@@ -109,109 +140,187 @@ class RuleEngine:
         """Reload rules from disk into the cache."""
         self.rules = self.load_rules()
 
-    def _log_rule_fire(self, rule_name: str, action: str) -> None:
-        with open(self.rules_log_file, "a") as f:
-            ts = datetime.utcnow().isoformat()
-            f.write(f"{ts} - {rule_name} -> {action}\n")
-
-    def _get_value_from_path(self, data: dict, path: str):
-        """Helper to get a nested value from a dictionary using dot notation."""
-        parts = path.split('.')
-        current_data = data
-        for part in parts:
-            if isinstance(current_data, dict) and part in current_data:
-                current_data = current_data[part]
-            else:
-                return None # Path not found
-        return current_data
-
-    def _evaluate_single_condition(self, condition_str: str, data_context: dict) -> bool:
-        """Safely evaluates a single comparison condition (e.g., 'field < value')."""
-        # Supported operators
-        operators = {'>': lambda a, b: a > b, '<': lambda a, b: a < b, '==': lambda a, b: a == b,
-                     '!=': lambda a, b: a != b, '>=': lambda a, b: a >= b, '<=': lambda a, b: a <= b}
-
-        # Find the operator in the string
-        op = None
-        for operator_str in sorted(operators.keys(), key=len, reverse=True): # Check longer ops first (e.g., >= before >)
-            if operator_str in condition_str:
-                parts = condition_str.split(operator_str, 1)
-                if len(parts) == 2:
-                    field_path = parts[0].strip()
-                    value_str = parts[1].strip()
-                    op = operator_str
-                    break
-        
-        if not op:
-            print(f"Warning: No valid operator found in condition: {condition_str}")
-            return False
+    # --- Hot reload --------------------------------------------------------
+    def _compile_rule_file(self):
+        """Reads, validates and compiles the rules file. Returns (digest, rules,
+        matcher), or None if the content did not change since the last load.
+        Raises ValueError (or OSError) if the new rule set is not usable."""
+        with open(self.rule_path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if digest == self._rules_digest:
+            return None
+        rules = json.loads(raw)
+        if not isinstance(rules, list):
+            raise ValueError("rules file must contain a JSON list")
+        for rule in rules:
+            if not isinstance(rule, dict) or not rule.get("condition") or "action" not in rule:
+                raise ValueError(f"rule needs a condition and an action: {rule!r}")
+            self._compile(rule["condition"])  # Raises RuleSyntaxError (a ValueError)
+        rules = sorted(rules, key=lambda x: x.get('priority', 999))
+        return digest, rules, RuleMatcher(rules)
 
-        actual_value = self._get_value_from_path(data_context, field_path)
-        if actual_value is None:
-            print(f"Warning: Field '{field_path}' not found in data context for condition '{condition_str}'.")
+    def check_for_rule_changes(self) -> bool:
+        """Compiles the rules file if it changed and stages it for the next
+        cycle. On any error the current rule set stays active. Returns True
+        if a new rule set was staged."""
+        t0 = time.perf_counter()
+        try:
+            compiled = self._compile_rule_file()
+        except (OSError, ValueError) as e:
+            self.reload_stats["failures"] += 1
+            self.reload_stats["last_error"] = str(e)
+            print(f"[RuleEngine] Rejected new {self.rule_path}, keeping {len(self._rules)} current rules: {e}")
+            return False
+        if compiled is None:
             return False
+        digest, rules, matcher = compiled
+        compile_ms = (time.perf_counter() - t0) * 1000.0
+        with self._staged_lock:
+            self._staged = (digest, rules, matcher)
+        self.reload_stats.update(reloads=self.reload_stats["reloads"] + 1, rule_count=len(rules),
+                                 last_compile_ms=round(compile_ms, 3), last_error=None)
+        print(f"[RuleEngine] Compiled {len(rules)} rules from {self.rule_path} in {compile_ms:.1f} ms; "
+              f"swapping in before the next cycle.")
+        return True
+
+    def _swap_staged_rules(self) -> None:
+        if self._staged is None:
+            return
+        with self._staged_lock:
+            staged, self._staged = self._staged, None
+        if staged is not None:
+            self._rules_digest, self._rules, self._matcher = staged
+
+    def _watch_rules(self) -> None:
+        while not self._stop_event.is_set():
+            if self._watcher.wait():
+                self.check_for_rule_changes()
+
+    def start_rule_watcher(self, mode: str = "auto", interval: float = 0.5) -> None:
+        """Watches the rules file (inotify or mtime polling) and hot-reloads it."""
+        if self._watcher_thread is None or not self._watcher_thread.is_alive():
+            self._stop_event.clear()
+            self._watcher = create_watcher([self.rule_path], mode=mode, interval=interval)
+            self.check_for_rule_changes()  # Catch edits made before the watcher was armed
+            self._watcher_thread = threading.Thread(target=self._watch_rules, daemon=True)
+            self._watcher_thread.start()
+            print(f"[RuleEngine] Watching {self.rule_path} for changes ({self._watcher.mode} mode).")
+
+    def stop_rule_watcher(self) -> None:
+        if self._watcher_thread and self._watcher_thread.is_alive():
+            self._stop_event.set()
+            self._watcher.interrupt()
+            self._watcher_thread.join(timeout=2)
+            self._watcher.close()
+            self._watcher = None
+
+    def _rule_inputs(self, condition_str: str, data_context: dict) -> dict:
+        """The values a condition read, keyed by path ("telemetry.battery_percent": 12.5)."""
+        inputs = self._inputs_cache.get(condition_str)
+        if inputs is None:
+            inputs = self._inputs_cache[condition_str] = [
+                (".".join(keys), keys) for keys in condition_paths(parse_condition(condition_str))]
+        values = {}
+        for path, keys in inputs:
+            value = data_context
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            values[path] = value
+        return values
+
+    def _log_rule_fire(self, rule: dict, data_context: dict) -> None:
+        """Queues one record with the values the rule's condition read; the
+        write happens on the log thread."""
+        log_rule_trigger(rule.get("name", "Unnamed Rule"), rule.get("action"), "rule_engine",
+                         self._rule_inputs(rule["condition"], data_context), writer=self.rule_log)
+
+    @property
+    def rules(self) -> list:
+        return self._rules
 
-        # Attempt to convert value_str to appropriate type based on actual_value's type
+    @rules.setter
+    def rules(self, rules: list) -> None:
+        """Stores the rules and builds the incremental matcher for them."""
+        self._rules = rules
         try:
-            if isinstance(actual_value, (int, float)):
-                target_value = float(value_str)
-            elif isinstance(actual_value, bool):
-                target_value = value_str.lower() == 'true'
-            else: # Treat as string
-                target_value = value_str.strip("'\"") # Remove quotes if present
-        except ValueError:
-            print(f"Warning: Type conversion failed for '{value_str}' in condition '{condition_str}'.")
-            return False
+            with open(self.rule_path, "rb") as f:
+                self._rules_digest = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            self._rules_digest = None
+        valid = []
+        for rule in rules:
+            cond = rule.get("condition")
+            if not cond:
+                continue
+            try:
+                self._compile(cond)
+                valid.append(rule)
+            except RuleSyntaxError as e:
+                print(f"[RuleEngine] Skipping rule '{rule.get('name', 'Unnamed Rule')}': {e}")
+        self._matcher = RuleMatcher(valid)
 
-        return operators[op](actual_value, target_value)
+    def _compile(self, condition_str: str):
+        predicate = self._condition_cache.get(condition_str)
+        if predicate is None:
+            predicate = self._condition_cache[condition_str] = compile_condition(condition_str)
+        return predicate
 
     def check_condition(self, condition_str: str, data_context: dict) -> bool:
-        """Evaluate conditions with 'and' and 'or' operators."""
-        # This is a simplified parser for 'and'/'or' and assumes no parentheses
-        # For more complex logic, a proper expression parser would be needed.
-
-        if " and " in condition_str:
-            sub_conditions = condition_str.split(" and ")
-            return all(self._evaluate_single_condition(sub.strip(), data_context) for sub in sub_conditions)
-        elif " or " in condition_str:
-            sub_conditions = condition_str.split(" or ")
-            return any(self._evaluate_single_condition(sub.strip(), data_context) for sub in sub_conditions)
-        else:
-            return self._evaluate_single_condition(condition_str, data_context)
+        """Evaluate a condition with 'and', 'or', 'not' and parentheses.
+        Each distinct condition string is compiled only once."""
+        try:
+            predicate = self._compile(condition_str)
+        except RuleSyntaxError as e:
+            print(f"Warning: {e}")
+            return False
+        return predicate(data_context)
 
     def evaluate(self, telemetry: dict, fsm_state: str, sensors: dict | None = None) -> list:
-        """Return a list of rules that are triggered for the given state."""
+        """Return a list of rules that are triggered for the given state.
+        Only rules reading values that changed since the last call are re-evaluated."""
+        self._swap_staged_rules()
         sensors = sensors or {}
         data_context = {"telemetry": telemetry, "sensors": sensors, "fsm": {"state": fsm_state}}
-        triggered = []
-        for rule in self.rules:
-            name = rule.get("name", "Unnamed Rule")
-            cond = rule.get("condition")
-            if not cond:
-                continue
-            try:
-                if self.check_condition(cond, data_context):
-                    triggered.append(rule)
-            except Exception as e:
-                print(f"[RuleEngine] Failed to evaluate rule '{name}': {e}")
-        return triggered
-
-    def run_once(self) -> str | None:
-        """Checks rules and returns the event of the first matching rule."""
-        telemetry_data = self.telemetry_manager.get()
-        sensor_data = self.sensor_manager.get()
-        fsm_state = self.fsm.get_state().get("state")
+        return self._matcher.update(data_context)
+
+    def backtest(self, frames: dict):
+        """Evaluate every loaded rule over a columnar batch of recorded frames.
+
+        ``frames`` maps context paths ("telemetry.battery_percent",
+        "sensors.thermal.core_temp.cpu", "fsm.state", ...) to equal-length
+        arrays. Returns a core.rule_backtest.BacktestResult with the firing
+        timeline of every rule and the rule that wins in each frame.
+        """
+        from core.rule_backtest import backtest  # NumPy is only needed here
+        self._swap_staged_rules()
+        return backtest(self._matcher.rules, frames)
+
+    def run_once(self, telemetry: dict | None = None, sensors: dict | None = None,
+                 fsm_state: str | None = None) -> str | None:
+        """Checks rules and returns the event of the first matching rule.
+        Inputs that are not passed in are taken from the managers.
+        A rule that keeps firing is only printed and logged when it starts."""
+        if telemetry is None:
+            self.telemetry_manager.refresh_if_changed()
+        telemetry_data = telemetry if telemetry is not None else self.telemetry_manager.get()
+        sensor_data = sensors if sensors is not None else self.sensor_manager.get()
+        if fsm_state is None:
+            fsm_state = self.fsm.get_state().get("state")
 
         triggered = self.evaluate(telemetry_data, fsm_state, sensor_data)
         if triggered:
             rule = triggered[0]
             name = rule.get('name', 'Unnamed Rule')
             action = rule.get('action')
-            print(f"[Rule Engine] Rule '{name}' is TRUE. Proposing event '{action}'.")
-            self._log_rule_fire(name, action)
-            log_rule_trigger(name, action, "rule_engine", str(telemetry_data))
+            if name != self._firing:
+                print(f"[Rule Engine] Rule '{name}' is TRUE. Proposing event '{action}'.")
+                self._log_rule_fire(rule, {"telemetry": telemetry_data, "sensors": sensor_data or {},
+                                           "fsm": {"state": fsm_state}})
+            self._firing = name
             return action
 
+        self._firing = None
         return None  # No rule fired
 
     def run_loop(self, interval: int = 2):
@@ -228,8 +337,9 @@ if __name__ == "__main__":
     # Ensure necessary files exist for testing
     # (In a real scenario, other components would create/update these)
     if not os.path.exists(TELEMETRY_FILE):
-        tm = TelemetryManager()
+        tm = get_telemetry_manager()
         tm.update({"battery_percent": 80.0, "velocity": 0.5})
+        tm.flush()
     
     if not os.path.exists(SENSORS_FILE):
         sm = SensorManager()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Rule Matcher - incremental (Rete-style) rule evaluation.
+
+All rule conditions are merged into one network of nodes:
+    comparison nodes   one per distinct (path, operator, constant)
+    logic nodes        one per distinct and/or/not sub-expression
+Identical sub-conditions used by several rules share a node, and every node
+caches its last truth value.
+
+On ``update(context)`` the matcher walks a trie of the paths the rules
+reference and collects the comparison nodes whose input value changed.
+Only those nodes, and the logic nodes above them, are re-evaluated, in
+creation order (children always come before their parents). Subtrees that
+are the very same FrozenDict as last time are skipped without looking
+inside, since frozen snapshots cannot change in place.
+"""
+import bisect
+import heapq
+from typing import Any, Dict, Iterable, List, Tuple
+
+from core.rule_compiler import OPERATORS, compare_value, parse_condition
+from utils.frozen import FrozenDict, FrozenList
+
+_MISSING = object()
+_UNSEEN = object()
+
+
+class _PathNode:
+    """Trie node for one key of a watched path."""
+    __slots__ = ("children", "comparisons", "value")
+
+    def __init__(self):
+        self.children: Dict[str, "_PathNode"] = {}
+        self.comparisons: List[int] = []  # Comparison nodes reading this exact path
+        self.value = _UNSEEN
+
+
+class RuleMatcher:
+    """Keeps the truth value of every rule up to date as the context changes.
+
+    ``rules`` are rule dicts with a "condition" string, in priority order.
+    Conditions must already be valid (see rule_compiler.parse_condition).
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]]):
+        self.rules: List[Dict[str, Any]] = []
+        self._rules_of: Dict[int, List[int]] = {}  # root node -> rule indexes
+
+        # Node network, indexed by node id
+        self._kind: List[str] = []
+        self._args: List[Any] = []
+        self._parents: List[List[int]] = []
+        self._value: List[bool] = []
+        self._node_ids: Dict[tuple, int] = {}
+        self._settled = set()  # Nodes evaluated at least once
+        self.last_evaluated = 0  # Nodes re-evaluated by the last update()
+
+        self._paths = _PathNode()
+        self._active: List[int] = []  # Sorted indexes of rules that are true
+
+        for rule in rules:
+            root = self._add(parse_condition(rule["condition"]))
+            self._rules_of.setdefault(root, []).append(len(self.rules))
+            self.rules.append(rule)
+
+    # --- Network construction ---------------------------------------------
+    def _add(self, tree: tuple) -> int:
+        kind = tree[0]
+        if kind == "cmp":
+            _, keys, op, constant = tree
+            key = ("cmp", keys, op, type(constant).__name__, constant)
+            args = (OPERATORS[op], constant)
+            children = ()
+        elif kind == "not":
+            children = (self._add(tree[1]),)
+            key = args = ("not", children)
+        else:
+            children = tuple(self._add(child) for child in tree[1])
+            key = args = (kind, children)
+
+        node = self._node_ids.get(key)
+        if node is not None:
+            return node
+        node = len(self._kind)
+        self._node_ids[key] = node
+        self._kind.append(kind)
+        self._args.append(args)
+        self._parents.append([])
+        self._value.append(False)
+        for child in children:
+            self._parents[child].append(node)
+        if kind == "cmp":
+            self._watch(keys, node)
+        return node
+
+    def _watch(self, keys: Tuple[str, ...], node: int) -> None:
+        trie = self._paths
+        for key in keys:
+            trie = trie.children.setdefault(key, _PathNode())
+        trie.comparisons.append(node)
+
+    @property
+    def node_count(self) -> int:
+        return len(self._kind)
+
+    # --- Change detection ---------------------------------------------------
+    def _diff(self, trie: _PathNode, data, changed: Dict[int, Any]) -> None:
+        for key, node in trie.children.items():
+            if isinstance(data, dict):
+                value = data.get(key, _MISSING)
+            else:
+                value = _MISSING
+            previous = node.value
+            if value is previous and (value is _MISSING or type(value) in (FrozenDict, FrozenList)):
+                continue  # Same immutable snapshot: nothing below can differ
+            node.value = value
+            if node.comparisons and (previous is _UNSEEN or (previous is not value and previous != value)):
+                for comparison in node.comparisons:
+                    changed[comparison] = value
+            if node.children:
+                self._diff(node, value, changed)
+
+    # --- Evaluation ---------------------------------------------------------
+    def _evaluate(self, node: int, inputs: Dict[int, Any]) -> bool:
+        kind = self._kind[node]
+        values = self._value
+        if kind == "cmp":
+            compare, constant = self._args[node]
+            value = inputs[node]
+            return compare_value(None if value is _MISSING else value, compare, constant)
+        if kind == "and":
+            return all(values[c] for c in self._args[node][1])
+        if kind == "or":
+            return any(values[c] for c in self._args[node][1])
+        return not values[self._args[node][1][0]]
+
+    def update(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Applies a new context and returns the rules that are now true,
+        in their original order."""
+        inputs: Dict[int, Any] = {}
+        self._diff(self._paths, context, inputs)
+        self.last_evaluated = 0
+
+        # Min-heap on node id: children were created before their parents
+        pending = list(inputs)
+        heapq.heapify(pending)
+        queued = set(pending)
+        values = self._value
+        while pending:
+            node = heapq.heappop(pending)
+            self.last_evaluated += 1
+            new = self._evaluate(node, inputs)
+            # Nodes seen for the first time must propagate even if still False
+            if new == values[node] and node in self._settled:
+                continue
+            values[node] = new
+            self._settled.add(node)
+            for parent in self._parents[node]:
+                if parent not in queued:
+                    queued.add(parent)
+                    heapq.heappush(pending, parent)
+            for rule in self._rules_of.get(node, ()):
+                self._set_active(rule, new)
+        return self.triggered()
+
+    def _set_active(self, rule: int, active: bool) -> None:
+        index = bisect.bisect_left(self._active, rule)
+        present = index < len(self._active) and self._active[index] == rule
+        if active and not present:
+            self._active.insert(index, rule)
+        elif not active and present:
+            self._active.pop(index)
+
+    def triggered(self) -> List[Dict[str, Any]]:
+        """Rules that were true after the last update, in their original order."""
+        return [self.rules[i] for i in self._active]
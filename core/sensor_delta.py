@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Sensor Delta - sensor snapshots published as keyframes plus per-update deltas.
+
+The publisher (SensorBus) appends one JSON line per update to
+SENSOR_DELTA_FILE:
+
+    {"seq": 1, "ts": ..., "key": {...full tree...}}            keyframe
+    {"seq": 2, "ts": ..., "set": [[path, value], ...], "del": [path, ...]}
+
+A delta lists only the leaves that changed (paths are key lists; lists are
+compared as a whole). Every ``keyframe_interval`` records a keyframe is
+written; when the file has grown past ``max_bytes`` that keyframe starts a
+new file, swapped in with a rename so readers see the change of inode.
+
+Consumers keep a SensorReplica: it reads the lines appended since its last
+poll and applies them to a frozen copy of the tree. Only the dicts along a
+changed path are copied, so unchanged clusters keep their identity between
+polls (the rule matcher skips those subtrees). A gap in the sequence makes
+the replica ignore deltas until the next keyframe.
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.file_paths import SENSOR_DELTA_FILE
+from core.file_watcher import create_watcher
+from utils.frozen import FrozenDict, freeze
+
+log = logging.getLogger(__name__)
+
+KEYFRAME_INTERVAL = 200          # records between keyframes (10 s at 20 updates/s)
+MAX_BYTES = 1024 * 1024          # start a new file at the next keyframe past this size
+
+EMPTY_STATE = FrozenDict()
+
+Path = Tuple[str, ...]
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any], prefix: Path = ()) -> Tuple[List[Tuple[Path, Any]], List[Path]]:
+    """Returns (set, deleted): the leaf paths whose value changed from ``old``
+    to ``new`` and the paths present only in ``old``."""
+    sets: List[Tuple[Path, Any]] = []
+    deleted: List[Path] = []
+    _diff(old, new, prefix, sets, deleted)
+    return sets, deleted
+
+
+def _diff(old, new, prefix, sets, deleted) -> None:
+    if old is new:
+        return
+    for key, value in new.items():
+        path = prefix + (key,)
+        if key not in old:
+            sets.append((path, value))
+            continue
+        previous = old[key]
+        if isinstance(value, dict) and isinstance(previous, dict):
+            _diff(previous, value, path, sets, deleted)
+        elif previous != value or isinstance(previous, bool) is not isinstance(value, bool):
+            sets.append((path, value))
+    for key in old:
+        if key not in new:
+            deleted.append(prefix + (key,))
+
+
+def apply_changes(root: Dict[str, Any], sets, deleted=()) -> FrozenDict:
+    """Returns a frozen copy of ``root`` with the changes applied. Dicts off
+    the changed paths are shared with ``root``."""
+    new_root = dict(root)
+    created = [new_root]  # Keeps the ids in ``fresh`` from being reused
+    fresh = {id(new_root)}  # dicts created by this call (still mutable)
+
+    def descend(path, create: bool):
+        node = new_root
+        for key in path:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                if not create:
+                    return None
+                child = {}
+            elif id(child) in fresh:
+                node = child
+                continue
+            else:
+                child = dict(child)
+            node[key] = child
+            created.append(child)
+            fresh.add(id(child))
+            node = child
+        return node
+
+    for path, value in sets:
+        descend(path[:-1], True)[path[-1]] = freeze(value)
+    for path in deleted:
+        node = descend(path[:-1], False)
+        if node is not None:
+            node.pop(path[-1], None)
+
+    def refreeze(node):
+        if id(node) not in fresh:
+            return node
+        return FrozenDict((k, refreeze(v) if isinstance(v, dict) else v) for k, v in node.items())
+
+    return refreeze(new_root)
+
+
+class SensorDeltaWriter:
+    """Publishing side. One writer per file."""
+
+    def __init__(self, path: str = SENSOR_DELTA_FILE, keyframe_interval: int = KEYFRAME_INTERVAL,
+                 max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.max_bytes = max_bytes
+        self.seq = 0
+        self._last: Optional[Dict[str, Any]] = None
+        self._since_keyframe = 0
+        self.stats = {"keyframes": 0, "deltas": 0, "unchanged": 0, "bytes": 0}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def publish(self, snapshot: Dict[str, Any]) -> Optional[int]:
+        """Appends a delta (or a keyframe when due). ``snapshot`` must not be
+        mutated afterwards. Returns the sequence number, None if nothing changed."""
+        if self._last is None or self._since_keyframe >= self.keyframe_interval:
+            return self.keyframe(snapshot)
+        sets, deleted = diff(self._last, snapshot)
+        if not sets and not deleted:
+            self.stats["unchanged"] += 1
+            return None
+        self.seq += 1
+        record = {"seq": self.seq, "ts": time.time(), "set": [[list(p), v] for p, v in sets]}
+        if deleted:
+            record["del"] = [list(p) for p in deleted]
+        self._append(record)
+        self._last = snapshot
+        self._since_keyframe += 1
+        self.stats["deltas"] += 1
+        return self.seq
+
+    def keyframe(self, snapshot: Dict[str, Any]) -> int:
+        self.seq += 1
+        line = _encode({"seq": self.seq, "ts": time.time(), "key": snapshot})
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = None
+        if self._last is None or size is None or size >= self.max_bytes:
+            # New file: a fresh writer or a full log. The rename tells readers to start over.
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(line)
+            os.replace(temp_path, self.path)
+        else:
+            self._write(line)
+        self.stats["bytes"] += len(line)
+        self._last = snapshot
+        self._since_keyframe = 0
+        self.stats["keyframes"] += 1
+        return self.seq
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        line = _encode(record)
+        self._write(line)
+        self.stats["bytes"] += len(line)
+
+    def _write(self, line: bytes) -> None:
+        # Closed after every record so inotify readers get IN_CLOSE_WRITE
+        with open(self.path, "ab") as f:
+            f.write(line)
+
+
+class SensorReplica:
+    """Local copy of the sensor tree kept up to date from the delta file."""
+
+    def __init__(self, path: str = SENSOR_DELTA_FILE):
+        self.path = path
+        self.data: FrozenDict = EMPTY_STATE
+        self.seq = 0
+        self.written_at: Optional[float] = None
+        self.synced = False
+        self.stats = {"keyframes": 0, "deltas": 0, "gaps": 0, "corrupt": 0, "reopens": 0}
+        self._file = None
+        self._inode = None
+        self._partial = b""
+        self._watcher = None
+
+    @staticmethod
+    def available(path: str = SENSOR_DELTA_FILE) -> bool:
+        return os.path.exists(path)
+
+    def _reopen(self) -> bool:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._partial = b""
+        self.synced = False
+        self.stats["reopens"] += 1
+        return True
+
+    def poll(self) -> bool:
+        """Applies the records appended since the last poll. Returns True if
+        the replica changed. Costs a stat() when nothing was written."""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+        if (self._file is None or inode != self._inode) and not self._reopen():
+            return False
+        chunk = self._file.read()
+        if not chunk:
+            return False
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()  # An incomplete last line waits for the next poll
+        changed = False
+        for line in lines:
+            if not line:
+                continue
+            try:
+                changed |= self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                # Like a gap: the next keyframe brings the replica back in sync
+                log.warning(f"Corrupt sensor delta record ({e}); waiting for the next keyframe.")
+                self.synced = False
+                self.stats["corrupt"] += 1
+        return changed
+
+    def _apply(self, record: Dict[str, Any]) -> bool:
+        seq = record["seq"]
+        if "key" in record:
+            self.data = freeze(record["key"])
+            self.synced = True
+            self.stats["keyframes"] += 1
+        elif not self.synced:
+            return False
+        elif seq != self.seq + 1:
+            log.warning(f"Sensor delta gap ({self.seq} -> {seq}); waiting for the next keyframe.")
+            self.synced = False
+            self.stats["gaps"] += 1
+            return False
+        else:
+            sets = [(tuple(path), value) for path, value in record.get("set", ())]
+            deleted = [tuple(path) for path in record.get("del", ())]
+            self.data = apply_changes(self.data, sets, deleted)
+            self.stats["deltas"] += 1
+        self.seq = seq
+        self.written_at = record.get("ts")
+        return True
+
+    def wait(self, timeout: Optional[float] = None, watch_mode: str = "auto") -> bool:
+        """Blocks until new records arrive (or ``timeout``) and applies them."""
+        if self.poll():
+            return True
+        if self._watcher is None:
+            self._watcher = create_watcher([self.path], mode=watch_mode, interval=0.05)
+        self._watcher.wait(timeout)
+        return self.poll()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+
+def latest_sensors(store, replica: SensorReplica) -> FrozenDict:
+    """The newest sensor tree: the replica's when it is in sync and at least
+    as fresh as the last full snapshot in ``store``, else that snapshot
+    (e.g. when no bus is running)."""
+    if replica.synced and (replica.written_at or 0) >= (store.written_at("sensors") or 0):
+        return replica.data
+    return store.read("sensors")
+
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Sensor Filters - streaming smoothing of noisy sensor readings before publication.
+
+Filters are configured per reading in SENSOR_FILTERS_FILE:
+
+    {"filters": [
+        {"field": "navigation.gyroscope.yaw_rate", "type": "ema", "alpha": 0.3},
+        {"field": "proximity.collision_avoidance.min_distance", "type": "median", "window": 5},
+        {"field": "thermal.core_temp.cpu", "type": "kalman",
+         "process_var": 0.05, "measurement_var": 1.3}
+    ]}
+
+    ema      exponential moving average, y += alpha * (x - y)
+    median   median of the last ``window`` samples (drops single spikes)
+    kalman   1-D Kalman filter for a slowly drifting value (random walk
+             with ``process_var`` per step, readings with ``measurement_var``)
+
+Each filter keeps a fixed amount of state between cycles. The readings of
+one cluster are filtered together: filters of the same kind (and window)
+are one NumPy group, so a cycle costs a few array operations whatever the
+number of configured readings. The SensorBus filters every cluster snapshot
+as it arrives, so rules, the delta log and sensors.json see the filtered
+values; the clusters' own status checks still run on the raw readings.
+
+A missing reading passes through untouched and leaves the filter state as
+it was.
+"""
+import json
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.file_paths import SENSOR_FILTERS_FILE
+from core.sensor_delta import apply_changes
+from core.sensor_preprocessor import read_paths
+
+FILTER_TYPES = ("ema", "median", "kalman")
+
+
+def load_filter_specs(path: str = SENSOR_FILTERS_FILE) -> List[Dict[str, Any]]:
+    """Reads the filter config; no filters if it is missing or broken."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("filters", [])
+    except FileNotFoundError:
+        print(f"Info: {path} not found. Sensor readings are published unfiltered.")
+    except (json.JSONDecodeError, AttributeError) as e:
+        print(f"Warning: Could not parse {path}: {e}. Sensor readings are published unfiltered.")
+    return []
+
+
+class EmaGroup:
+    def __init__(self, specs: Sequence[Mapping[str, Any]]):
+        self.alpha = np.array([spec.get("alpha", 0.3) for spec in specs], dtype=np.float64)
+        if not ((self.alpha > 0) & (self.alpha <= 1)).all():
+            raise ValueError("ema alpha must be in (0, 1]")
+        self.state = np.full(len(specs), np.nan)
+
+    def step(self, x: np.ndarray) -> np.ndarray:
+        # The first reading of a path starts its average
+        start = np.isnan(self.state)
+        self.state[start] = x[start]
+        seen = ~np.isnan(x)
+        self.state[seen] += self.alpha[seen] * (x[seen] - self.state[seen])
+        return self.state.copy()
+
+
+class MedianGroup:
+    def __init__(self, specs: Sequence[Mapping[str, Any]], window: int):
+        if window < 1:
+            raise ValueError("median window must be at least 1")
+        self.window = np.full((window, len(specs)), np.nan)
+        self.pos = np.zeros(len(specs), dtype=np.intp)
+        self.count = np.zeros(len(specs), dtype=np.intp)
+        self.cols = np.arange(len(specs))
+
+    def step(self, x: np.ndarray) -> np.ndarray:
+        # Only real samples enter a column's window, so a missing reading
+        # never reaches the median
+        seen = ~np.isnan(x)
+        self.window[self.pos[seen], self.cols[seen]] = x[seen]
+        self.pos[seen] = (self.pos[seen] + 1) % len(self.window)
+        self.count[seen] = np.minimum(self.count[seen] + 1, len(self.window))
+        if (self.count == len(self.window)).all():
+            return np.median(self.window, axis=0)
+        out = np.full(len(self.cols), np.nan)
+        started = self.count > 0
+        out[started] = np.nanmedian(self.window[:, started], axis=0)
+        return out
+
+
+class KalmanGroup:
+    def __init__(self, specs: Sequence[Mapping[str, Any]]):
+        self.q = np.array([spec.get("process_var", 0.01) for spec in specs], dtype=np.float64)
+        self.r = np.array([spec.get("measurement_var", 1.0) for spec in specs], dtype=np.float64)
+        if not ((self.q >= 0).all() and (self.r > 0).all()):
+            raise ValueError("kalman needs process_var >= 0 and measurement_var > 0")
+        self.x = np.full(len(specs), np.nan)
+        self.p = self.r.copy()
+
+    def step(self, z: np.ndarray) -> np.ndarray:
+        start = np.isnan(self.x)
+        self.x[start] = z[start]
+        seen = ~np.isnan(z) & ~start
+        p = self.p[seen] + self.q[seen]  # Predict: the value may have drifted
+        gain = p / (p + self.r[seen])
+        self.x[seen] += gain * (z[seen] - self.x[seen])
+        self.p[seen] = (1.0 - gain) * p
+        return self.x.copy()
+
+
+class _ClusterFilters:
+    """The filters of one cluster's readings."""
+
+    def __init__(self, specs: Sequence[Mapping[str, Any]]):
+        self.paths = [tuple(spec["field"].split("."))[1:] for spec in specs]
+        grouped: Dict[Tuple, List[int]] = {}
+        for i, spec in enumerate(specs):
+            kind = spec["type"]
+            key = (kind, int(spec.get("window", 5))) if kind == "median" else (kind,)
+            grouped.setdefault(key, []).append(i)
+        self.groups = []
+        for key, indices in grouped.items():
+            members = [specs[i] for i in indices]
+            if key[0] == "ema":
+                group = EmaGroup(members)
+            elif key[0] == "median":
+                group = MedianGroup(members, key[1])
+            else:
+                group = KalmanGroup(members)
+            self.groups.append((np.array(indices), group))
+
+    def apply(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        raw = np.array(read_paths(snapshot, self.paths), dtype=np.float64)
+        filtered = raw.copy()
+        for indices, group in self.groups:
+            filtered[indices] = group.step(raw[indices])
+        sets = [(path, value) for path, value, x in zip(self.paths, filtered.tolist(), raw.tolist())
+                if not math.isnan(x) and value != x]
+        return apply_changes(snapshot, sets) if sets else snapshot
+
+
+class SensorFilterStage:
+    """Per-reading streaming filters, grouped by cluster."""
+
+    def __init__(self, specs: Optional[Sequence[Mapping[str, Any]]] = None):
+        specs = load_filter_specs() if specs is None else specs
+        by_cluster: Dict[str, List[Mapping[str, Any]]] = {}
+        fields = set()
+        for spec in specs:
+            field = spec["field"]
+            if spec.get("type") not in FILTER_TYPES:
+                raise ValueError(f"Filter for {field!r}: unknown type {spec.get('type')!r}")
+            if "." not in field:
+                raise ValueError(f"Filter for {field!r}: expected cluster.reading")
+            if any(key.isdigit() for key in field.split(".")):
+                raise ValueError(f"Filter for {field!r}: list items cannot be filtered")
+            if field in fields:
+                raise ValueError(f"Duplicate filter for {field!r}")
+            fields.add(field)
+            by_cluster.setdefault(field.split(".", 1)[0], []).append(spec)
+        self.fields = sorted(fields)
+        self._clusters = {name: _ClusterFilters(cluster_specs) for name, cluster_specs in by_cluster.items()}
+
+    def __bool__(self) -> bool:
+        return bool(self._clusters)
+
+    def apply(self, cluster: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Filters one new snapshot of ``cluster``. Returns a frozen copy with
+        the filtered readings (sharing the untouched parts), or ``snapshot``
+        itself when no filter applies."""
+        filters = self._clusters.get(cluster)
+        if filters is None:
+            return snapshot
+        return filters.apply(snapshot)
+
+    def apply_frame(self, frame: Dict[str, Any]) -> Dict[str, Any]:
+        """Filters every cluster of a full sensors frame (one new sample each)."""
+        out = dict(frame)
+        for name in self._clusters:
+            if isinstance(frame.get(name), dict):
+                out[name] = self.apply(name, frame[name])
+        return out
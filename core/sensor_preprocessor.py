@@ -1,96 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Sensor Preprocessor - table-driven range filtering and validation of sensor frames.
+
+Ranges and rules come from SENSOR_RANGES_FILE:
+
+    {"expected_clusters": [...], "required_fields": ["status", "errors"],
+     "ranges": [{"field": "thermal.core_temp.cpu", "min": -50, "max": 150,
+                 "action": "filter"}, ...]}
+
+A RangeTable turns the ranges into a fixed column order plus ``lo``/``hi``
+arrays. A frame (the nested sensors dict) is flattened into one float64
+vector in that order (missing or non-numeric readings are NaN and never
+flagged); a batch is a 2-D array with one frame per row. ``check()`` compares
+the whole vector or batch against the bounds at once and returns the mask
+of out-of-range readings together with the violations. Readings with the
+"filter" action are replaced by None in the cleaned frame; "flag" only
+reports them.
+
+Recorded batches (core.telemetry_recorder) are checked straight from their
+columns, without building frames:
+
+    python core/sensor_preprocessor.py --recording logs/recordings/run_...
+"""
+import argparse
+import json
+import logging
 import math
-import datetime
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.file_paths import SENSOR_RANGES_FILE
+
+log = logging.getLogger(__name__)
+
+ACTIONS = ("filter", "flag")
+
+DEFAULT_CONFIG = {
+    "expected_clusters": ["navigation", "power", "thermal", "structural", "system_health", "thrusters",
+                          "rlsm", "proximity", "environment", "communication", "ew"],
+    "required_fields": ["status", "errors"],
+    "ranges": [],
+}
+
+
+def load_config(path: str = SENSOR_RANGES_FILE) -> Dict[str, Any]:
+    """Reads the preprocessor config; falls back to DEFAULT_CONFIG (no ranges)."""
+    try:
+        with open(path, "r") as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        print(f"Info: {path} not found. Sensor range checks are disabled.")
+        return dict(DEFAULT_CONFIG)
+    except json.JSONDecodeError as e:
+        print(f"Warning: Could not parse {path}: {e}. Sensor range checks are disabled.")
+        return dict(DEFAULT_CONFIG)
+    return {**DEFAULT_CONFIG, **config}
+
+
+def read_paths(frame: Dict[str, Any], paths: Sequence[Tuple[str, ...]]) -> List[float]:
+    """The numeric readings at ``paths`` (key tuples; list items by index),
+    NaN where a reading is missing or not a number."""
+    out = []
+    for path in paths:
+        node = frame
+        for key in path:
+            if isinstance(node, dict):  # FrozenDict included
+                node = node.get(key)
+            elif isinstance(node, list) and key.isdigit() and int(key) < len(node):
+                node = node[int(key)]
+            else:
+                node = None
+                break
+        out.append(node if isinstance(node, (int, float)) else math.nan)  # bool is an int
+    return out
+
+
+class RangeViolation(NamedTuple):
+    row: int
+    field: str
+    value: float
+    lo: float
+    hi: float
+
+    def __str__(self) -> str:
+        return f"{self.field} out of range ({self.value:g} not in [{self.lo:g}, {self.hi:g}])"
+
+
+class RangeTable:
+    """Column order and bounds of the range-checked readings."""
+
+    def __init__(self, ranges: Sequence[Mapping[str, Any]]):
+        self.columns: List[str] = []
+        lo, hi, filtered = [], [], []
+        for rule in ranges:
+            action = rule.get("action", "filter")
+            if action not in ACTIONS:
+                raise ValueError(f"Range for {rule['field']!r}: unknown action {action!r}")
+            if rule["field"] in self.columns:
+                raise ValueError(f"Duplicate range for {rule['field']!r}")
+            self.columns.append(rule["field"])
+            lo.append(rule.get("min", -math.inf))
+            hi.append(rule.get("max", math.inf))
+            filtered.append(action == "filter")
+        self.paths = [tuple(column.split(".")) for column in self.columns]
+        self.lo = np.array(lo, dtype=np.float64)
+        self.hi = np.array(hi, dtype=np.float64)
+        self.filtered = np.array(filtered, dtype=bool)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "RangeTable":
+        return cls(config.get("ranges", ()))
+
+    @classmethod
+    def from_schemas(cls, schemas: Mapping[str, Any], action: str = "flag") -> "RangeTable":
+        """Ranges of every bounded field of the given cluster schemas
+        (sensors.clusters.schema), keyed by the cluster's name in the frame."""
+        ranges = []
+        for prefix, schema in schemas.items():
+            for i, name in enumerate(schema.slot_names):
+                lo, hi = float(schema.lo[i]), float(schema.hi[i])
+                if lo > -math.inf or hi < math.inf:
+                    ranges.append({"field": f"{prefix}.{name}", "min": lo, "max": hi, "action": action})
+        return cls(ranges)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def values(self, frame: Dict[str, Any]) -> List[float]:
+        """The readings of one frame in column order, NaN where missing."""
+        return read_paths(frame, self.paths)
+
+    def vector(self, frame: Dict[str, Any]) -> np.ndarray:
+        """Flattens one frame into the column order."""
+        return np.array(self.values(frame), dtype=np.float64)
+
+    def stack(self, frames: Iterable[Mapping[str, Any]]) -> np.ndarray:
+        """One row per frame."""
+        return np.array([self.values(frame) for frame in frames], dtype=np.float64).reshape(-1, len(self.columns))
+
+    def from_columns(self, columns: Mapping[str, np.ndarray], prefix: str = "") -> np.ndarray:
+        """Batch from columnar data (e.g. RecordingReader.load), column names
+        being ``prefix`` + field. Missing columns are NaN."""
+        rows = max((len(c) for c in columns.values()), default=0)
+        batch = np.full((rows, len(self.columns)), np.nan)
+        for i, column in enumerate(self.columns):
+            values = columns.get(prefix + column)
+            if values is not None:
+                batch[:, i] = values
+        return batch
+
+    def check(self, values: np.ndarray,
+              max_violations: Optional[int] = None) -> Tuple[np.ndarray, List[RangeViolation]]:
+        """Returns (mask, violations) for one vector or a batch of rows. The
+        mask has the shape of ``values``; NaN readings are never flagged.
+        ``max_violations`` caps the list (the mask is always complete)."""
+        values = np.asarray(values, dtype=np.float64)
+        mask = (values < self.lo) | (values > self.hi)
+        if not mask.any():
+            return mask, []
+        rows, cols = np.nonzero(np.atleast_2d(mask))
+        rows, cols = rows[:max_violations], cols[:max_violations]
+        flagged = np.atleast_2d(values)[rows, cols]
+        violations = [RangeViolation(row, self.columns[col], value, self.lo[col].item(), self.hi[col].item())
+                      for row, col, value in zip(rows.tolist(), cols.tolist(), flagged.tolist())]
+        return mask, violations
+
+
+_default_table: Optional[RangeTable] = None
+_default_config: Optional[Dict[str, Any]] = None
+_default_lock = threading.Lock()
+
+
+def get_default_config() -> Tuple[Dict[str, Any], RangeTable]:
+    """Config and table from SENSOR_RANGES_FILE, loaded once per process."""
+    global _default_table, _default_config
+    if _default_table is None:
+        with _default_lock:
+            if _default_table is None:
+                _default_config = load_config()
+                _default_table = RangeTable.from_config(_default_config)
+    return _default_config, _default_table
+
 
 class SensorPreprocessor:
-    def __init__(self, raw_data: dict):
-        print("[Preprocessor] Initializing SensorPreprocessor.")
+    def __init__(self, raw_data: dict, config: Optional[Dict[str, Any]] = None,
+                 table: Optional[RangeTable] = None, filters=None):
+        if config is None:
+            config, default_table = get_default_config()
+            table = table or default_table
+        self.config = config
+        self.table = table or RangeTable.from_config(config)
+        self.filters = filters  # core.sensor_filters.SensorFilterStage, kept by the caller across frames
         self.raw_data = raw_data
-        self.processed_data = raw_data.copy() # Start with a copy of raw data
+        self.processed_data = dict(raw_data)  # Nested dicts are copied when something in them is filtered
+        self.mask: Optional[np.ndarray] = None
+        self.range_errors: List[RangeViolation] = []
         self.validation_errors = []
 
     def filter_noise(self):
-        print("[Preprocessor] Filtering noise from sensor data.")
-        # Define acceptable ranges for specific sensors
-        # Using None for out-of-range values as per prompt's optional suggestion
-
-        # Navigation Cluster
-        # Gyroscope (angular_vel_x/y/z) - assuming these are now part of NavigationCluster
-        # The prompt mentions 'gyro.angular_vel_x/y/z' but the new structure is 'navigation.gyroscope.pitch_rate' etc.
-        # I'll adapt to the new structure.
-        if "navigation" in self.processed_data and "gyroscope" in self.processed_data["navigation"]:
-            gyro = self.processed_data["navigation"]["gyroscope"]
-            for key in ["pitch_rate", "yaw_rate", "roll_rate"]:
-                if key in gyro and not (-500 <= gyro[key] <= 500):
-                    print(f"[Preprocessor] Filtering: navigation.gyroscope.{key} out of range ({gyro[key]}). Setting to None.")
-                    gyro[key] = None
-        
-        # Proximity Cluster
-        # The prompt mentions 'proximity' as a top-level key, but it's now a cluster.
-        # I'll assume it refers to 'proximity.collision_avoidance.min_distance' or similar.
-        # For simplicity, I'll apply it to 'min_distance' in collision_avoidance.
-        if "proximity" in self.processed_data and "collision_avoidance" in self.processed_data["proximity"]:
-            min_dist = self.processed_data["proximity"]["collision_avoidance"].get("min_distance")
-            if min_dist is not None and not (0.0 <= min_dist <= 10.0):
-                print(f"[Preprocessor] Filtering: proximity.collision_avoidance.min_distance out of range ({min_dist}). Setting to None.")
-                self.processed_data["proximity"]["collision_avoidance"]["min_distance"] = None
-
-        # Thermal Cluster
-        # thermo_cam - assuming this refers to core_temp in ThermalCluster
-        if "thermal" in self.processed_data and "core_temp" in self.processed_data["thermal"]:
-            core_temp = self.processed_data["thermal"]["core_temp"]
-            for key in ["cpu", "gpu"]: # Assuming these are in Celsius
-                if key in core_temp and not (-50 <= core_temp[key] <= 150):
-                    print(f"[Preprocessor] Filtering: thermal.core_temp.{key} out of range ({core_temp[key]}). Setting to None.")
-                    core_temp[key] = None
-
-        # RLSM Cluster
-        # magnetometer.field_strength
-        if "rlsm" in self.processed_data and "magnetometer" in self.processed_data["rlsm"]:
-            field_strength = self.processed_data["rlsm"]["magnetometer"].get("field_strength")
-            if field_strength is not None and not (0 <= field_strength <= 1000):
-                print(f"[Preprocessor] Filtering: rlsm.magnetometer.field_strength out of range ({field_strength}). Setting to None.")
-                self.processed_data["rlsm"]["magnetometer"]["field_strength"] = None
+        """Range-checks the frame in one pass; replaces filtered readings with None."""
+        values = self.table.vector(self.processed_data)
+        self.mask, self.range_errors = self.table.check(values)
+        if self.range_errors:
+            for i in np.flatnonzero(self.mask & self.table.filtered):
+                self._set_path(self.table.paths[i], None)
+            for violation in self.range_errors:
+                log.debug(f"[Preprocessor] {violation}")
+        return self.mask
+
+    def _set_path(self, path, value) -> None:
+        node = self.processed_data
+        for key in path[:-1]:
+            child = dict(node[key])
+            node[key] = child
+            node = child
+        node[path[-1]] = value
 
     def normalize(self):
-        print("[Preprocessor] Normalizing sensor data (placeholder - no specific normalization applied yet).")
-        # This method can be extended later for specific normalization needs,
-        # e.g., scaling values to a 0-1 range, converting units, etc.
-        pass
+        """Runs the frame through the streaming filters, if any were given."""
+        if self.filters:
+            self.processed_data = self.filters.apply_frame(self.processed_data)
 
     def validate(self):
-        print("[Preprocessor] Validating sensor data structure and basic integrity.")
-        self.validation_errors = []
-
-        # Check for presence of key clusters
-        expected_clusters = ["navigation", "power", "thermal", "structural", "system_health", "thrusters", "rlsm", "proximity", "environment", "communication", "ew"]
-        for cluster_name in expected_clusters:
-            if cluster_name not in self.processed_data:
-                self.validation_errors.append(f"Missing expected cluster: {cluster_name}")
-                print(f"[Preprocessor] Validation Error: Missing cluster '{cluster_name}'.")
-            elif not isinstance(self.processed_data[cluster_name], dict):
-                self.validation_errors.append(f"Cluster '{cluster_name}' is not a dictionary.")
-                print(f"[Preprocessor] Validation Error: Cluster '{cluster_name}' is not a dictionary.")
-            
-            # Check for 'status' and 'errors' fields from BaseSensorCluster
-            if cluster_name in self.processed_data:
-                cluster_data = self.processed_data[cluster_name]
-                if "status" not in cluster_data:
-                    self.validation_errors.append(f"Cluster '{cluster_name}' is missing 'status' field.")
-                    print(f"[Preprocessor] Validation Error: Cluster '{cluster_name}' missing 'status'.")
-                if "errors" not in cluster_data:
-                    self.validation_errors.append(f"Cluster '{cluster_name}' is missing 'errors' field.")
-                    print(f"[Preprocessor] Validation Error: Cluster '{cluster_name}' missing 'errors'.")
-                elif (cluster_data.get("status") == "ERROR" or cluster_data.get("status") == "WARNING") and cluster_data.get("errors"):
-                    self.validation_errors.append(f"Cluster '{cluster_name}' reported errors: {cluster_data['errors']}")
-                    print(f"[Preprocessor] Validation Error: Cluster '{cluster_name}' reported errors: {cluster_data['errors']}.")
-
-        if not self.validation_errors:
-            print("[Preprocessor] Data validation successful.")
-        else:
-            print(f"[Preprocessor] Data validation completed with {len(self.validation_errors)} errors.")
+        """Checks the expected clusters and their required fields."""
+        errors = []
+        required = self.config.get("required_fields", ())
+        for cluster_name in self.config.get("expected_clusters", ()):
+            cluster_data = self.processed_data.get(cluster_name)
+            if cluster_data is None:
+                errors.append(f"Missing expected cluster: {cluster_name}")
+                continue
+            if not isinstance(cluster_data, dict):
+                errors.append(f"Cluster '{cluster_name}' is not a dictionary.")
+                continue
+            for field in required:
+                if field not in cluster_data:
+                    errors.append(f"Cluster '{cluster_name}' is missing '{field}' field.")
+            if cluster_data.get("status") in ("ERROR", "WARNING") and cluster_data.get("errors"):
+                errors.append(f"Cluster '{cluster_name}' reported errors: {cluster_data['errors']}")
+        self.validation_errors = errors
+        if errors:
+            log.info(f"[Preprocessor] Data validation completed with {len(errors)} errors.")
+        return errors
 
     def get_clean_data(self) -> dict:
-        print("[Preprocessor] Returning cleaned sensor data.")
         return self.processed_data
 
     def collect_statuses(self) -> dict:
@@ -100,6 +259,19 @@ class SensorPreprocessor:
             statuses[cluster] = data.get("status", "UNKNOWN")
         return statuses
 
+
+def check_recording(directory: str, start: Optional[float] = None, end: Optional[float] = None,
+                    table: Optional[RangeTable] = None) -> Tuple[np.ndarray, np.ndarray, List[RangeViolation]]:
+    """Range-checks the sensor columns of a recording. Returns (times, mask, violations)."""
+    from core.telemetry_recorder import RecordingReader
+
+    table = table or get_default_config()[1]
+    prefix = "sensors."
+    data = RecordingReader(directory).load([prefix + column for column in table.columns], start, end)
+    mask, violations = table.check(table.from_columns(data, prefix))
+    return data["time"], mask, violations
+
+
 def test():
     print("\n--- Running SensorPreprocessor Test ---")
 
@@ -145,19 +317,16 @@ def test():
     processor.validate()
     clean_data = processor.get_clean_data()
 
-    print("\n[Preprocessor Test] Original Raw Data:")
-    print(raw_test_data)
-    print("\n[Preprocessor Test] Cleaned Data:")
-    print(clean_data)
+    print("\n[Preprocessor Test] Out of range:")
+    for violation in processor.range_errors:
+        print(f"- {violation}")
     print("\n[Preprocessor Test] Validation Errors:")
-    if processor.validation_errors:
-        for error in processor.validation_errors:
-            print(f"- {error}")
-    else:
-        print("No validation errors.")
+    for error in processor.validation_errors:
+        print(f"- {error}")
 
     # Assertions for automated check
     assert clean_data["navigation"]["gyroscope"]["yaw_rate"] is None, "Yaw rate should be None after filtering."
+    assert raw_test_data["navigation"]["gyroscope"]["yaw_rate"] == -600.0, "Raw data should be left untouched."
     assert clean_data["thermal"]["core_temp"]["gpu"] is None, "GPU temp should be None after filtering."
     assert clean_data["rlsm"]["magnetometer"]["field_strength"] is None, "Magnetometer field strength should be None after filtering."
     assert any("Missing expected cluster: structural" in err for err in processor.validation_errors), "Missing structural cluster should be reported."
@@ -165,5 +334,15 @@ def test():
 
     print("\n--- SensorPreprocessor Test Complete (Assertions Passed) ---")
 
+
 if __name__ == "__main__":
-    test()
+    parser = argparse.ArgumentParser(description="Range-checks sensor frames")
+    parser.add_argument("--recording", help="Check the sensor columns of a recording directory instead of the self-test")
+    args = parser.parse_args()
+    if args.recording:
+        times, mask, violations = check_recording(args.recording)
+        print(f"[Preprocessor] {len(times)} frames, {int(mask.any(axis=1).sum())} with out-of-range readings.")
+        for violation in violations[:20]:
+            print(f"- t={times[violation.row]:.2f} {violation}")
+    else:
+        test()
@@ -3,6 +3,8 @@ import os
 import datetime
 from typing import Dict, Any
 from core.file_paths import SENSORS_FILE
+from core.sensor_delta import SensorReplica, latest_sensors
+from core.state_store import get_state_store
 
 def banner(title: str, description: str):
     print("=" * 80)
@@ -22,6 +24,8 @@ banner(
 class SensorManager:
     def __init__(self):
         self.sensor_data: Dict[str, Any] = {}
+        self._store = get_state_store()
+        self._replica = SensorReplica()
         self._load_sensors()
         print(f"SensorManager initialized. Current data: {self.sensor_data}")
 
@@ -57,8 +61,11 @@ class SensorManager:
             print(f"[ERROR] Failed to save {SENSORS_FILE}: {e}")
 
     def get(self) -> Dict[str, Any]:
-        """Returns the current sensor data, reloading it from file to ensure freshness."""
-        self._load_sensors() # Reload to get the latest data from sensor_bus.py
+        """Returns the latest (read-only) sensor data published by sensor_bus.py.
+        Uses the delta replica (only the changes since the last call are read)
+        unless the state store holds newer data, e.g. when no bus is running."""
+        self._replica.poll()
+        self.sensor_data = latest_sensors(self._store, self._replica)
         return self.sensor_data
 
 # Main execution block for testing
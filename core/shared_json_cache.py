@@ -1,10 +1,24 @@
 
+import atexit
+import itertools
 import json
 import os
 import threading
 import time
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, NamedTuple, Optional
+
+from .file_watcher import create_watcher, file_signature, file_signature_fd
+from utils.frozen import FrozenDict, freeze
+
+EMPTY_JSON = FrozenDict()
+
+
+class JsonSnapshot(NamedTuple):
+    """An immutable, versioned view of one cached file."""
+    generation: int
+    data: FrozenDict
+
 
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s] [JsonCache] %(message)s')
@@ -14,9 +28,24 @@ class SharedJsonCache:
     """
     A thread-safe, in-memory cache for frequently accessed JSON files.
     It uses a background thread to monitor files for changes and keep the cache fresh.
+    The watcher is event-driven (inotify) where available and polls otherwise.
+
+    Every reload or set_json publishes a new read-only JsonSnapshot with a
+    higher generation number. Readers get the published snapshot without
+    taking the lock or copying it.
+
+    Writers are serialized per path only: JSON encoding and the temp-file
+    write happen outside any lock, and the per-path lock covers just the
+    snapshot swap and the rename, so a slow telemetry write never blocks
+    fsm_state.json.
+
+    With ``write_behind=True`` set_json only publishes the snapshot; a
+    background thread writes the latest data per path once every
+    ``flush_window`` seconds, so bursts of updates cost one disk write.
+    Call flush() or close() at durability points.
     """
     _instance = None
-    _lock = threading.Lock()
+    _lock = threading.RLock()
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -25,7 +54,8 @@ class SharedJsonCache:
                     cls._instance = super(SharedJsonCache, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, file_paths: List[str] = None, watch_interval: float = 0.5):
+    def __init__(self, file_paths: List[str] = None, watch_interval: float = 0.5, watch_mode: str = "auto",
+                 write_behind: bool = False, flush_window: float = 0.5):
         # This check ensures __init__ runs only once for the singleton
         if hasattr(self, '_initialized') and self._initialized:
             return
@@ -33,13 +63,33 @@ class SharedJsonCache:
             if hasattr(self, '_initialized') and self._initialized:
                 return
             
-            self._cache: Dict[str, Any] = {}
-            self._file_mod_times: Dict[str, float] = {}
+            self._snapshots: Dict[str, JsonSnapshot] = {}
+            self._generations = itertools.count(1)  # next() is atomic across threads
+            self._path_locks: Dict[str, threading.Lock] = {}
+            self._file_signatures: Dict[str, Any] = {}
             self._file_paths: List[str] = file_paths or []
             self._watch_interval = watch_interval
+            self._watch_mode = watch_mode  # "auto", "inotify" or "poll"
+            self._watcher = None
             self._watcher_thread = None
+            self._reload_stats: Dict[str, Dict[str, float]] = {}
             self._stop_event = threading.Event()
 
+            # Write-behind state
+            self._write_behind = write_behind
+            self._flush_window = flush_window
+            self._pending: Dict[str, FrozenDict] = {}
+            self._pending_lock = threading.Lock()
+            self._pending_event = threading.Event()
+            self._flush_lock = threading.Lock()  # one flusher at a time keeps disk order
+            self._closing = threading.Event()
+            self._flusher_thread = None
+            self._write_stats = {"writes_requested": 0, "writes_performed": 0, "writes_saved": 0}
+            if write_behind:
+                self._flusher_thread = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher_thread.start()
+                atexit.register(self.flush)
+
             # Initial load
             for path in self._file_paths:
                 self.refresh(path)
@@ -47,72 +97,189 @@ class SharedJsonCache:
             self._initialized = True
             log.info(f"SharedJsonCache initialized for: {self._file_paths}")
 
-    def _load_from_disk(self, path: str) -> None:
-        """Loads or reloads a specific JSON file from disk into the cache."""
-        if not os.path.exists(path):
+    def _path_lock(self, path: str) -> threading.Lock:
+        """Returns the writer lock guarding ``path``."""
+        lock = self._path_locks.get(path)
+        if lock is None:
+            with self._lock:
+                lock = self._path_locks.setdefault(path, threading.Lock())
+        return lock
+
+    def _load_from_disk(self, path: str) -> bool:
+        """Loads or reloads a specific JSON file from disk into the cache.
+        Returns True if the cached data was replaced."""
+        signature = file_signature(path)
+        if signature is None:
             log.warning(f"File not found on disk: {path}. Cache will hold an empty dict.")
-            self._cache[path] = {}
-            self._file_mod_times[path] = 0
-            return
+            with self._path_lock(path):
+                if path not in self._snapshots:
+                    self._publish(path, EMPTY_JSON)
+                self._file_signatures[path] = None
+            return False
 
+        # Only read if the file has been modified
+        if signature == self._file_signatures.get(path):
+            return False
         try:
-            mod_time = os.path.getmtime(path)
-            with self._lock:
-                # Only read if the file has been modified
-                if mod_time != self._file_mod_times.get(path):
-                    with open(path, 'r') as f:
-                        self._cache[path] = json.load(f)
-                        self._file_mod_times[path] = mod_time
-                        log.debug(f"Cache updated for {os.path.basename(path)}.")
+            with open(path, 'r') as f:
+                # Signature of the inode we actually read, not of the path
+                signature = file_signature_fd(f.fileno())
+                data = freeze(json.load(f))
         except (json.JSONDecodeError, IOError) as e:
             log.error(f"Error reading {path}: {e}. Cache for this file may be stale.")
+            return False
+
+        with self._path_lock(path):
+            if signature == self._file_signatures.get(path):
+                return False  # A concurrent reload or our own write got there first
+            self._publish(path, data)
+            self._file_signatures[path] = signature
+        log.debug(f"Cache updated for {os.path.basename(path)}.")
+        return True
 
-    def _write_to_disk(self, path: str, data: Dict[str, Any]) -> None:
-        """Writes data to a specific JSON file on disk."""
+    def _write_to_disk(self, path: str, data: Dict[str, Any], publish: bool = True) -> None:
+        """Writes data to a specific JSON file on disk, publishing it first
+        unless the snapshot is already out (write-behind flush)."""
+        # Encode and write the temp file outside the lock; each writer gets its own temp name
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
-            with self._lock:
-                # Atomically write to a temp file and then rename
-                temp_path = path + '.tmp'
-                with open(temp_path, 'w') as f:
-                    json.dump(data, f, indent=4)
-                os.rename(temp_path, path)
-                # Update mod time after successful write
-                self._file_mod_times[path] = os.path.getmtime(path)
-                log.debug(f"Data for {os.path.basename(path)} written to disk.")
+            with open(temp_path, 'w') as f:
+                f.write(json.dumps(data, indent=4))
         except IOError as e:
             log.error(f"Error writing to {path}: {e}")
+            return
 
-    def get_json(self, path: str) -> Dict[str, Any]:
-        """Returns a copy of the cached data for a given file path."""
-        with self._lock:
-            return self._cache.get(path, {}).copy()
+        with self._path_lock(path):
+            if publish:
+                self._publish(path, data)
+            try:
+                # Atomically replace the file; disk order matches publish order
+                os.rename(temp_path, path)
+                # Remember our own write so the watcher does not reload it
+                self._file_signatures[path] = file_signature(path)
+            except OSError as e:
+                log.error(f"Error writing to {path}: {e}")
+                return
+        with self._pending_lock:
+            self._write_stats["writes_performed"] += 1
+        log.debug(f"Data for {os.path.basename(path)} written to disk.")
+
+    def _publish(self, path: str, data: FrozenDict) -> None:
+        """Swaps in a new snapshot for ``path``. Caller must hold the path lock."""
+        self._snapshots[path] = JsonSnapshot(next(self._generations), data)
+
+    def get_snapshot(self, path: str) -> JsonSnapshot:
+        """Returns the current snapshot (generation 0 if the path is unknown)."""
+        # A single dict lookup is atomic, so readers never need the lock
+        return self._snapshots.get(path) or JsonSnapshot(0, EMPTY_JSON)
+
+    def get_json(self, path: str) -> FrozenDict:
+        """Returns the read-only cached data for a given file path.
+        Use ``.copy()`` or ``utils.frozen.thaw`` to get a mutable version."""
+        return self.get_snapshot(path).data
+
+    def get_json_if_newer(self, path: str, generation: int) -> Optional[JsonSnapshot]:
+        """Returns the snapshot only if it is newer than ``generation``, else None."""
+        snapshot = self._snapshots.get(path)
+        if snapshot is None or snapshot.generation <= generation:
+            return None
+        return snapshot
 
     def set_json(self, path: str, data: Dict[str, Any]) -> None:
         """Updates the cache and writes to the file if the data has changed."""
-        with self._lock:
-            # To prevent race conditions, only write if data is different
-            if data != self._cache.get(path):
-                self._cache[path] = data
-                self._write_to_disk(path, data)
+        frozen = freeze(data)
+        # Only write if data is different
+        current = self._snapshots.get(path)
+        if current is not None and frozen == current.data:
+            return
+        with self._pending_lock:
+            self._write_stats["writes_requested"] += 1
+        if not self._write_behind:
+            self._write_to_disk(path, frozen)
+            return
+
+        # Readers see the new data immediately; the disk write is coalesced
+        with self._path_lock(path):
+            self._publish(path, frozen)
+            with self._pending_lock:
+                if path in self._pending:
+                    self._write_stats["writes_saved"] += 1
+                self._pending[path] = frozen
+                self._pending_event.set()
+
+    def flush(self) -> None:
+        """Writes all pending write-behind updates to disk now."""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+                self._pending_event.clear()
+            for path, data in pending.items():
+                self._write_to_disk(path, data, publish=False)
+
+    def _flush_loop(self) -> None:
+        """Background writer: waits for the first update, lets the flush
+        window collect more, then writes the latest data per path."""
+        while not self._closing.is_set():
+            self._pending_event.wait()
+            self._closing.wait(self._flush_window)
+            self.flush()
+
+    def get_write_stats(self) -> Dict[str, int]:
+        """Returns counters for requested, performed and coalesced (saved) writes."""
+        with self._pending_lock:
+            stats = dict(self._write_stats)
+            stats["pending"] = len(self._pending)
+        return stats
+
+    def close(self) -> None:
+        """Flushes pending writes and stops the background threads."""
+        self._closing.set()
+        self._pending_event.set()
+        if self._flusher_thread and self._flusher_thread.is_alive():
+            self._flusher_thread.join(timeout=2)
+        self.flush()
+        self.stop_cache_watcher()
 
     def refresh(self, path: str) -> None:
         """Forces a reload of a specific file from disk into the cache."""
         log.info(f"Force refreshing cache for {os.path.basename(path)}.")
         self._load_from_disk(path)
 
+    def _record_reload(self, path: str) -> None:
+        """Tracks how long it took from the file write to the cache reload."""
+        try:
+            latency_ms = max(0.0, (time.time() - os.path.getmtime(path)) * 1000.0)
+        except OSError:
+            return
+        stats = self._reload_stats.setdefault(path, {"reloads": 0, "last_latency_ms": 0.0, "max_latency_ms": 0.0})
+        stats["reloads"] += 1
+        stats["last_latency_ms"] = latency_ms
+        stats["max_latency_ms"] = max(stats["max_latency_ms"], latency_ms)
+        log.debug(f"Reloaded {os.path.basename(path)} {latency_ms:.1f} ms after write.")
+
+    def get_reload_stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns per-file reload counts and write-to-reload latency in ms."""
+        with self._lock:
+            return {path: stats.copy() for path, stats in self._reload_stats.items()}
+
     def _watch_files(self) -> None:
         """The background task for the file watcher thread."""
-        log.info("File watcher thread started.")
+        log.info(f"File watcher thread started ({self._watcher.mode} mode).")
         while not self._stop_event.is_set():
-            for path in self._file_paths:
-                self._load_from_disk(path)
-            time.sleep(self._watch_interval)
+            # Blocks until one of the files changes; only those are reloaded
+            for path in self._watcher.wait():
+                if self._load_from_disk(path):
+                    self._record_reload(path)
         log.info("File watcher thread stopped.")
 
     def start_cache_watcher(self) -> None:
         """Starts the background file watcher thread."""
         if self._watcher_thread is None or not self._watcher_thread.is_alive():
             self._stop_event.clear()
+            self._watcher = create_watcher(self._file_paths, mode=self._watch_mode, interval=self._watch_interval)
+            # Catch up on anything written before the watcher was armed
+            for path in self._file_paths:
+                self._load_from_disk(path)
             self._watcher_thread = threading.Thread(target=self._watch_files, daemon=True)
             self._watcher_thread.start()
 
@@ -120,7 +287,10 @@ class SharedJsonCache:
         """Stops the background file watcher thread."""
         if self._watcher_thread and self._watcher_thread.is_alive():
             self._stop_event.set()
+            self._watcher.interrupt()
             self._watcher_thread.join(timeout=2)
+            self._watcher.close()
+            self._watcher = None
             log.info("Cache watcher stopped successfully.")
 
 # --- Singleton Instance ---
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+State Segment - memory-mapped, fixed-layout state exchange between processes.
+
+Layout (little-endian):
+    header      magic, layout version, marshal version, topic count
+    directory   one entry per topic: name, slot offset, payload capacity
+    slots       per topic: sequence counter, payload length, write time, payload
+
+Each slot is a seqlock: the writer makes the sequence odd, copies the
+payload, then makes it even again. Readers never lock; they retry if the
+sequence was odd or changed while they copied the payload. Payloads are
+encoded with ``marshal`` (all processes run the same interpreter).
+"""
+import fcntl
+import logging
+import marshal
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from utils.frozen import FrozenDict, freeze, thaw
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"QIKISEG1"
+LAYOUT_VERSION = 2
+MARSHAL_VERSION = 4
+
+_HEADER = struct.Struct("<8sIII4x")      # magic, layout, marshal, topic count
+_DIR_ENTRY = struct.Struct("<32sQI4x")   # name, slot offset, capacity
+_SLOT_HEADER = struct.Struct("<QI4xd")   # sequence, payload length, write time (epoch s)
+_SLOT_ALIGN = 64
+
+EMPTY_STATE = FrozenDict()
+
+
+class StateSegment:
+    """A memory-mapped file holding one seqlock-protected slot per topic.
+
+    ``topics`` maps topic name to payload capacity in bytes. The process that
+    creates the segment defines the layout; processes that only read can pass
+    ``topics=None`` to attach to an existing segment.
+    """
+
+    def __init__(self, path: str, topics: Optional[Dict[str, int]] = None):
+        self.path = path
+        self._slots: Dict[str, Tuple[int, int]] = {}  # topic -> (offset, capacity)
+        # topic -> (sequence, decoded snapshot) so repeated reads skip decoding
+        self._decoded: Dict[str, Tuple[int, Any]] = {}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if not self._attach(topics):
+                    if topics is None:
+                        raise FileNotFoundError(f"No state segment at {path}")
+                    self._create(topics)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(self._fd)
+            raise
+
+    # --- Layout ------------------------------------------------------------
+    def _attach(self, topics: Optional[Dict[str, int]]) -> bool:
+        """Maps an existing segment. Returns False if it is missing or its
+        layout does not cover ``topics``."""
+        size = os.fstat(self._fd).st_size
+        if size < _HEADER.size:
+            return False
+        mm = mmap.mmap(self._fd, size)
+        magic, layout, marshal_version, count = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or layout != LAYOUT_VERSION or marshal_version != MARSHAL_VERSION:
+            mm.close()
+            return False
+
+        slots = {}
+        for i in range(count):
+            raw_name, offset, capacity = _DIR_ENTRY.unpack_from(mm, _HEADER.size + i * _DIR_ENTRY.size)
+            slots[raw_name.rstrip(b"\0").decode()] = (offset, capacity)
+        if topics and any(name not in slots or slots[name][1] < cap for name, cap in topics.items()):
+            mm.close()
+            return False
+
+        self._mm, self._slots = mm, slots
+        return True
+
+    def _create(self, topics: Dict[str, int]) -> None:
+        offset = _align(_HEADER.size + len(topics) * _DIR_ENTRY.size)
+        slots = {}
+        for name, capacity in topics.items():
+            if len(name.encode()) > 32:
+                raise ValueError(f"Topic name too long: {name}")
+            slots[name] = (offset, capacity)
+            offset = _align(offset + _SLOT_HEADER.size + capacity)
+
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, offset)
+        mm = mmap.mmap(self._fd, offset)
+        _HEADER.pack_into(mm, 0, MAGIC, LAYOUT_VERSION, MARSHAL_VERSION, len(slots))
+        for i, (name, (slot_offset, capacity)) in enumerate(slots.items()):
+            _DIR_ENTRY.pack_into(mm, _HEADER.size + i * _DIR_ENTRY.size, name.encode(), slot_offset, capacity)
+        self._mm, self._slots = mm, slots
+        log.info(f"Created state segment {self.path} ({offset} bytes, topics: {list(slots)}).")
+
+    def topics(self):
+        return list(self._slots)
+
+    # --- Access ------------------------------------------------------------
+    def _slot(self, topic: str) -> Tuple[int, int]:
+        try:
+            return self._slots[topic]
+        except KeyError:
+            raise KeyError(f"Unknown state topic: {topic}") from None
+
+    def write(self, topic: str, data: Any) -> int:
+        """Encodes and publishes ``data``. Returns the new generation."""
+        offset, capacity = self._slot(topic)
+        try:
+            payload = marshal.dumps(data, MARSHAL_VERSION)
+        except ValueError:
+            # marshal only takes exact dict/list types; frozen snapshots need thawing
+            payload = marshal.dumps(thaw(data), MARSHAL_VERSION)
+        if len(payload) > capacity:
+            raise ValueError(f"Topic '{topic}' payload is {len(payload)} bytes, slot holds {capacity}")
+
+        start = offset + _SLOT_HEADER.size
+        # flock only serializes writers; readers stay lock-free
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            seq = _SLOT_HEADER.unpack_from(self._mm, offset)[0]
+            seq += seq & 1  # A writer that died mid-write leaves the sequence odd
+            _SLOT_HEADER.pack_into(self._mm, offset, seq + 1, 0, 0.0)     # odd: write in progress
+            self._mm[start:start + len(payload)] = payload
+            _SLOT_HEADER.pack_into(self._mm, offset, seq + 2, len(payload), time.time())  # even: stable
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return (seq + 2) // 2
+
+    def generation(self, topic: str) -> int:
+        """Number of completed writes to ``topic``; cheap enough to poll."""
+        offset, _ = self._slot(topic)
+        return _SLOT_HEADER.unpack_from(self._mm, offset)[0] // 2
+
+    def written_at(self, topic: str) -> Optional[float]:
+        """Wall-clock time of the last completed write, or None if never written."""
+        offset, _ = self._slot(topic)
+        for _ in range(1000):
+            seq, _, written = _SLOT_HEADER.unpack_from(self._mm, offset)
+            if not seq & 1:
+                return written if seq else None
+        return None
+
+    def read(self, topic: str, retries: int = 1000) -> Tuple[int, Any]:
+        """Returns (generation, data) with a tear-free copy of the topic.
+
+        The decoded value is frozen and cached per sequence number, so readers
+        polling an unchanged topic pay only for one header read.
+        """
+        offset, capacity = self._slot(topic)
+        start = offset + _SLOT_HEADER.size
+        for attempt in range(retries):
+            seq, length, _ = _SLOT_HEADER.unpack_from(self._mm, offset)
+            if seq & 1 or length > capacity:
+                time.sleep(0 if attempt < 10 else 0.0001)
+                continue
+            cached = self._decoded.get(topic)
+            if cached is not None and cached[0] == seq:
+                return seq // 2, cached[1]
+            payload = self._mm[start:start + length]
+            if _SLOT_HEADER.unpack_from(self._mm, offset)[0] != seq:
+                continue  # A writer raced us; try again
+            data = freeze(marshal.loads(payload)) if length else EMPTY_STATE
+            self._decoded[topic] = (seq, data)
+            return seq // 2, data
+        raise TimeoutError(f"Could not get a stable read of topic '{topic}'")
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+def _align(offset: int) -> int:
+    return (offset + _SLOT_ALIGN - 1) // _SLOT_ALIGN * _SLOT_ALIGN
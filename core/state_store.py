@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+State Store - one API for exchanging state topics between processes.
+
+Two backends implement it:
+    json     the classic JSON files from core.file_paths (default)
+    segment  the memory-mapped StateSegment in STATE_SEGMENT_FILE
+
+The backend is chosen with the QIKI_STATE_BACKEND environment variable or
+the "state_backend" key of config/config.json. Every process exchanging a
+topic must use the same backend.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.file_paths import CONFIG_FILE, STATE_SEGMENT_FILE, STATE_TOPICS
+from core.file_watcher import create_watcher, file_signature, file_signature_fd
+from core.state_segment import StateSegment
+from utils.frozen import FrozenDict, freeze
+
+log = logging.getLogger(__name__)
+
+# Slot capacity per topic for the segment backend, in bytes
+SEGMENT_CAPACITY: Dict[str, int] = {
+    "telemetry": 4 * 1024,
+    "sensors": 256 * 1024,
+    "fsm_state": 256 * 1024,
+    "mission_status": 16 * 1024,
+}
+
+EMPTY_STATE = FrozenDict()
+
+
+class JsonFileStore:
+    """Topics backed by JSON files, re-parsed only when the file changes."""
+    backend = "json"
+
+    def __init__(self, topics: Dict[str, str] = STATE_TOPICS):
+        self._paths = dict(topics)
+        # topic -> (file signature, generation, frozen data)
+        self._cache: Dict[str, Tuple[Any, int, FrozenDict]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, topic: str) -> str:
+        try:
+            return self._paths[topic]
+        except KeyError:
+            raise KeyError(f"Unknown state topic: {topic}") from None
+
+    def read_with_generation(self, topic: str) -> Tuple[int, FrozenDict]:
+        """Returns (generation, data). The generation only counts changes seen
+        by this process, so compare it against values from the same store."""
+        path = self.path(topic)
+        cached = self._cache.get(topic)
+        signature = file_signature(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+        if signature is None:
+            data = EMPTY_STATE
+        else:
+            try:
+                with open(path, "r") as f:
+                    signature = file_signature_fd(f.fileno())
+                    data = freeze(json.load(f))
+            except (json.JSONDecodeError, OSError) as e:
+                log.warning(f"Could not read {path}: {e}")
+                return (cached[1], cached[2]) if cached else (0, EMPTY_STATE)
+        with self._lock:
+            generation = (cached[1] + 1) if cached else 1
+            self._cache[topic] = (signature, generation, data)
+        return generation, data
+
+    def read(self, topic: str) -> FrozenDict:
+        return self.read_with_generation(topic)[1]
+
+    def read_if_newer(self, topic: str, generation: int) -> Optional[Tuple[int, FrozenDict]]:
+        current = self.read_with_generation(topic)
+        return current if current[0] > generation else None
+
+    def generation(self, topic: str) -> int:
+        return self.read_with_generation(topic)[0]
+
+    def written_at(self, topic: str) -> Optional[float]:
+        """Modification time of the topic file, or None if it is missing."""
+        try:
+            return os.stat(self.path(topic)).st_mtime
+        except OSError:
+            return None
+
+    def write(self, topic: str, data: Dict[str, Any]) -> int:
+        """Atomically replaces the topic file (temp file + rename). Returns
+        the new generation; the written data is cached, not read back."""
+        path = self.path(topic)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            signature = file_signature_fd(f.fileno())
+        os.rename(temp_path, path)
+        with self._lock:
+            cached = self._cache.get(topic)
+            if cached is not None and cached[0] == signature:
+                return cached[1]  # Another thread already read the new file
+            generation = (cached[1] + 1) if cached else 1
+            self._cache[topic] = (signature, generation, freeze(data))
+        return generation
+
+    def close(self) -> None:
+        pass
+
+
+class SegmentStore:
+    """Topics backed by the shared-memory StateSegment."""
+    backend = "segment"
+
+    def __init__(self, path: str = STATE_SEGMENT_FILE, capacities: Dict[str, int] = SEGMENT_CAPACITY):
+        self._segment = StateSegment(path, capacities)
+
+    def read_with_generation(self, topic: str) -> Tuple[int, FrozenDict]:
+        return self._segment.read(topic)
+
+    def read(self, topic: str) -> FrozenDict:
+        return self._segment.read(topic)[1]
+
+    def read_if_newer(self, topic: str, generation: int) -> Optional[Tuple[int, FrozenDict]]:
+        if self._segment.generation(topic) <= generation:
+            return None
+        return self._segment.read(topic)
+
+    def generation(self, topic: str) -> int:
+        return self._segment.generation(topic)
+
+    def written_at(self, topic: str) -> Optional[float]:
+        return self._segment.written_at(topic)
+
+    def write(self, topic: str, data: Dict[str, Any]) -> int:
+        return self._segment.write(topic, data)
+
+    def close(self) -> None:
+        self._segment.close()
+
+
+class TopicWatcher:
+    """Blocks until one of ``topics`` gets a new generation.
+
+    With the JSON backend it sleeps on a file watcher (inotify or polling);
+    with the segment backend it polls the generation counters, which costs
+    one header read per topic.
+
+    ``files`` maps names to other files to wake up for (e.g. the sensor delta
+    log); a write to one is reported under its name, once per wake-up.
+    """
+
+    def __init__(self, store, topics: Iterable[str], poll_interval: float = 0.005, watch_mode: str = "auto",
+                 files: Optional[Dict[str, str]] = None):
+        self.store = store
+        self.topics = list(topics)
+        self.files = dict(files or {})
+        self.poll_interval = poll_interval
+        self._generations = {topic: store.generation(topic) for topic in self.topics}
+        self._watcher = None
+        paths = list(self.files.values())
+        if store.backend == "json":
+            paths += [store.path(t) for t in self.topics]
+        if paths:
+            self._watcher = create_watcher(paths, mode=watch_mode)
+
+    def changed(self) -> List[str]:
+        """Topics written since the last call, without blocking."""
+        changed = []
+        for topic in self.topics:
+            generation = self.store.generation(topic)
+            if generation != self._generations[topic]:
+                self._generations[topic] = generation
+                changed.append(topic)
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> List[str]:
+        """Returns the changed topics and files, or [] once ``timeout`` expires."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        files: List[str] = []
+        while True:
+            changed = self.changed() + files
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            if self.store.backend != "json":
+                # The segment generations have to be polled
+                remaining = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+            if self._watcher is not None:
+                paths = self._watcher.wait(remaining)
+                files = [name for name, path in self.files.items() if path in paths]
+            else:
+                time.sleep(remaining)
+
+    def interrupt(self) -> None:
+        if self._watcher is not None:
+            self._watcher.interrupt()
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+
+def configured_backend() -> str:
+    """Returns the backend name from the environment or config/config.json."""
+    backend = os.environ.get("QIKI_STATE_BACKEND")
+    if backend:
+        return backend
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            return json.load(f).get("state_backend", "json")
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return "json"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """Returns the process-wide store for the configured backend."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = configured_backend()
+                if backend == "segment":
+                    _store = SegmentStore()
+                elif backend == "json":
+                    _store = JsonFileStore()
+                else:
+                    raise ValueError(f"Unknown state backend: {backend}")
+                log.info(f"State store backend: {_store.backend}")
+    return _store
+
+
+def topic_store(topic: str, path: str):
+    """The process-wide store when ``path`` is the standard file of
+    ``topic``, otherwise a JSON store of that one file (tests and tools
+    pointed at another copy)."""
+    if os.path.abspath(path) == os.path.abspath(STATE_TOPICS.get(topic, "")):
+        return get_state_store()
+    return JsonFileStore({topic: path})
@@ -1,7 +1,10 @@
-import json
+import atexit
 import os
-from typing import Dict, Any
-from core.file_paths import TELEMETRY_FILE
+import threading
+import time
+from typing import Dict, Any, Optional, Set
+from core.file_paths import TELEMETRY_FILE, TELEMETRY_SERIES_FILE
+from core.state_store import topic_store
 import datetime
 
 def banner(title: str, description: str):
@@ -15,7 +18,22 @@ def banner(title: str, description: str):
     print()
 
 
+# Minimum time between two writes of the telemetry topic, in seconds
+MIN_SAVE_INTERVAL = 0.5
+
+
 class TelemetryManager:
+    """Keeps telemetry in memory and publishes it to the telemetry topic.
+
+    The topic lives in the configured state store (telemetry.json or the
+    state segment, see core.state_store); for any other ``path`` it is that
+    JSON file. ``update()`` only marks the changed keys dirty; the topic is
+    written when something changed and at most once every
+    ``min_save_interval`` seconds. Changes held back by the rate limit are
+    written by a timer when the interval is up, by ``flush()``, and at
+    interpreter exit. Use ``get_telemetry_manager()`` to share one instance
+    per process.
+    """
     DEFAULT_TELEMETRY: Dict[str, Any] = {
         "battery_percent": 100.0,
         "power_wh": 500.0,
@@ -26,77 +44,181 @@ class TelemetryManager:
         "impulse_active": False
     }
 
-    def __init__(self):
+    def __init__(self, path: str = TELEMETRY_FILE, min_save_interval: float = MIN_SAVE_INTERVAL,
+                 series_path: Optional[str] = None, store=None):
+        self.path = path
+        self.min_save_interval = min_save_interval
+        self.series_path = series_path
+        self.store = store if store is not None else topic_store("telemetry", path)
+        self._series = None
+        self._lock = threading.RLock()
+        self._dirty: Set[str] = set()
+        self._last_save = float("-inf")  # The first change is written right away
+        self._flush_timer: Optional[threading.Timer] = None
+        self._generation = None  # store generation of the last telemetry read or written
+        self.stats = {"updates": 0, "saves": 0, "skipped_saves": 0, "reloads": 0}
         self.telemetry_data: Dict[str, Any] = self._load_telemetry()
-        print(f"TelemetryManager initialized. Current data: {self.telemetry_data}")
+        atexit.register(self.flush)
+        print(f"TelemetryManager initialized from {self.path}.")
+
+    def _merge(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Merges ``data`` with the defaults so all keys are present and types are consistent."""
+        merged_data = self.DEFAULT_TELEMETRY.copy()
+        for key, default_value in self.DEFAULT_TELEMETRY.items():
+            if key in data:
+                # Attempt to cast to default type, or use default if type mismatch
+                try:
+                    merged_data[key] = type(default_value)(data[key])
+                except (ValueError, TypeError):
+                    print(f"Warning: Type mismatch for key '{key}' in {self.path}. Using default value.")
+        return merged_data
+
+    def _read_store(self) -> Optional[Dict[str, Any]]:
+        """Reads the topic and remembers its generation. None if nothing was
+        written yet (a corrupt file keeps the last good read, see JsonFileStore)."""
+        generation, data = self.store.read_with_generation("telemetry")
+        if not data or not isinstance(data, dict):
+            return None
+        self._generation = generation
+        return self._merge(data)
 
     def _load_telemetry(self) -> Dict[str, Any]:
-        """Loads telemetry data from telemetry.json or initializes defaults."""
-        if os.path.exists(TELEMETRY_FILE):
-            try:
-                with open(TELEMETRY_FILE, 'r') as f:
-                    data = json.load(f)
-                    print(f"Info: Successfully loaded telemetry from {TELEMETRY_FILE}.")
-                    # Merge with defaults to ensure all keys are present and types are consistent
-                    merged_data = self.DEFAULT_TELEMETRY.copy()
-                    for key, default_value in self.DEFAULT_TELEMETRY.items():
-                        if key in data:
-                            # Attempt to cast to default type, or use default if type mismatch
-                            try:
-                                if isinstance(default_value, (int, float)):
-                                    merged_data[key] = type(default_value)(data[key])
-                                elif isinstance(default_value, bool):
-                                    merged_data[key] = bool(data[key])
-                                else:
-                                    merged_data[key] = data[key]
-                            except (ValueError, TypeError):
-                                print(f"Warning: Type mismatch for key '{key}' in {TELEMETRY_FILE}. Using default value.")
-                                merged_data[key] = default_value
-                        else:
-                            merged_data[key] = default_value
-                    return merged_data
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                print(f"Warning: Could not read {TELEMETRY_FILE} or file is corrupt ({e}). Initializing with default values.")
-                self._save_telemetry(self.DEFAULT_TELEMETRY) # Save defaults if file is bad
-                return self.DEFAULT_TELEMETRY
-        else:
-            print(f"Info: {TELEMETRY_FILE} not found. Initializing with default values.")
-            self._save_telemetry(self.DEFAULT_TELEMETRY) # Save initial defaults
-            return self.DEFAULT_TELEMETRY
-
-    def _save_telemetry(self, data_to_save: Dict[str, Any]):
-        """Saves the given telemetry data to telemetry.json."""
+        """Loads telemetry data from the store or initializes defaults."""
+        data = self._read_store()
+        if data is not None:
+            print(f"Info: Successfully loaded telemetry from {self.path}.")
+            return data
+        print(f"Info: Initializing {self.path} with default values.")
+        data = self.DEFAULT_TELEMETRY.copy()
+        self._save_telemetry(data)
+        return data
+
+    def _save_telemetry(self, data_to_save: Dict[str, Any]) -> bool:
+        """Publishes the telemetry topic (JSON files are replaced atomically)."""
         try:
-            with open(TELEMETRY_FILE, 'w') as f:
-                json.dump(data_to_save, f, indent=2)
-            print(f"Info: Successfully saved telemetry to {TELEMETRY_FILE}.")
-        except IOError as e:
-            print(f"Error: Could not write to {TELEMETRY_FILE}: {e}")
+            self._generation = self.store.write("telemetry", data_to_save)
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not write telemetry to the {self.store.backend} store ({self.path}): {e}")
+            return False
+        self._last_save = time.monotonic()
+        self.stats["saves"] += 1
+        return True
 
     def get(self) -> Dict[str, Any]:
         """Returns the current telemetry data."""
         return self.telemetry_data
 
-    def update(self, new_data: Dict[str, Any]):
-        """Updates the telemetry data with new_data and saves it."""
-        print(f"Info: Updating telemetry with: {new_data}")
-        # Only update keys that are part of DEFAULT_TELEMETRY
-        for key, value in new_data.items():
-            if key in self.DEFAULT_TELEMETRY:
-                # Attempt to cast to the expected type
-                expected_type = type(self.DEFAULT_TELEMETRY[key])
-                try:
-                    self.telemetry_data[key] = expected_type(value)
-                except (ValueError, TypeError):
-                    print(f"Warning: Could not cast value '{value}' for key '{key}' to {expected_type}. Skipping update for this key.")
+    def update(self, new_data: Dict[str, Any]) -> bool:
+        """Updates the telemetry data with new_data and saves it when due.
+        Returns True if any value changed."""
+        changed = False
+        with self._lock:
+            self.stats["updates"] += 1
+            # Only update keys that are part of DEFAULT_TELEMETRY
+            for key, value in new_data.items():
+                if key in self.DEFAULT_TELEMETRY:
+                    # Attempt to cast to the expected type
+                    expected_type = type(self.DEFAULT_TELEMETRY[key])
+                    try:
+                        value = expected_type(value)
+                    except (ValueError, TypeError):
+                        print(f"Warning: Could not cast value '{value}' for key '{key}' to {expected_type}. Skipping update for this key.")
+                        continue
+                    if self.telemetry_data.get(key) != value:
+                        self.telemetry_data[key] = value
+                        self._dirty.add(key)
+                        changed = True
+                else:
+                    print(f"Warning: Key '{key}' not in DEFAULT_TELEMETRY. Skipping update for this key.")
+            self._record_series()
+            if not self._dirty:
+                self.stats["skipped_saves"] += 1
             else:
-                print(f"Warning: Key '{key}' not in DEFAULT_TELEMETRY. Skipping update for this key.")
-        self._save_telemetry(self.telemetry_data)
+                wait = self._last_save + self.min_save_interval - time.monotonic()
+                if wait <= 0:
+                    self.flush()
+                elif self._flush_timer is None:
+                    # The last change of a burst is written once the interval is up
+                    self._flush_timer = threading.Timer(wait, self._trailing_flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+        return changed
+
+    def _trailing_flush(self) -> None:
+        with self._lock:
+            self._flush_timer = None
+            self.flush()
+
+    def _record_series(self) -> None:
+        if self.series_path is None:
+            return
+        if self._series is None:
+            from core.telemetry_series import TELEMETRY_FIELDS, TelemetrySeries
+            try:
+                self._series = TelemetrySeries(self.series_path, fields=TELEMETRY_FIELDS)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not open telemetry series {self.series_path} ({e}). History disabled.")
+                self.series_path = None
+                return
+        self._series.record(self.telemetry_data)
+
+    @property
+    def dirty(self) -> bool:
+        """True while changed values have not been written yet."""
+        return bool(self._dirty)
+
+    def flush(self) -> bool:
+        """Writes pending changes now, ignoring the rate limit."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return False
+            if not self._save_telemetry(self.telemetry_data):
+                return False
+            self._dirty.clear()
+            return True
 
     def save(self):
         """Explicitly saves the current telemetry data to file."""
         print("Info: Explicitly saving current telemetry.")
-        self._save_telemetry(self.telemetry_data)
+        with self._lock:
+            if self._save_telemetry(self.telemetry_data):
+                self._dirty.clear()
+
+    def refresh_if_changed(self) -> bool:
+        """Re-reads the topic if another process wrote it since the last
+        read or write. Only a stat() (or a segment header read) when nothing
+        changed. Values updated here but not written yet are kept."""
+        if self.store.generation("telemetry") == self._generation:
+            return False
+        with self._lock:
+            data = self._read_store()
+            if data is None:
+                return False
+            for key in self._dirty:
+                data[key] = self.telemetry_data[key]
+            # Update in place: callers may hold on to the dict from get()
+            self.telemetry_data.clear()
+            self.telemetry_data.update(data)
+            self.stats["reloads"] += 1
+        return True
+
+
+_manager: Optional[TelemetryManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_telemetry_manager() -> TelemetryManager:
+    """Returns the process-wide TelemetryManager for TELEMETRY_FILE. Its
+    updates are also recorded into TELEMETRY_SERIES_FILE."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = TelemetryManager(series_path=TELEMETRY_SERIES_FILE)
+    return _manager
 
 # Example usage (for testing this module directly)
 if __name__ == "__main__":
@@ -117,6 +239,7 @@ if __name__ == "__main__":
 
     # Test update
     tm.update({"battery_percent": 75.5, "speed_mps": 0.5, "new_field": "should_be_ignored"})
+    tm.flush()  # Writes are rate-limited; push the pending values out now
     print(f"Telemetry after update: {tm.get()}")
 
     # Test loading from existing file
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Telemetry Recorder - columnar, compressed recordings of telemetry and sensors.
+
+The recorder process wakes on every write of the "telemetry" state topic
+and every sensor update (the delta log of core.sensor_delta; the full
+"sensors" topic is only written about once a second), flattens both into
+dotted columns ("telemetry.velocity", "sensors.power.battery_main.voltage",
+list items get their index appended) and appends one row. Numbers and
+flags are recorded; strings are not.
+
+Rows are buffered in memory and written in segments of a fixed number of
+rows, or of at most SEGMENT_SECONDS of recording, so a recorder that is
+killed loses little. SIGTERM (how run_all.sh stops processes) flushes the
+buffered rows like Ctrl+C does. A segment file is
+
+    magic, header length, JSON header (rows, time range, codec, columns
+    with dtype / offset / length), then one compressed block per column
+
+Blocks are float64 arrays, byte-shuffled and zlib-compressed, so loading a
+few columns only decompresses those blocks. ``index.jsonl`` holds the time
+range of each segment; the reader skips segments outside the requested
+range without opening them. Columns keep their name across segments; a
+column missing from a segment reads back as NaN.
+
+    python core/telemetry_recorder.py --rate 10
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import signal
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.file_paths import RECORDINGS_DIR
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"QIKIREC1"
+FORMAT_VERSION = 1
+CODEC = "shuffle8+zlib"
+TIME_COLUMN = "time"
+ROWS_PER_SEGMENT = 6000          # 10 minutes at 10 Hz
+SEGMENT_SECONDS = 30.0           # Write the buffered rows out at least this often
+RECORDED_TOPICS = ("telemetry", "sensors")
+DEFAULT_RATE_HZ = 10.0
+IDLE_CHECK = 1.0                 # Seconds between due-segment checks while no data arrives
+INDEX_FILE = "index.jsonl"
+
+_PREAMBLE = struct.Struct("<8sI")  # magic, header length
+
+
+def flatten(data: Any, prefix: str, out: Dict[str, float]) -> Dict[str, float]:
+    """Adds the numeric and boolean leaves of ``data`` to ``out`` as dotted columns."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flatten(value, f"{prefix}.{key}", out)
+    elif isinstance(data, (list, tuple)):
+        for i, value in enumerate(data):
+            flatten(value, f"{prefix}.{i}", out)
+    elif isinstance(data, (int, float)):  # bool is an int
+        out[prefix] = float(data)
+    return out
+
+
+def _encode(values: np.ndarray, level: int) -> bytes:
+    # Byte-shuffling puts the slowly changing sign/exponent bytes together
+    shuffled = np.ascontiguousarray(values, dtype="<f8").view(np.uint8).reshape(-1, 8).T
+    return zlib.compress(shuffled.tobytes(), level)
+
+
+def _decode(block: bytes, rows: int) -> np.ndarray:
+    raw = np.frombuffer(zlib.decompress(block), dtype=np.uint8).reshape(8, rows)
+    return np.ascontiguousarray(raw.T).view("<f8").ravel()
+
+
+class RecordingWriter:
+    """Buffers rows in memory and writes them out as compressed segments."""
+
+    def __init__(self, directory: str, rows_per_segment: int = ROWS_PER_SEGMENT, level: int = 6,
+                 segment_seconds: Optional[float] = SEGMENT_SECONDS):
+        self.directory = directory
+        self.rows_per_segment = rows_per_segment
+        self.segment_seconds = segment_seconds
+        self.level = level
+        self._times: List[float] = []
+        self._columns: Dict[str, List[float]] = {}  # Insertion order is the column order
+        os.makedirs(directory, exist_ok=True)
+        self._segment = len(_segment_files(directory))
+        self.stats = {"rows": 0, "segments": 0, "raw_bytes": 0, "compressed_bytes": 0}
+
+    def append(self, timestamp: float, values: Dict[str, float]) -> None:
+        rows = len(self._times)
+        self._times.append(timestamp)
+        for name, value in values.items():
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = [np.nan] * rows
+            column.append(value)
+        for column in self._columns.values():
+            if len(column) == rows:
+                column.append(np.nan)
+        self.stats["rows"] += 1
+        if len(self._times) >= self.rows_per_segment:
+            self.flush()
+        else:
+            self.flush_if_due(timestamp)
+
+    def flush_if_due(self, now: float) -> Optional[str]:
+        """Flushes when the oldest buffered row is ``segment_seconds`` old."""
+        if self._times and self.segment_seconds is not None and now - self._times[0] >= self.segment_seconds:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Writes the buffered rows as one segment. Returns its path."""
+        rows = len(self._times)
+        if not rows:
+            return None
+        times = np.asarray(self._times, dtype="<f8")
+        blocks = [(TIME_COLUMN, _encode(times, self.level))]
+        blocks += [(name, _encode(np.asarray(values, dtype="<f8"), self.level))
+                   for name, values in self._columns.items()]
+        columns, offset = [], 0
+        for name, block in blocks:
+            columns.append({"name": name, "dtype": "<f8", "offset": offset, "length": len(block)})
+            offset += len(block)
+        t_start, t_end = float(times.min()), float(times.max())
+        header = json.dumps({"version": FORMAT_VERSION, "rows": rows, "t_start": t_start, "t_end": t_end,
+                             "codec": CODEC, "columns": columns}, separators=(",", ":")).encode()
+
+        name = f"seg_{self._segment:06d}.qrec"
+        path = os.path.join(self.directory, name)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, len(header)))
+            f.write(header)
+            for _, block in blocks:
+                f.write(block)
+        os.replace(temp_path, path)
+        with open(os.path.join(self.directory, INDEX_FILE), "a") as f:
+            f.write(json.dumps({"file": name, "rows": rows, "t_start": t_start, "t_end": t_end}) + "\n")
+
+        self._segment += 1
+        self.stats["segments"] += 1
+        self.stats["raw_bytes"] += rows * 8 * len(blocks)
+        self.stats["compressed_bytes"] += offset
+        self._times = []
+        self._columns = {name: [] for name in self._columns}
+        return path
+
+    def close(self) -> None:
+        self.flush()
+
+
+class RecordingReader:
+    """Loads time ranges of selected columns from a recording directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._headers: Dict[str, Dict[str, Any]] = {}
+        self.segments: List[Dict[str, Any]] = []
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Picks up segments written since the reader was opened."""
+        indexed = {}
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line of a recorder that died mid-write
+                    indexed[entry["file"]] = entry
+        except FileNotFoundError:
+            pass
+        segments = []
+        for name in _segment_files(self.directory):
+            entry = indexed.get(name)
+            if entry is None:
+                header = self._header(name)
+                entry = {"file": name, "rows": header["rows"], "t_start": header["t_start"], "t_end": header["t_end"]}
+            segments.append(entry)
+        self.segments = segments
+
+    def _header(self, name: str) -> Dict[str, Any]:
+        header = self._headers.get(name)
+        if header is None:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                magic, length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+                if magic != MAGIC:
+                    raise ValueError(f"{name} is not a recording segment")
+                header = json.loads(f.read(length))
+            header["data_offset"] = _PREAMBLE.size + length
+            header["by_name"] = {column["name"]: column for column in header["columns"]}
+            self._headers[name] = header
+        return header
+
+    @property
+    def time_range(self):
+        if not self.segments:
+            return None
+        return self.segments[0]["t_start"], self.segments[-1]["t_end"]
+
+    def columns(self) -> List[str]:
+        """All recorded columns, in the order they first appeared."""
+        names: Dict[str, None] = {}
+        for segment in self.segments:
+            for column in self._header(segment["file"])["columns"]:
+                names[column["name"]] = None
+        return list(names)
+
+    def load(self, columns: Sequence[str], start: Optional[float] = None,
+             end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Rows with ``start <= time <= end`` of the given columns plus "time".
+        Only the blocks of those columns in overlapping segments are read."""
+        wanted = [TIME_COLUMN] + [c for c in columns if c != TIME_COLUMN]
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in wanted}
+        for segment in self.segments:
+            if (start is not None and segment["t_end"] < start) or (end is not None and segment["t_start"] > end):
+                continue
+            header = self._header(segment["file"])
+            rows = header["rows"]
+            with open(os.path.join(self.directory, segment["file"]), "rb") as f:
+                data = {}
+                for name in wanted:
+                    column = header["by_name"].get(name)
+                    if column is None:
+                        data[name] = np.full(rows, np.nan)
+                        continue
+                    f.seek(header["data_offset"] + column["offset"])
+                    data[name] = _decode(f.read(column["length"]), rows)
+            times = data[TIME_COLUMN]
+            mask = np.ones(rows, dtype=bool)
+            if start is not None:
+                mask &= times >= start
+            if end is not None:
+                mask &= times <= end
+            for name in wanted:
+                parts[name].append(data[name][mask])
+        return {name: np.concatenate(chunks) if chunks else np.empty(0) for name, chunks in parts.items()}
+
+
+def _segment_files(directory: str) -> List[str]:
+    try:
+        return sorted(name for name in os.listdir(directory) if name.startswith("seg_") and name.endswith(".qrec"))
+    except FileNotFoundError:
+        return []
+
+
+def read_row(store, topics: Iterable[str], replica=None) -> Dict[str, float]:
+    """One row of the current values of ``topics``. With a sensor delta
+    replica, "sensors" includes the updates since the last full snapshot."""
+    from core.sensor_delta import latest_sensors
+
+    row: Dict[str, float] = {}
+    for topic in topics:
+        data = latest_sensors(store, replica) if topic == "sensors" and replica is not None else store.read(topic)
+        flatten(data, topic, row)
+    return row
+
+
+def _terminate(signum, frame):
+    # Unwinds the recorder loop so its finally block writes the buffered rows
+    raise SystemExit(128 + signum)
+
+
+def run_recorder(directory: str, rate_hz: float = DEFAULT_RATE_HZ, rows_per_segment: int = ROWS_PER_SEGMENT,
+                 topics: Iterable[str] = RECORDED_TOPICS) -> None:
+    """Records one row per change of ``topics``, at most ``rate_hz`` rows per second."""
+    from core.sensor_delta import SensorReplica
+    from core.state_store import TopicWatcher, get_state_store
+
+    store = get_state_store()
+    topics = list(topics)
+    replica = SensorReplica() if "sensors" in topics else None
+    # Sensor updates between full snapshots only arrive as deltas
+    watcher = TopicWatcher(store, topics, files={"sensor_deltas": replica.path} if replica is not None else None)
+    writer = RecordingWriter(directory, rows_per_segment)
+    interval = 1.0 / rate_hz
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGTERM, _terminate)
+    print(f"[Recorder] Recording {topics} to {directory} at up to {rate_hz:g} Hz.")
+    try:
+        if replica is not None:
+            replica.poll()
+        while True:
+            changed = [name for name in watcher.wait(timeout=IDLE_CHECK)
+                       if name != "sensor_deltas" or replica.poll()]
+            if not changed:
+                writer.flush_if_due(time.time())
+                continue
+            writer.append(time.time(), read_row(store, topics, replica))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("[Recorder] Stopped by user.")
+    except SystemExit:
+        print("[Recorder] Terminated.")
+        raise
+    finally:
+        writer.close()
+        if previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
+        watcher.close()
+        if replica is not None:
+            replica.close()
+        stats = writer.stats
+        if stats["compressed_bytes"]:
+            print(f"[Recorder] {stats['rows']} rows in {stats['segments']} segments, "
+                  f"{stats['raw_bytes'] / stats['compressed_bytes']:.1f}x compression.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Records telemetry and sensor updates into columnar segments")
+    parser.add_argument("--dir", default=None,
+                        help="Recording directory (default: a new run directory under logs/recordings)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_HZ, help="Maximum rows per second")
+    parser.add_argument("--segment-rows", type=int, default=ROWS_PER_SEGMENT, help="Rows per segment file")
+    args = parser.parse_args()
+    directory = args.dir or os.path.join(RECORDINGS_DIR, datetime.datetime.now().strftime("run_%Y%m%d_%H%M%S"))
+    run_recorder(directory, args.rate, args.segment_rows)
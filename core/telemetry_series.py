@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Telemetry Series - memory-mapped time series of the numeric telemetry fields.
+
+Every sample is folded into one ring per resolution (1 s, 10 s and 1 min by
+default). A ring slot is a time bucket holding, per field, the sum, sample
+count, minimum and maximum of the samples that fell into it, so the coarser
+rings are downsampled copies of the same data that reach further back.
+
+Layout (little-endian):
+    header      magic, layout version, field count, resolution count, sequence
+    fields      one 32-byte name per field
+    rings       per resolution: bucket width, capacity, buckets written, offset
+    data        per ring: bucket start times float64[capacity],
+                then stats float64[capacity, fields, 4] (sum, count, min, max)
+
+One process records; any number of processes attach and query. The header
+sequence is a seqlock like in core.state_segment: readers copy the window
+they need and retry if a write overlapped the copy.
+"""
+import fcntl
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.file_paths import TELEMETRY_SERIES_FILE
+from core.telemetry import TelemetryManager
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"QIKITS01"
+LAYOUT_VERSION = 1
+
+# (bucket width in seconds, buckets kept): 1 h at 1 s, 6 h at 10 s, 24 h at 1 min
+RESOLUTIONS: Tuple[Tuple[float, int], ...] = ((1.0, 3600), (10.0, 2160), (60.0, 1440))
+
+# Numeric fields of the telemetry (impulse_active is a flag, not a series)
+TELEMETRY_FIELDS = tuple(key for key, value in TelemetryManager.DEFAULT_TELEMETRY.items() if isinstance(value, float))
+
+_HEADER = struct.Struct("<8sIII4xQ")   # magic, layout, field count, ring count, sequence
+_SEQ_OFFSET = 24
+_FIELD = struct.Struct("<32s")
+_RING = struct.Struct("<dI4xQQ")      # bucket width, capacity, buckets written, data offset
+_ALIGN = 64
+_SUM, _COUNT, _MIN, _MAX = range(4)
+
+
+class SeriesWindow(NamedTuple):
+    """Buckets of one field in a time range, oldest first."""
+    resolution: float
+    times: np.ndarray     # bucket start times (epoch s)
+    mean: np.ndarray      # NaN for buckets without samples of this field
+    min: np.ndarray
+    max: np.ndarray
+    count: np.ndarray
+
+
+class _Ring:
+    def __init__(self, index: int, resolution: float, capacity: int, offset: int):
+        self.index = index
+        self.resolution = resolution
+        self.capacity = capacity
+        self.offset = offset
+        self.times: Optional[np.ndarray] = None
+        self.stats: Optional[np.ndarray] = None
+
+
+class TelemetrySeries:
+    """Fixed-size ring buffers per resolution in a memory-mapped file.
+
+    The process that passes ``fields`` defines the layout (recreating the file
+    if it does not match); readers pass ``fields=None`` to attach to an
+    existing file.
+    """
+
+    def __init__(self, path: str = TELEMETRY_SERIES_FILE, fields: Optional[Sequence[str]] = None,
+                 resolutions: Sequence[Tuple[float, int]] = RESOLUTIONS):
+        self.path = path
+        self.fields: List[str] = []
+        self._rings: List[_Ring] = []
+
+        if fields is None:
+            # Readers never create the file; FileNotFoundError while nobody records
+            self._fd = os.open(path, os.O_RDWR)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if not self._attach(fields, resolutions):
+                    if fields is None:
+                        raise FileNotFoundError(f"No telemetry series at {path}")
+                    self._create(fields, resolutions)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(self._fd)
+            raise
+        self._field_index: Dict[str, int] = {name: i for i, name in enumerate(self.fields)}
+
+    # --- Layout ------------------------------------------------------------
+    def _attach(self, fields, resolutions) -> bool:
+        size = os.fstat(self._fd).st_size
+        if size < _HEADER.size:
+            return False
+        mm = mmap.mmap(self._fd, size)
+        magic, layout, field_count, ring_count, _ = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or layout != LAYOUT_VERSION:
+            mm.close()
+            return False
+        offset = _HEADER.size
+        names = []
+        for _ in range(field_count):
+            names.append(_FIELD.unpack_from(mm, offset)[0].rstrip(b"\0").decode())
+            offset += _FIELD.size
+        rings = []
+        for i in range(ring_count):
+            resolution, capacity, _, data_offset = _RING.unpack_from(mm, offset + i * _RING.size)
+            rings.append(_Ring(i, resolution, capacity, data_offset))
+        if fields is not None and (names != list(fields) or
+                                   [(r.resolution, r.capacity) for r in rings] != [tuple(r) for r in resolutions]):
+            mm.close()
+            return False
+        self._map(mm, names, rings)
+        return True
+
+    def _create(self, fields: Sequence[str], resolutions: Sequence[Tuple[float, int]]) -> None:
+        for name in fields:
+            if len(name.encode()) > 32:
+                raise ValueError(f"Field name too long: {name}")
+        rings_offset = _HEADER.size + len(fields) * _FIELD.size
+        offset = _align(rings_offset + len(resolutions) * _RING.size)
+        rings = []
+        for i, (resolution, capacity) in enumerate(resolutions):
+            rings.append(_Ring(i, float(resolution), int(capacity), offset))
+            offset = _align(offset + capacity * 8 * (1 + len(fields) * 4))
+
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, offset)
+        mm = mmap.mmap(self._fd, offset)
+        _HEADER.pack_into(mm, 0, MAGIC, LAYOUT_VERSION, len(fields), len(rings), 0)
+        for i, name in enumerate(fields):
+            _FIELD.pack_into(mm, _HEADER.size + i * _FIELD.size, name.encode())
+        for ring in rings:
+            _RING.pack_into(mm, rings_offset + ring.index * _RING.size, ring.resolution, ring.capacity, 0, ring.offset)
+        self._map(mm, list(fields), rings)
+        log.info(f"Created telemetry series {self.path} ({offset} bytes, fields: {self.fields}).")
+
+    def _map(self, mm: mmap.mmap, fields: List[str], rings: List[_Ring]) -> None:
+        self._mm = mm
+        self.fields = fields
+        self._rings_offset = _HEADER.size + len(fields) * _FIELD.size
+        for ring in rings:
+            ring.times = np.ndarray((ring.capacity,), dtype="<f8", buffer=mm, offset=ring.offset)
+            ring.stats = np.ndarray((ring.capacity, len(fields), 4), dtype="<f8", buffer=mm,
+                                    offset=ring.offset + ring.capacity * 8)
+        self._rings = rings
+
+    @property
+    def resolutions(self) -> List[float]:
+        return [ring.resolution for ring in self._rings]
+
+    def _written(self, ring: _Ring) -> int:
+        return _RING.unpack_from(self._mm, self._rings_offset + ring.index * _RING.size)[2]
+
+    def _set_written(self, ring: _Ring, written: int) -> None:
+        _RING.pack_into(self._mm, self._rings_offset + ring.index * _RING.size,
+                        ring.resolution, ring.capacity, written, ring.offset)
+
+    def _sequence(self) -> int:
+        return struct.unpack_from("<Q", self._mm, _SEQ_OFFSET)[0]
+
+    # --- Recording ---------------------------------------------------------
+    def record(self, sample: Mapping[str, float], timestamp: Optional[float] = None) -> None:
+        """Adds one sample. Missing or non-numeric fields are skipped; samples
+        older than a ring's newest bucket are ignored by that ring."""
+        ts = time.time() if timestamp is None else timestamp
+        values = np.full(len(self.fields), np.nan)
+        for i, name in enumerate(self.fields):
+            value = sample.get(name)
+            if isinstance(value, (int, float)):
+                values[i] = value
+        present = ~np.isnan(values)
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            seq = self._sequence()
+            seq += seq & 1  # A writer that died mid-write leaves the sequence odd
+            struct.pack_into("<Q", self._mm, _SEQ_OFFSET, seq + 1)
+            for ring in self._rings:
+                bucket = math.floor(ts / ring.resolution) * ring.resolution
+                written = self._written(ring)
+                newest = (written - 1) % ring.capacity
+                if written and ring.times[newest] == bucket:
+                    stats = ring.stats[newest]
+                    stats[present, _SUM] += values[present]
+                    stats[present, _COUNT] += 1
+                    stats[:, _MIN] = np.fmin(stats[:, _MIN], values)
+                    stats[:, _MAX] = np.fmax(stats[:, _MAX], values)
+                elif not written or bucket > ring.times[newest]:
+                    slot = written % ring.capacity
+                    ring.times[slot] = bucket
+                    stats = ring.stats[slot]
+                    stats[:, _SUM] = np.where(present, values, 0.0)
+                    stats[:, _COUNT] = present
+                    stats[:, _MIN] = values
+                    stats[:, _MAX] = values
+                    self._set_written(ring, written + 1)
+            struct.pack_into("<Q", self._mm, _SEQ_OFFSET, seq + 2)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # --- Queries -----------------------------------------------------------
+    def _ring_for(self, resolution: Optional[float], start: Optional[float]) -> _Ring:
+        if resolution is not None:
+            for ring in self._rings:
+                if ring.resolution == resolution:
+                    return ring
+            raise ValueError(f"No ring with resolution {resolution}s (have {self.resolutions})")
+        if start is None:
+            return self._rings[-1]
+        # Finest ring that still reaches back to ``start``
+        for ring in self._rings:
+            written = self._written(ring)
+            if written > ring.capacity and ring.times[written % ring.capacity] > start:
+                continue
+            return ring
+        return self._rings[-1]
+
+    def _copy_window(self, ring: _Ring, field: int, start: Optional[float], end: Optional[float],
+                     retries: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies (times, stats[:, field]) of the buckets in [start, end]."""
+        for attempt in range(retries):
+            seq = self._sequence()
+            if seq & 1:
+                time.sleep(0 if attempt < 10 else 0.0001)
+                continue
+            written = self._written(ring)
+            count = min(written, ring.capacity)
+            first = written - count  # Logical position of the oldest bucket
+            times = ring.times
+            lo = first if start is None else _bisect(times, ring.capacity, first, written, start, right=False)
+            hi = written if end is None else _bisect(times, ring.capacity, lo, written, end, right=True)
+            slots = np.arange(lo, hi) % ring.capacity
+            window = (times[slots], ring.stats[slots, field])
+            if self._sequence() == seq:
+                return window
+        raise TimeoutError(f"Could not get a stable read of {self.path}")
+
+    def window(self, field: str, start: Optional[float] = None, end: Optional[float] = None,
+               resolution: Optional[float] = None) -> SeriesWindow:
+        """Buckets of ``field`` whose start time lies in [start, end].
+
+        Without ``resolution`` the finest ring still covering ``start`` is used.
+        Costs O(log capacity + window).
+        """
+        try:
+            index = self._field_index[field]
+        except KeyError:
+            raise KeyError(f"Unknown telemetry field: {field}") from None
+        ring = self._ring_for(resolution, start)
+        times, stats = self._copy_window(ring, index, start, end)
+        count = stats[:, _COUNT]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, stats[:, _SUM] / count, np.nan)
+        return SeriesWindow(ring.resolution, times, mean, stats[:, _MIN], stats[:, _MAX], count)
+
+    def stats(self, field: str, start: Optional[float] = None, end: Optional[float] = None,
+              resolution: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """min / max / mean / count of ``field`` over the window, None if empty."""
+        w = self.window(field, start, end, resolution)
+        total = float(w.count.sum())
+        if not total:
+            return None
+        used = w.count > 0
+        return {
+            "min": float(w.min[used].min()),
+            "max": float(w.max[used].max()),
+            "mean": float((w.mean[used] * w.count[used]).sum() / total),
+            "count": int(total),
+        }
+
+    def rate(self, field: str, start: Optional[float] = None, end: Optional[float] = None,
+             resolution: Optional[float] = None) -> Optional[float]:
+        """Rate of change of ``field`` in units per second: the least-squares
+        slope of the bucket means. None with fewer than two buckets."""
+        w = self.window(field, start, end, resolution)
+        used = w.count > 0
+        if used.sum() < 2:
+            return None
+        t = w.times[used] + w.resolution / 2.0
+        y = w.mean[used]
+        t = t - t.mean()
+        denominator = float((t * t).sum())
+        return float((t * (y - y.mean())).sum() / denominator) if denominator else None
+
+    def latest(self, field: str, resolution: Optional[float] = None) -> Optional[float]:
+        """Mean of the newest bucket, or None if nothing was recorded."""
+        ring = self._ring_for(resolution, None) if resolution is not None else self._rings[0]
+        written = self._written(ring)
+        if not written:
+            return None
+        w = self.window(field, start=float(ring.times[(written - 1) % ring.capacity]), resolution=ring.resolution)
+        return float(w.mean[-1]) if len(w.mean) and w.count[-1] else None
+
+    def close(self) -> None:
+        # Views into the map have to go before it can be closed
+        for ring in self._rings:
+            ring.times = ring.stats = None
+        self._rings = []
+        self._mm.close()
+        os.close(self._fd)
+
+
+def open_telemetry_series(path: str = TELEMETRY_SERIES_FILE) -> Optional[TelemetrySeries]:
+    """Attaches to the series for reading; None while no process records one.
+    Never creates or changes the file."""
+    try:
+        return TelemetrySeries(path)
+    except (FileNotFoundError, OSError, ValueError) as e:
+        log.debug(f"No telemetry series at {path}: {e}")
+        return None
+
+
+def _bisect(times: np.ndarray, capacity: int, lo: int, hi: int, value: float, right: bool) -> int:
+    """Binary search over the logical positions [lo, hi) of a ring sorted by time."""
+    while lo < hi:
+        mid = (lo + hi) // 2
+        t = times[mid % capacity]
+        if t < value or (right and t == value):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
@@ -3,8 +3,11 @@ import json
 import time
 import datetime
 
+from core.telemetry_series import open_telemetry_series
+
 # --- CONFIGURATION ---
 TELEMETRY_FILE = "telemetry.json"
+TREND_WINDOW_SEC = 60  # Battery trend is the slope over this many seconds
 
 # ANSI color codes
 COLOR_RED = "\033[91m"
@@ -44,11 +47,24 @@ def format_value(value, unit="", precision=2, missing_msg="N/A"):
         return f"{COLOR_GREEN}✅ YES{COLOR_RESET}" if value else "❌ NO"
     return f"{value:>{precision}.{precision}f}{unit}"
 
+_series = None
+
+def battery_trend():
+    """Battery change in %/min over the last TREND_WINDOW_SEC, or None without history."""
+    global _series
+    if _series is None:
+        _series = open_telemetry_series()
+        if _series is None:
+            return None
+    rate = _series.rate("battery_percent", start=time.time() - TREND_WINDOW_SEC)
+    return None if rate is None else rate * 60.0
+
 # --- MAIN DISPLAY FUNCTION ---
 
 def display_power_hud():
     """Renders and displays the power core HUD."""
     telemetry, tele_mod, tele_err = read_data(TELEMETRY_FILE)
+    trend = battery_trend()
 
     # --- Data Extraction & Processing ---
     battery_percent = telemetry.get("battery_percent")
@@ -83,6 +99,8 @@ def display_power_hud():
         charge_line += f" {COLOR_RED}⚠️ LOW BATTERY / НИЗКИЙ ЗАРЯД БАТАРЕИ{COLOR_RESET}"
     hud_lines.append(f"│ {charge_line.ljust(width - 4)} │")
 
+    trend_text = "N/A" if trend is None else f"{trend:+.2f} %/min"
+    hud_lines.append(f"│ Trend / Тренд: {trend_text.ljust(width - 17)} │")
     hud_lines.append(f"│ Power / Мощность: {format_value(power_wh, ' Wh').ljust(width - 20)} │")
     hud_lines.append(f"│ Voltage / Напряжение: {format_value(battery_voltage, ' V').ljust(width - 24)} │")
     hud_lines.append(f"│ Current / Ток: {format_value(battery_current, ' A').ljust(width - 18)} │")
@@ -1,17 +1,42 @@
 import random
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .schema import ClusterSchema
 
 class BaseSensorCluster:
     """
     Base class for all sensor clusters, providing a common interface for 
     initialization, data updates, validation, and serialization.
+
+    Clusters that declare a SCHEMA keep their readings in ``self.values``
+    (one float64 slot per reading, see schema.py; ``self.array`` is a NumPy
+    view of the same memory) and non-numeric readings in ``self.extra``;
+    ``self.data`` then only holds status and errors.
+    Clusters without a SCHEMA keep everything in ``self.data``.
+
+    Random readings come from ``self.rng``; pass ``seed`` (anything
+    random.seed() accepts) to reproduce a run.
+    Schema clusters also implement ``simulate()``, the same model for many
+    bots at once (simulation/sensor_fleet.py).
     """
-    def __init__(self, cluster_name: str):
+    SCHEMA: Optional[ClusterSchema] = None
+
+    __slots__ = ("cluster_name", "data", "values", "array", "extra", "rng")
+
+    def __init__(self, cluster_name: str, seed=None):
         self.cluster_name = cluster_name
+        self.rng = random.Random(seed)
         self.data = {
             "status": "INITIALIZING",
             "last_update_timestamp": None,
             "errors": []
         }
+        if self.SCHEMA is not None:
+            self.values = self.SCHEMA.new_values()
+            self.array = self.SCHEMA.view(self.values)
+            self.extra = self.SCHEMA.new_extra()
 
     def get_name(self) -> str:
         """Returns the name of the cluster."""
@@ -24,6 +49,14 @@ class BaseSensorCluster:
         """
         raise NotImplementedError("Subclasses must implement the update() method.")
 
+    @classmethod
+    def simulate(cls, rng: np.random.Generator, values: np.ndarray, extras: List[Dict[str, Any]]):
+        """
+        Vectorized update() for a fleet: ``values`` holds one row of SCHEMA
+        slots per bot, ``extras`` one extra dict per bot. Both are updated in place.
+        """
+        raise NotImplementedError(f"{cls.__name__} has no vectorized simulation.")
+
     def validate(self):
         """
         Validates the current sensor data. Can be extended by subclasses 
@@ -37,14 +70,32 @@ class BaseSensorCluster:
             # Basic validation passed, specific checks should be in child classes
             self.data["status"] = "OK" 
             self.data["errors"] = [] # Clear previous errors if OK
+        if self.SCHEMA is not None:
+            for name, value in self.SCHEMA.violations(self.values):
+                self.data["status"] = "WARNING"
+                self.data["errors"].append(f"Reading out of range: {name} = {value:g}")
 
     def serialize(self) -> dict:
         """Returns the current data of the cluster as a dictionary."""
-        return self.data
+        if self.SCHEMA is None:
+            return self.data
+        out = dict(self.data)
+        out["errors"] = list(self.data["errors"])
+        out.update(self.SCHEMA.to_dict(self.values, self.extra))
+        return out
+
+    def reading(self, name: str):
+        """Value of one schema reading by its dotted name (vectors as a list)."""
+        return self.SCHEMA.get(self.values, self.extra, name)
 
     def _generate_value(self, base, variance, precision=2):
         """Helper to generate a random value with some variance and precision."""
-        return round(base + random.uniform(-variance, variance), precision)
+        return round(base + self.rng.uniform(-variance, variance), precision)
+
+    @staticmethod
+    def _generate_values(rng: np.random.Generator, base, variance, count: int, precision=2) -> np.ndarray:
+        """_generate_value() for ``count`` bots at once."""
+        return np.round(base + rng.uniform(-variance, variance, count), precision)
 
     def _add_error(self, error_message: str):
         """Adds an error message to the list and sets status to ERROR."""
@@ -1,24 +1,45 @@
-import random
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("signal_strength.rssi", "dBm", -150, 0, default=-75.0),
+    Field("signal_strength.snr", "dB", -20, 60, default=15.0),
+    Field("antenna.azimuth", "deg", 0, 360, default=180.0),
+    Field("antenna.elevation", "deg", -90, 90, default=45.0),
+    Field("antenna.is_tracking", dtype="bool", default=True),
+    Field("data_link.ber", lo=0, hi=1, default=1e-6),
+    Field("data_link.bandwidth_mbps", "Mbit/s", 0, 10000, default=100.0),
+])
+RSSI = SCHEMA.index("signal_strength.rssi")
+SNR = SCHEMA.index("signal_strength.snr")
+ANTENNA_TRACKING = SCHEMA.index("antenna.is_tracking")
+BER = SCHEMA.index("data_link.ber")
 
 class CommunicationCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Communication")
-        self.data.update({
-            "signal_strength": {"rssi": -75.0, "snr": 15.0},
-            "antenna": {"azimuth": 180.0, "elevation": 45.0, "is_tracking": True},
-            "data_link": {"ber": 1e-6, "bandwidth_mbps": 100.0}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Communication", seed=seed)
 
     def update(self):
-        self.data["signal_strength"]["rssi"] = self._generate_value(-75.0, 10.0)
-        self.data["signal_strength"]["snr"] = self._generate_value(15.0, 5.0)
-        self.data["antenna"]["is_tracking"] = random.random() > 0.05 # 95% chance to be tracking
-        self.data["data_link"]["ber"] = self._generate_value(1e-6, 1e-7)
+        v = self.values
+        v[RSSI] = self._generate_value(-75.0, 10.0)
+        v[SNR] = self._generate_value(15.0, 5.0)
+        v[ANTENNA_TRACKING] = self.rng.random() > 0.05 # 95% chance to be tracking
+        v[BER] = self._generate_value(1e-6, 1e-7)
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        v[:, RSSI] = g(rng, -75.0, 10.0, n)
+        v[:, SNR] = g(rng, 15.0, 5.0, n)
+        v[:, ANTENNA_TRACKING] = rng.random(n) > 0.05
+        v[:, BER] = g(rng, 1e-6, 1e-7, n)
 
     def validate(self):
         super().validate()
-        rssi = self.data["signal_strength"]["rssi"]
+        rssi = self.values[RSSI]
         if rssi < -90:
             self.data["status"] = "ERROR"
             self._add_error(f"Signal strength critical (RSSI: {rssi:.1f} dBm)")
@@ -26,6 +47,6 @@ class CommunicationCluster(BaseSensorCluster):
             self.data["status"] = "WARNING"
             self._add_error(f"Signal strength low (RSSI: {rssi:.1f} dBm)")
 
-        if not self.data["antenna"]["is_tracking"]:
+        if not self.values[ANTENNA_TRACKING]:
             self.data["status"] = "WARNING"
             self._add_error("Antenna is not tracking target.")
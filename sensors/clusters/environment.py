@@ -1,35 +1,61 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("radiation_detector.level_sv", "Sv/h", 0, 100, default=0.002),
+    Field("radiation_detector.is_alert", dtype="bool", default=False),
+    Field("micrometeorite_detector.impacts_last_hour", lo=0, dtype="int"),
+    Field("micrometeorite_detector.last_impact_energy_j", "J", 0, 1e6, dtype="number"),
+    Field("plasma_density.density_cm3", "1/cm3", 0, 1e7, default=5.0),
+])
+RADIATION_LEVEL = SCHEMA.index("radiation_detector.level_sv")
+RADIATION_ALERT = SCHEMA.index("radiation_detector.is_alert")
+IMPACTS = SCHEMA.index("micrometeorite_detector.impacts_last_hour")
+IMPACT_ENERGY = SCHEMA.index("micrometeorite_detector.last_impact_energy_j")
+PLASMA_DENSITY = SCHEMA.index("plasma_density.density_cm3")
 
 class EnvironmentCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Environment")
-        self.data.update({
-            "radiation_detector": {"level_sv": 0.002, "is_alert": False},
-            "micrometeorite_detector": {"impacts_last_hour": 0, "last_impact_energy_j": 0},
-            "plasma_density": {"density_cm3": 5.0}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Environment", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Radiation
-        rad_level = self._generate_value(0.002, 0.001) if random.random() > 0.01 else self._generate_value(0.1, 0.05)
-        self.data["radiation_detector"]["level_sv"] = rad_level
-        self.data["radiation_detector"]["is_alert"] = rad_level > 0.05
+        rad_level = self._generate_value(0.002, 0.001) if self.rng.random() > 0.01 else self._generate_value(0.1, 0.05)
+        v[RADIATION_LEVEL] = rad_level
+        v[RADIATION_ALERT] = rad_level > 0.05
 
         # Simulate Micrometeorites
-        if random.random() < 0.01: # 1% chance of impact
-            self.data["micrometeorite_detector"]["impacts_last_hour"] += 1
-            self.data["micrometeorite_detector"]["last_impact_energy_j"] = self._generate_value(0.1, 0.08)
+        if self.rng.random() < 0.01: # 1% chance of impact
+            v[IMPACTS] += 1
+            v[IMPACT_ENERGY] = self._generate_value(0.1, 0.08)
         
         # Simulate Plasma Density
-        self.data["plasma_density"]["density_cm3"] = self._generate_value(5.0, 2.0)
+        v[PLASMA_DENSITY] = self._generate_value(5.0, 2.0)
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        rad_level = np.where(rng.random(n) > 0.01, g(rng, 0.002, 0.001, n), g(rng, 0.1, 0.05, n))
+        v[:, RADIATION_LEVEL] = rad_level
+        v[:, RADIATION_ALERT] = rad_level > 0.05
+
+        impact = rng.random(n) < 0.01
+        v[:, IMPACTS] += impact
+        v[:, IMPACT_ENERGY] = np.where(impact, g(rng, 0.1, 0.08, n), v[:, IMPACT_ENERGY])
+
+        v[:, PLASMA_DENSITY] = g(rng, 5.0, 2.0, n)
 
     def validate(self):
         super().validate()
-        if self.data["radiation_detector"]["is_alert"]:
+        if self.values[RADIATION_ALERT]:
             self.data["status"] = "ERROR"
-            self._add_error(f"High radiation levels detected: {self.data['radiation_detector']['level_sv']:.4f} Sv/h")
+            self._add_error(f"High radiation levels detected: {self.values[RADIATION_LEVEL]:.4f} Sv/h")
         
-        if self.data["micrometeorite_detector"]["last_impact_energy_j"] > 0.5:
+        if self.values[IMPACT_ENERGY] > 0.5:
             self.data["status"] = "WARNING"
             self._add_error("High energy micrometeorite impact detected.")
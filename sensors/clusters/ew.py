@@ -1,28 +1,52 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Extra, Field
+
+SCHEMA = ClusterSchema([
+    Field("jamming_detector.is_jammed", dtype="bool", default=False),
+    Field("jamming_detector.jamming_frequency", "MHz", 0, 100000, dtype="number"),
+    Field("signal_interceptor.signals_detected", lo=0, dtype="int"),
+    Field("signal_interceptor.strongest_signal_db", "dB", -200, 50, dtype="number", default=-120),
+    Extra("emcon_monitor.current_level", "A"), # A=Silent, B=Low, C=Normal
+    Field("emcon_monitor.is_active", dtype="bool", default=True),
+])
+IS_JAMMED = SCHEMA.index("jamming_detector.is_jammed")
+JAMMING_FREQUENCY = SCHEMA.index("jamming_detector.jamming_frequency")
+SIGNALS_DETECTED = SCHEMA.index("signal_interceptor.signals_detected")
+STRONGEST_SIGNAL = SCHEMA.index("signal_interceptor.strongest_signal_db")
 
 class EWCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="ElectronicWarfare")
-        self.data.update({
-            "jamming_detector": {"is_jammed": False, "jamming_frequency": 0},
-            "signal_interceptor": {"signals_detected": 0, "strongest_signal_db": -120},
-            "emcon_monitor": {"current_level": "A", "is_active": True} # A=Silent, B=Low, C=Normal
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="ElectronicWarfare", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Jamming
-        is_jammed = random.random() < 0.02 # 2% chance of being jammed
-        self.data["jamming_detector"]["is_jammed"] = is_jammed
-        self.data["jamming_detector"]["jamming_frequency"] = self._generate_value(1200, 200) if is_jammed else 0
+        is_jammed = self.rng.random() < 0.02 # 2% chance of being jammed
+        v[IS_JAMMED] = is_jammed
+        v[JAMMING_FREQUENCY] = self._generate_value(1200, 200) if is_jammed else 0
 
         # Simulate Signal Interception
-        signals = random.randint(0, 5)
-        self.data["signal_interceptor"]["signals_detected"] = signals
-        self.data["signal_interceptor"]["strongest_signal_db"] = self._generate_value(-90, 20) if signals > 0 else -120
+        signals = self.rng.randint(0, 5)
+        v[SIGNALS_DETECTED] = signals
+        v[STRONGEST_SIGNAL] = self._generate_value(-90, 20) if signals > 0 else -120
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        is_jammed = rng.random(n) < 0.02
+        v[:, IS_JAMMED] = is_jammed
+        v[:, JAMMING_FREQUENCY] = np.where(is_jammed, g(rng, 1200, 200, n), 0)
+
+        signals = rng.integers(0, 6, n)
+        v[:, SIGNALS_DETECTED] = signals
+        v[:, STRONGEST_SIGNAL] = np.where(signals > 0, g(rng, -90, 20, n), -120)
 
     def validate(self):
         super().validate()
-        if self.data["jamming_detector"]["is_jammed"]:
+        if self.values[IS_JAMMED]:
             self.data["status"] = "ERROR"
             self._add_error(f"Communications jamming detected!")
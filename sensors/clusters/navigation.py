@@ -1,45 +1,80 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("star_tracker.is_locked", dtype="bool", default=False),
+    Field("star_tracker.tracking_stars", lo=0, hi=1000, dtype="int", default=0),
+    Field("gyroscope.pitch_rate", "deg/s", -500, 500),
+    Field("gyroscope.yaw_rate", "deg/s", -500, 500),
+    Field("gyroscope.roll_rate", "deg/s", -500, 500),
+    Field("imu.accel_x", "m/s2", -160, 160),
+    Field("imu.accel_y", "m/s2", -160, 160),
+    Field("imu.accel_z", "m/s2", -160, 160),
+    Field("imu.orientation_q", lo=-1, hi=1, dtype="number", default=(1, 0, 0, 0), size=4),
+])
+STAR_LOCKED = SCHEMA.index("star_tracker.is_locked")
+TRACKING_STARS = SCHEMA.index("star_tracker.tracking_stars")
+PITCH_RATE = SCHEMA.index("gyroscope.pitch_rate")
+YAW_RATE = SCHEMA.index("gyroscope.yaw_rate")
+ROLL_RATE = SCHEMA.index("gyroscope.roll_rate")
+ACCEL_X = SCHEMA.index("imu.accel_x")
+ACCEL_Y = SCHEMA.index("imu.accel_y")
+ACCEL_Z = SCHEMA.index("imu.accel_z")
 
 class NavigationCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Navigation")
-        # Initialize the data structure for this cluster
-        self.data.update({
-            "star_tracker": {"is_locked": False, "tracking_stars": 0},
-            "gyroscope": {"pitch_rate": 0.0, "yaw_rate": 0.0, "roll_rate": 0.0},
-            "imu": {"accel_x": 0.0, "accel_y": 0.0, "accel_z": 0.0, "orientation_q": [1, 0, 0, 0]}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Navigation", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Star Tracker
-        is_locked = random.random() > 0.1 # 90% chance to be locked
-        self.data["star_tracker"]["is_locked"] = is_locked
-        self.data["star_tracker"]["tracking_stars"] = random.randint(5, 50) if is_locked else 0
+        is_locked = self.rng.random() > 0.1 # 90% chance to be locked
+        v[STAR_LOCKED] = is_locked
+        v[TRACKING_STARS] = self.rng.randint(5, 50) if is_locked else 0
 
         # Simulate Gyroscope
-        self.data["gyroscope"]["pitch_rate"] = self._generate_value(0, 0.05)
-        self.data["gyroscope"]["yaw_rate"] = self._generate_value(0, 0.05)
-        self.data["gyroscope"]["roll_rate"] = self._generate_value(0, 0.05)
+        v[PITCH_RATE] = self._generate_value(0, 0.05)
+        v[YAW_RATE] = self._generate_value(0, 0.05)
+        v[ROLL_RATE] = self._generate_value(0, 0.05)
 
         # Simulate IMU
-        self.data["imu"]["accel_x"] = self._generate_value(0, 0.1)
-        self.data["imu"]["accel_y"] = self._generate_value(0, 0.1)
-        self.data["imu"]["accel_z"] = self._generate_value(-9.8, 0.1) # Simulate gravity
+        v[ACCEL_X] = self._generate_value(0, 0.1)
+        v[ACCEL_Y] = self._generate_value(0, 0.1)
+        v[ACCEL_Z] = self._generate_value(-9.8, 0.1) # Simulate gravity
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        is_locked = rng.random(n) > 0.1
+        v[:, STAR_LOCKED] = is_locked
+        v[:, TRACKING_STARS] = np.where(is_locked, rng.integers(5, 51, n), 0)
+
+        v[:, PITCH_RATE] = g(rng, 0, 0.05, n)
+        v[:, YAW_RATE] = g(rng, 0, 0.05, n)
+        v[:, ROLL_RATE] = g(rng, 0, 0.05, n)
+
+        v[:, ACCEL_X] = g(rng, 0, 0.1, n)
+        v[:, ACCEL_Y] = g(rng, 0, 0.1, n)
+        v[:, ACCEL_Z] = g(rng, -9.8, 0.1, n)
 
     def validate(self):
         super().validate() # Perform base validation
+        v = self.values
         # Custom validation for Navigation cluster
-        if not self.data["star_tracker"]["is_locked"]:
+        if not v[STAR_LOCKED]:
             self.data["status"] = "WARNING"
             self.data["errors"].append("Star tracker is not locked.")
         
         # Example: Check if IMU is providing near-zero acceleration when idle
         idle_accel_threshold = 1.0
         accel_magnitude = (
-            self.data["imu"]["accel_x"]**2 + 
-            self.data["imu"]["accel_y"]**2 + 
-            (self.data["imu"]["accel_z"] + 9.8)**2
+            v[ACCEL_X]**2 + 
+            v[ACCEL_Y]**2 + 
+            (v[ACCEL_Z] + 9.8)**2
         )**0.5
         
         if accel_magnitude > idle_accel_threshold:
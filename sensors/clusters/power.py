@@ -1,35 +1,72 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("battery_main.voltage", "V", 0, 30, default=12.5),
+    Field("battery_main.current", "A", -50, 50, default=-1.2),
+    Field("battery_main.temperature", "C", -60, 150, default=25.0),
+    Field("battery_main.soc", "%", 0, 100, default=98.0),
+    Field("solar_panels.voltage", "V", 0, 60, default=20.1),
+    Field("solar_panels.current", "A", 0, 20, default=2.5),
+    Field("solar_panels.is_charging", dtype="bool", default=True),
+    Field("power_bus.main_bus_voltage", "V", 0, 30, default=12.4),
+    Field("power_bus.load_current", "A", 0, 100, default=3.7),
+])
+BATTERY_VOLTAGE = SCHEMA.index("battery_main.voltage")
+BATTERY_CURRENT = SCHEMA.index("battery_main.current")
+BATTERY_TEMPERATURE = SCHEMA.index("battery_main.temperature")
+BATTERY_SOC = SCHEMA.index("battery_main.soc")
+SOLAR_VOLTAGE = SCHEMA.index("solar_panels.voltage")
+SOLAR_CURRENT = SCHEMA.index("solar_panels.current")
+SOLAR_CHARGING = SCHEMA.index("solar_panels.is_charging")
+BUS_VOLTAGE = SCHEMA.index("power_bus.main_bus_voltage")
+BUS_LOAD_CURRENT = SCHEMA.index("power_bus.load_current")
 
 class PowerCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Power")
-        self.data.update({
-            "battery_main": {"voltage": 12.5, "current": -1.2, "temperature": 25.0, "soc": 98.0},
-            "solar_panels": {"voltage": 20.1, "current": 2.5, "is_charging": True},
-            "power_bus": {"main_bus_voltage": 12.4, "load_current": 3.7}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Power", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Battery
-        self.data["battery_main"]["voltage"] = self._generate_value(12.5, 0.2)
-        self.data["battery_main"]["current"] = self._generate_value(-1.2, 0.5)
-        self.data["battery_main"]["temperature"] = self._generate_value(25.0, 1.0)
-        self.data["battery_main"]["soc"] = max(0, self.data["battery_main"]["soc"] - 0.01) # Slow discharge
+        v[BATTERY_VOLTAGE] = self._generate_value(12.5, 0.2)
+        v[BATTERY_CURRENT] = self._generate_value(-1.2, 0.5)
+        v[BATTERY_TEMPERATURE] = self._generate_value(25.0, 1.0)
+        v[BATTERY_SOC] = max(0, v[BATTERY_SOC] - 0.01) # Slow discharge
 
         # Simulate Solar Panels
-        is_charging = random.random() > 0.3 # 70% chance to be in sun
-        self.data["solar_panels"]["is_charging"] = is_charging
-        self.data["solar_panels"]["voltage"] = self._generate_value(20.0, 1.5) if is_charging else 0.0
-        self.data["solar_panels"]["current"] = self._generate_value(2.5, 0.5) if is_charging else 0.0
+        is_charging = self.rng.random() > 0.3 # 70% chance to be in sun
+        v[SOLAR_CHARGING] = is_charging
+        v[SOLAR_VOLTAGE] = self._generate_value(20.0, 1.5) if is_charging else 0.0
+        v[SOLAR_CURRENT] = self._generate_value(2.5, 0.5) if is_charging else 0.0
 
         # Simulate Power Bus
-        self.data["power_bus"]["main_bus_voltage"] = self.data["battery_main"]["voltage"] - 0.1
-        self.data["power_bus"]["load_current"] = abs(self.data["battery_main"]["current"]) + self.data["solar_panels"]["current"] + self._generate_value(2.0, 0.1)
+        v[BUS_VOLTAGE] = v[BATTERY_VOLTAGE] - 0.1
+        v[BUS_LOAD_CURRENT] = abs(v[BATTERY_CURRENT]) + v[SOLAR_CURRENT] + self._generate_value(2.0, 0.1)
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        v[:, BATTERY_VOLTAGE] = g(rng, 12.5, 0.2, n)
+        v[:, BATTERY_CURRENT] = g(rng, -1.2, 0.5, n)
+        v[:, BATTERY_TEMPERATURE] = g(rng, 25.0, 1.0, n)
+        v[:, BATTERY_SOC] = np.maximum(0, v[:, BATTERY_SOC] - 0.01)
+
+        is_charging = rng.random(n) > 0.3
+        v[:, SOLAR_CHARGING] = is_charging
+        v[:, SOLAR_VOLTAGE] = np.where(is_charging, g(rng, 20.0, 1.5, n), 0.0)
+        v[:, SOLAR_CURRENT] = np.where(is_charging, g(rng, 2.5, 0.5, n), 0.0)
+
+        v[:, BUS_VOLTAGE] = v[:, BATTERY_VOLTAGE] - 0.1
+        v[:, BUS_LOAD_CURRENT] = np.abs(v[:, BATTERY_CURRENT]) + v[:, SOLAR_CURRENT] + g(rng, 2.0, 0.1, n)
 
     def validate(self):
         super().validate()
-        soc = self.data["battery_main"]["soc"]
+        soc = self.values[BATTERY_SOC]
         if soc < 20:
             self.data["status"] = "ERROR"
             self._add_error(f"Main battery SOC critical: {soc:.1f}%")
@@ -37,6 +74,7 @@ class PowerCluster(BaseSensorCluster):
             self.data["status"] = "WARNING"
             self._add_error(f"Main battery SOC low: {soc:.1f}%")
 
-        if self.data["battery_main"]["temperature"] > 50:
+        temperature = self.values[BATTERY_TEMPERATURE]
+        if temperature > 50:
             self.data["status"] = "ERROR"
-            self._add_error(f"Battery temperature critical: {self.data['battery_main']['temperature']:.1f}C")
+            self._add_error(f"Battery temperature critical: {temperature:.1f}C")
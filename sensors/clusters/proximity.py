@@ -1,35 +1,67 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+NO_CONTACT = 999  # Distance reported when nothing is in range
+
+SCHEMA = ClusterSchema([
+    Field("docking_sensors.front_distance", "m", 0, NO_CONTACT, dtype="number", default=NO_CONTACT),
+    Field("docking_sensors.rear_distance", "m", 0, NO_CONTACT, dtype="number", default=NO_CONTACT),
+    Field("collision_avoidance.min_distance", "m", 0, NO_CONTACT, dtype="number", default=NO_CONTACT),
+    Field("collision_avoidance.collision_imminent", dtype="bool", default=False),
+    Field("range_finders.target_range", "m", 0, 10000, dtype="number"),
+    Field("range_finders.target_locked", dtype="bool", default=False),
+])
+FRONT_DISTANCE = SCHEMA.index("docking_sensors.front_distance")
+REAR_DISTANCE = SCHEMA.index("docking_sensors.rear_distance")
+MIN_DISTANCE = SCHEMA.index("collision_avoidance.min_distance")
+COLLISION_IMMINENT = SCHEMA.index("collision_avoidance.collision_imminent")
+TARGET_RANGE = SCHEMA.index("range_finders.target_range")
+TARGET_LOCKED = SCHEMA.index("range_finders.target_locked")
 
 class ProximityCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Proximity")
-        self.data.update({
-            "docking_sensors": {"front_distance": 999, "rear_distance": 999},
-            "collision_avoidance": {"min_distance": 999, "collision_imminent": False},
-            "range_finders": {"target_range": 0, "target_locked": False}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Proximity", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Docking Sensors
-        self.data["docking_sensors"]["front_distance"] = self._generate_value(5, 2) if random.random() < 0.1 else 999
-        self.data["docking_sensors"]["rear_distance"] = self._generate_value(5, 2) if random.random() < 0.05 else 999
+        v[FRONT_DISTANCE] = self._generate_value(5, 2) if self.rng.random() < 0.1 else NO_CONTACT
+        v[REAR_DISTANCE] = self._generate_value(5, 2) if self.rng.random() < 0.05 else NO_CONTACT
 
         # Simulate Collision Avoidance
-        min_dist = self._generate_value(50, 20) if random.random() < 0.2 else 999
-        self.data["collision_avoidance"]["min_distance"] = min_dist
-        self.data["collision_avoidance"]["collision_imminent"] = min_dist < 10
+        min_dist = self._generate_value(50, 20) if self.rng.random() < 0.2 else NO_CONTACT
+        v[MIN_DISTANCE] = min_dist
+        v[COLLISION_IMMINENT] = min_dist < 10
 
         # Simulate Range Finders
-        target_locked = random.random() < 0.3
-        self.data["range_finders"]["target_locked"] = target_locked
-        self.data["range_finders"]["target_range"] = self._generate_value(200, 50) if target_locked else 0
+        target_locked = self.rng.random() < 0.3
+        v[TARGET_LOCKED] = target_locked
+        v[TARGET_RANGE] = self._generate_value(200, 50) if target_locked else 0
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        v[:, FRONT_DISTANCE] = np.where(rng.random(n) < 0.1, g(rng, 5, 2, n), NO_CONTACT)
+        v[:, REAR_DISTANCE] = np.where(rng.random(n) < 0.05, g(rng, 5, 2, n), NO_CONTACT)
+
+        min_dist = np.where(rng.random(n) < 0.2, g(rng, 50, 20, n), NO_CONTACT)
+        v[:, MIN_DISTANCE] = min_dist
+        v[:, COLLISION_IMMINENT] = min_dist < 10
+
+        target_locked = rng.random(n) < 0.3
+        v[:, TARGET_LOCKED] = target_locked
+        v[:, TARGET_RANGE] = np.where(target_locked, g(rng, 200, 50, n), 0)
 
     def validate(self):
         super().validate()
-        if self.data["collision_avoidance"]["collision_imminent"]:
+        min_distance = self.values[MIN_DISTANCE]
+        if self.values[COLLISION_IMMINENT]:
             self.data["status"] = "ERROR"
-            self._add_error(f"Collision imminent! Minimum distance: {self.data['collision_avoidance']['min_distance']:.1f}m")
-        elif self.data["collision_avoidance"]["min_distance"] < 50:
+            self._add_error(f"Collision imminent! Minimum distance: {min_distance:.1f}m")
+        elif min_distance < 50:
             self.data["status"] = "WARNING"
-            self._add_error(f"Object in close proximity: {self.data['collision_avoidance']['min_distance']:.1f}m")
+            self._add_error(f"Object in close proximity: {min_distance:.1f}m")
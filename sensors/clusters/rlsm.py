@@ -1,56 +1,96 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Extra, Field
+
+SCHEMA = ClusterSchema([
+    Field("radar.target_detected", dtype="bool", default=False),
+    Field("radar.range", "m", 0, 100000, dtype="number"),
+    Field("radar.azimuth", "deg", -180, 180, dtype="number"),
+    Field("radar.elevation", "deg", -90, 90, dtype="number"),
+    Field("lidar.point_cloud_density", "pts/m2", 0, 10000, dtype="number"),
+    Field("lidar.objects_detected", lo=0, hi=10000, dtype="int"),
+    Extra("spectrometer.composition", {}),
+    Field("spectrometer.signal_strength", lo=0, hi=1, dtype="number"),
+    Field("magnetometer.field_strength", "uT", 0, 1000, dtype="number"),
+    Field("magnetometer.vector", "uT", -1000, 1000, dtype="number", default=(0, 0, 0), size=3),
+])
+TARGET_DETECTED = SCHEMA.index("radar.target_detected")
+RADAR_RANGE = SCHEMA.index("radar.range")
+RADAR_AZIMUTH = SCHEMA.index("radar.azimuth")
+RADAR_ELEVATION = SCHEMA.index("radar.elevation")
+POINT_CLOUD_DENSITY = SCHEMA.index("lidar.point_cloud_density")
+OBJECTS_DETECTED = SCHEMA.index("lidar.objects_detected")
+SIGNAL_STRENGTH = SCHEMA.index("spectrometer.signal_strength")
+FIELD_STRENGTH = SCHEMA.index("magnetometer.field_strength")
+FIELD_VECTOR = SCHEMA.index("magnetometer.vector")
 
 class RLSMCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="RLSM")
-        self.data.update({
-            "radar": {"target_detected": False, "range": 0, "azimuth": 0, "elevation": 0},
-            "lidar": {"point_cloud_density": 0, "objects_detected": 0},
-            "spectrometer": {"composition": {}, "signal_strength": 0},
-            "magnetometer": {"field_strength": 0, "vector": [0, 0, 0]}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="RLSM", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Radar
-        target_detected = random.random() < 0.2 # 20% chance
-        self.data["radar"]["target_detected"] = target_detected
+        target_detected = self.rng.random() < 0.2 # 20% chance
+        v[TARGET_DETECTED] = target_detected
         if target_detected:
-            self.data["radar"]["range"] = self._generate_value(1000, 500)
-            self.data["radar"]["azimuth"] = self._generate_value(0, 180)
-            self.data["radar"]["elevation"] = self._generate_value(0, 90)
+            v[RADAR_RANGE] = self._generate_value(1000, 500)
+            v[RADAR_AZIMUTH] = self._generate_value(0, 180)
+            v[RADAR_ELEVATION] = self._generate_value(0, 90)
         else:
-            self.data["radar"]["range"] = 0
-            self.data["radar"]["azimuth"] = 0
-            self.data["radar"]["elevation"] = 0
+            v[RADAR_RANGE] = 0
+            v[RADAR_AZIMUTH] = 0
+            v[RADAR_ELEVATION] = 0
 
         # Simulate Lidar
-        objects_detected = random.randint(0, 10)
-        self.data["lidar"]["objects_detected"] = objects_detected
-        self.data["lidar"]["point_cloud_density"] = self._generate_value(100, 20) if objects_detected > 0 else 0
+        objects_detected = self.rng.randint(0, 10)
+        v[OBJECTS_DETECTED] = objects_detected
+        v[POINT_CLOUD_DENSITY] = self._generate_value(100, 20) if objects_detected > 0 else 0
 
         # Simulate Spectrometer
-        if random.random() < 0.1: # 10% chance to find something interesting
-            self.data["spectrometer"]["composition"] = {
+        if self.rng.random() < 0.1: # 10% chance to find something interesting
+            self.extra["spectrometer.composition"] = {
                 "H2O": self._generate_value(10, 5),
                 "Fe": self._generate_value(5, 2),
                 "Si": self._generate_value(20, 8)
             }
-            self.data["spectrometer"]["signal_strength"] = self._generate_value(0.8, 0.2)
+            v[SIGNAL_STRENGTH] = self._generate_value(0.8, 0.2)
         else:
-            self.data["spectrometer"]["composition"] = {}
-            self.data["spectrometer"]["signal_strength"] = 0
+            self.extra["spectrometer.composition"] = {}
+            v[SIGNAL_STRENGTH] = 0
 
         # Simulate Magnetometer
-        self.data["magnetometer"]["field_strength"] = self._generate_value(50, 5) # microteslas
-        self.data["magnetometer"]["vector"] = [
-            self._generate_value(0, 1),
-            self._generate_value(0, 1),
-            self._generate_value(0, 1)
-        ]
+        v[FIELD_STRENGTH] = self._generate_value(50, 5) # microteslas
+        for i in range(3):
+            v[FIELD_VECTOR + i] = self._generate_value(0, 1)
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        target_detected = rng.random(n) < 0.2
+        v[:, TARGET_DETECTED] = target_detected
+        v[:, RADAR_RANGE] = np.where(target_detected, g(rng, 1000, 500, n), 0)
+        v[:, RADAR_AZIMUTH] = np.where(target_detected, g(rng, 0, 180, n), 0)
+        v[:, RADAR_ELEVATION] = np.where(target_detected, g(rng, 0, 90, n), 0)
+
+        objects_detected = rng.integers(0, 11, n)
+        v[:, OBJECTS_DETECTED] = objects_detected
+        v[:, POINT_CLOUD_DENSITY] = np.where(objects_detected > 0, g(rng, 100, 20, n), 0)
+
+        found = rng.random(n) < 0.1
+        composition = zip(g(rng, 10, 5, n).tolist(), g(rng, 5, 2, n).tolist(), g(rng, 20, 8, n).tolist())
+        for extra, hit, (h2o, fe, si) in zip(extras, found.tolist(), composition):
+            extra["spectrometer.composition"] = {"H2O": h2o, "Fe": fe, "Si": si} if hit else {}
+        v[:, SIGNAL_STRENGTH] = np.where(found, g(rng, 0.8, 0.2, n), 0)
+
+        v[:, FIELD_STRENGTH] = g(rng, 50, 5, n)
+        v[:, FIELD_VECTOR:FIELD_VECTOR + 3] = np.round(rng.uniform(-1, 1, (n, 3)), 2)
 
     def validate(self):
         super().validate()
-        if self.data["lidar"]["point_cloud_density"] > 200:
+        if self.values[POINT_CLOUD_DENSITY] > 200:
             self.data["status"] = "WARNING"
             self._add_error("High point cloud density, potential sensor overload.")
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Cluster Schema - declarative field specs for sensor cluster readings.
+
+A cluster declares its readings once:
+
+    SCHEMA = ClusterSchema([
+        Field("battery_main.voltage", "V", 0, 30, default=12.5),
+        Field("solar_panels.is_charging", dtype="bool", default=True),
+        Field("imu.orientation_q", dtype="number", size=4, default=(1, 0, 0, 0)),
+        Extra("spectrometer.composition", {}),
+    ])
+
+Numeric fields get fixed slots in one preallocated float64 array per
+cluster instance (an ``array('d')``: writing a slot is as cheap as a list
+store). ``view()`` wraps the same memory as a NumPy array without copying,
+and ``lo``/``hi`` hold the field ranges slot by slot, so range checks and the
+preprocessor can work on whole clusters, or stacks of them, at once.
+``to_dict()`` builds the nested
+dict that consumers read (same shape as the field names, in declaration
+order), only when a snapshot is requested. Extras hold readings that are not
+numbers (strings, variable dicts) and are stored as plain values.
+
+dtype "number" is a float reading that serializes as an int while it
+holds its whole default: the simulators fall back to such sentinels (0 when
+nothing is detected, 999 for no contact, 15 C at rest), which the
+dict-based clusters published as ints, so consumers see the same JSON.
+"""
+import copy
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+DTYPES = ("float", "int", "bool", "number")
+
+
+class Field(NamedTuple):
+    """A numeric reading. ``lo``/``hi`` are the physical limits of the sensor;
+    a reading outside them is reported by validation. ``size`` > 1 makes a
+    vector (serialized as a list)."""
+    name: str
+    unit: str = ""
+    lo: float = -math.inf
+    hi: float = math.inf
+    dtype: str = "float"
+    default: Union[float, Sequence[float]] = 0.0
+    size: int = 1
+
+
+class Extra(NamedTuple):
+    """A non-numeric reading kept outside the array."""
+    name: str
+    default: Any = None
+
+
+_CASTS = {"float": float, "int": int, "bool": bool}
+
+
+def _number_cast(defaults: Sequence[float]):
+    """Cast of a "number" field: its whole defaults become ints, the rest stays float."""
+    whole = frozenset(float(d) for d in defaults if float(d).is_integer())
+
+    def cast(value: float) -> Union[int, float]:
+        return int(value) if value in whole else value
+    return cast
+
+
+class ClusterSchema:
+    """Slot layout and ranges for one cluster class."""
+
+    def __init__(self, entries: Iterable[Union[Field, Extra]]):
+        self.fields: List[Field] = []
+        self.extras: List[Extra] = []
+        self.slots: Dict[str, int] = {}   # field name -> first slot
+        self._casts: Dict[str, Any] = {}  # field name -> cast applied on output
+        self.slot_names: List[str] = []   # slot -> dotted name (vector items get their index)
+        lo, hi, defaults = [], [], []
+        template: Dict[str, Any] = {}
+        for entry in entries:
+            if entry.name in self.slots or any(e.name == entry.name for e in self.extras):
+                raise ValueError(f"Duplicate field {entry.name!r}")
+            if isinstance(entry, Extra):
+                self.extras.append(entry)
+                leaf = ("extra", entry.name)
+            else:
+                if entry.dtype not in DTYPES:
+                    raise ValueError(f"Field {entry.name!r}: unknown dtype {entry.dtype!r}")
+                start = len(self.slot_names)
+                self.fields.append(entry)
+                self.slots[entry.name] = start
+                values = list(entry.default) if entry.size > 1 else [entry.default]
+                if len(values) != entry.size:
+                    raise ValueError(f"Field {entry.name!r}: default does not match size {entry.size}")
+                for i in range(entry.size):
+                    self.slot_names.append(f"{entry.name}.{i}" if entry.size > 1 else entry.name)
+                    lo.append(entry.lo)
+                    hi.append(entry.hi)
+                    defaults.append(float(values[i]))
+                cast = _number_cast(values) if entry.dtype == "number" else _CASTS[entry.dtype]
+                self._casts[entry.name] = cast
+                leaf = ("field", start, entry.size, cast)
+            _insert(template, entry.name.split("."), leaf, entry.name)
+        self._by_name = {field.name: field for field in self.fields}
+        # Slots with a finite range; checked one by one, which beats NumPy on a dozen values
+        self._bounded = [(i, l, h) for i, (l, h) in enumerate(zip(lo, hi)) if l > -math.inf or h < math.inf]
+        self.size = len(self.slot_names)
+        self.lo = np.array(lo, dtype=np.float64)
+        self.hi = np.array(hi, dtype=np.float64)
+        self.defaults = np.array(defaults, dtype=np.float64)
+        self._template = _compile(template)
+
+    def index(self, name: str) -> int:
+        """First slot of a field."""
+        try:
+            return self.slots[name]
+        except KeyError:
+            raise KeyError(f"No field {name!r} in schema") from None
+
+    def get(self, values: array, extra: Dict[str, Any], name: str) -> Any:
+        """One reading by name, cast like ``to_dict()`` does."""
+        if name not in self.slots:
+            return extra[name]
+        field = self._by_name[name]
+        start, cast = self.slots[name], self._casts[name]
+        if field.size > 1:
+            return [cast(v) for v in values[start:start + field.size]]
+        return cast(values[start])
+
+    def new_values(self) -> array:
+        return array("d", self.defaults.tobytes())
+
+    @staticmethod
+    def view(values: array) -> np.ndarray:
+        """NumPy array sharing memory with ``values``."""
+        return np.frombuffer(values, dtype=np.float64)
+
+    def new_extra(self) -> Dict[str, Any]:
+        return {extra.name: copy.deepcopy(extra.default) for extra in self.extras}
+
+    def out_of_range(self, values) -> np.ndarray:
+        """Boolean mask of the slots outside their field range (NaN counts as
+        out). ``values`` may be one cluster's slots or rows of them."""
+        values = np.asarray(values, dtype=np.float64)
+        return ~((values >= self.lo) & (values <= self.hi))
+
+    def violations(self, values: array) -> List[Tuple[str, float]]:
+        """(slot name, value) of every out-of-range slot of one cluster."""
+        return [(self.slot_names[i], values[i]) for i, lo, hi in self._bounded if not lo <= values[i] <= hi]
+
+    def to_dict(self, values: array, extra: Dict[str, Any]) -> Dict[str, Any]:
+        """Nested dict of the readings, fields cast to their dtype. ``values``
+        may also be a plain list (a fleet row, see simulation/sensor_fleet.py)."""
+        return _build(self._template, values if isinstance(values, list) else values.tolist(), extra)
+
+
+def _insert(template: Dict[str, Any], path: List[str], leaf, name: str) -> None:
+    node = template
+    for key in path[:-1]:
+        child = node.setdefault(key, {})
+        if not isinstance(child, dict):
+            raise ValueError(f"Field {name!r} is nested under another field")
+        node = child
+    if path[-1] in node:
+        raise ValueError(f"Field {name!r} clashes with a group of the same name")
+    node[path[-1]] = leaf
+
+
+def _compile(template: Dict[str, Any]) -> Tuple:
+    # Tuples of (key, leaf) so building the dict is a plain loop
+    return tuple((key, ("group", _compile(node)) if isinstance(node, dict) else node)
+                 for key, node in template.items())
+
+
+def _build(template: Tuple, values: List[float], extra: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for key, node in template:
+        kind = node[0]
+        if kind == "field":
+            _, start, size, cast = node
+            if size == 1:
+                out[key] = cast(values[start])
+            else:
+                out[key] = [cast(v) for v in values[start:start + size]]
+        elif kind == "extra":
+            out[key] = copy.deepcopy(extra[node[1]])
+        else:
+            out[key] = _build(node[1], values, extra)
+    return out
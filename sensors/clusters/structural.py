@@ -1,23 +1,42 @@
-import random
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("strain_gauges.hull_main", "%", 0, 10, default=0.1),
+    Field("strain_gauges.solar_panel_joint", "%", 0, 10, default=0.05),
+    Field("vibration.x_axis", "g", -10, 10, default=0.01),
+    Field("vibration.y_axis", "g", -10, 10, default=0.02),
+    Field("vibration.z_axis", "g", -10, 10, default=0.01),
+    Field("hull_pressure.internal", "kPa", 0, 500, default=101.3),
+    Field("hull_pressure.external", "kPa", 0, 500, default=0.0),
+])
+HULL_STRAIN = SCHEMA.index("strain_gauges.hull_main")
+VIBRATION_X = SCHEMA.index("vibration.x_axis")
+INTERNAL_PRESSURE = SCHEMA.index("hull_pressure.internal")
 
 class StructuralCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Structural")
-        self.data.update({
-            "strain_gauges": {"hull_main": 0.1, "solar_panel_joint": 0.05},
-            "vibration": {"x_axis": 0.01, "y_axis": 0.02, "z_axis": 0.01},
-            "hull_pressure": {"internal": 101.3, "external": 0.0}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Structural", seed=seed)
 
     def update(self):
-        self.data["strain_gauges"]["hull_main"] = self._generate_value(0.1, 0.02)
-        self.data["vibration"]["x_axis"] = self._generate_value(0.01, 0.005)
-        self.data["hull_pressure"]["internal"] = self._generate_value(101.3, 0.1)
+        v = self.values
+        v[HULL_STRAIN] = self._generate_value(0.1, 0.02)
+        v[VIBRATION_X] = self._generate_value(0.01, 0.005)
+        v[INTERNAL_PRESSURE] = self._generate_value(101.3, 0.1)
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        v[:, HULL_STRAIN] = g(rng, 0.1, 0.02, n)
+        v[:, VIBRATION_X] = g(rng, 0.01, 0.005, n)
+        v[:, INTERNAL_PRESSURE] = g(rng, 101.3, 0.1, n)
 
     def validate(self):
         super().validate()
-        strain = self.data["strain_gauges"]["hull_main"]
+        strain = self.values[HULL_STRAIN]
         if strain > 0.5:
             self.data["status"] = "ERROR"
             self._add_error(f"Critical hull strain detected: {strain:.3f}")
@@ -1,39 +1,66 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("data_bus.load_percentage", "%", 0, 100, dtype="number", default=15),
+    Field("data_bus.errors_per_minute", lo=0, dtype="int"),
+    Field("processor.load_percentage", "%", 0, 100, dtype="number", default=25),
+    Field("processor.core_voltage", "V", 0, 5, default=1.1),
+    Field("memory.ram_used_percentage", "%", 0, 100, dtype="number", default=40),
+    Field("memory.ecc_errors", lo=0, dtype="int"),
+])
+BUS_LOAD = SCHEMA.index("data_bus.load_percentage")
+BUS_ERRORS = SCHEMA.index("data_bus.errors_per_minute")
+CPU_LOAD = SCHEMA.index("processor.load_percentage")
+CORE_VOLTAGE = SCHEMA.index("processor.core_voltage")
+RAM_USED = SCHEMA.index("memory.ram_used_percentage")
+ECC_ERRORS = SCHEMA.index("memory.ecc_errors")
 
 class SystemHealthCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="SystemHealth")
-        self.data.update({
-            "data_bus": {"load_percentage": 15, "errors_per_minute": 0},
-            "processor": {"load_percentage": 25, "core_voltage": 1.1},
-            "memory": {"ram_used_percentage": 40, "ecc_errors": 0}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="SystemHealth", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Data Bus
-        self.data["data_bus"]["load_percentage"] = self._generate_value(15, 5)
-        self.data["data_bus"]["errors_per_minute"] = random.randint(0, 2) if random.random() < 0.05 else 0
+        v[BUS_LOAD] = self._generate_value(15, 5)
+        v[BUS_ERRORS] = self.rng.randint(0, 2) if self.rng.random() < 0.05 else 0
 
         # Simulate Processor
-        self.data["processor"]["load_percentage"] = self._generate_value(25, 10)
-        self.data["processor"]["core_voltage"] = self._generate_value(1.1, 0.05)
+        v[CPU_LOAD] = self._generate_value(25, 10)
+        v[CORE_VOLTAGE] = self._generate_value(1.1, 0.05)
 
         # Simulate Memory
-        self.data["memory"]["ram_used_percentage"] = self._generate_value(40, 15)
-        if random.random() < 0.01:
-            self.data["memory"]["ecc_errors"] += 1
+        v[RAM_USED] = self._generate_value(40, 15)
+        if self.rng.random() < 0.01:
+            v[ECC_ERRORS] += 1
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        v[:, BUS_LOAD] = g(rng, 15, 5, n)
+        v[:, BUS_ERRORS] = np.where(rng.random(n) < 0.05, rng.integers(0, 3, n), 0)
+
+        v[:, CPU_LOAD] = g(rng, 25, 10, n)
+        v[:, CORE_VOLTAGE] = g(rng, 1.1, 0.05, n)
+
+        v[:, RAM_USED] = g(rng, 40, 15, n)
+        v[:, ECC_ERRORS] += rng.random(n) < 0.01
 
     def validate(self):
         super().validate()
-        if self.data["data_bus"]["errors_per_minute"] > 5:
+        if self.values[BUS_ERRORS] > 5:
             self.data["status"] = "ERROR"
             self._add_error("High data bus error rate.")
 
-        if self.data["memory"]["ecc_errors"] > 10:
+        if self.values[ECC_ERRORS] > 10:
             self.data["status"] = "ERROR"
             self._add_error("Multiple ECC memory errors detected.")
 
-        if self.data["processor"]["load_percentage"] > 90:
+        if self.values[CPU_LOAD] > 90:
             self.data["status"] = "WARNING"
             self._add_error("High processor load.")
@@ -1,27 +1,51 @@
-import random
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("core_temp.cpu", "C", -50, 150, default=45.0),
+    Field("core_temp.gpu", "C", -50, 150, default=55.0),
+    Field("radiators.panel_a_temp", "C", -150, 150, default=-10.0),
+    Field("radiators.panel_b_temp", "C", -150, 150, default=-12.5),
+    Field("heat_pipes.flow_rate", "l/min", 0, 20, default=1.5),
+    Field("heat_pipes.pressure", "bar", 0, 20, default=2.1),
+])
+CPU_TEMP = SCHEMA.index("core_temp.cpu")
+GPU_TEMP = SCHEMA.index("core_temp.gpu")
+PANEL_A_TEMP = SCHEMA.index("radiators.panel_a_temp")
+PANEL_B_TEMP = SCHEMA.index("radiators.panel_b_temp")
+FLOW_RATE = SCHEMA.index("heat_pipes.flow_rate")
+PIPE_PRESSURE = SCHEMA.index("heat_pipes.pressure")
 
 class ThermalCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Thermal")
-        self.data.update({
-            "core_temp": {"cpu": 45.0, "gpu": 55.0},
-            "radiators": {"panel_a_temp": -10.0, "panel_b_temp": -12.5},
-            "heat_pipes": {"flow_rate": 1.5, "pressure": 2.1}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Thermal", seed=seed)
 
     def update(self):
-        self.data["core_temp"]["cpu"] = self._generate_value(45.0, 2.0)
-        self.data["core_temp"]["gpu"] = self._generate_value(55.0, 3.0)
-        self.data["radiators"]["panel_a_temp"] = self._generate_value(-10.0, 5.0)
-        self.data["radiators"]["panel_b_temp"] = self._generate_value(-12.5, 5.0)
-        self.data["heat_pipes"]["flow_rate"] = self._generate_value(1.5, 0.1)
-        self.data["heat_pipes"]["pressure"] = self._generate_value(2.1, 0.1)
+        v = self.values
+        v[CPU_TEMP] = self._generate_value(45.0, 2.0)
+        v[GPU_TEMP] = self._generate_value(55.0, 3.0)
+        v[PANEL_A_TEMP] = self._generate_value(-10.0, 5.0)
+        v[PANEL_B_TEMP] = self._generate_value(-12.5, 5.0)
+        v[FLOW_RATE] = self._generate_value(1.5, 0.1)
+        v[PIPE_PRESSURE] = self._generate_value(2.1, 0.1)
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        v[:, CPU_TEMP] = g(rng, 45.0, 2.0, n)
+        v[:, GPU_TEMP] = g(rng, 55.0, 3.0, n)
+        v[:, PANEL_A_TEMP] = g(rng, -10.0, 5.0, n)
+        v[:, PANEL_B_TEMP] = g(rng, -12.5, 5.0, n)
+        v[:, FLOW_RATE] = g(rng, 1.5, 0.1, n)
+        v[:, PIPE_PRESSURE] = g(rng, 2.1, 0.1, n)
 
     def validate(self):
         super().validate()
-        cpu_temp = self.data["core_temp"]["cpu"]
-        gpu_temp = self.data["core_temp"]["gpu"]
+        cpu_temp = self.values[CPU_TEMP]
+        gpu_temp = self.values[GPU_TEMP]
         if cpu_temp > 85 or gpu_temp > 95:
             self.data["status"] = "ERROR"
             self._add_error(f"Core temperature critical: CPU {cpu_temp:.1f}C, GPU {gpu_temp:.1f}C")
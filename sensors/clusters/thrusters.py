@@ -1,37 +1,68 @@
-import random
+import numpy as np
 from .base_cluster import BaseSensorCluster
+from .schema import ClusterSchema, Field
+
+SCHEMA = ClusterSchema([
+    Field("thrusters.main_engine.thrust", "N", 0, 10000, dtype="number"),
+    Field("thrusters.main_engine.fuel_flow", "g/s", 0, 10000, dtype="number"),
+    Field("thrusters.main_engine.temperature", "C", -100, 3500, dtype="number", default=15),
+    Field("thrusters.rcs_quad_a.thrust", "N", 0, 1000, dtype="number"),
+    Field("thrusters.rcs_quad_a.temperature", "C", -100, 1500, dtype="number", default=15),
+    Field("thrusters.rcs_quad_b.thrust", "N", 0, 1000, dtype="number"),
+    Field("thrusters.rcs_quad_b.temperature", "C", -100, 1500, dtype="number", default=15),
+    Field("gimbal.main_engine_pitch", "deg", -15, 15, dtype="number"),
+    Field("gimbal.main_engine_yaw", "deg", -15, 15, dtype="number"),
+])
+MAIN_THRUST = SCHEMA.index("thrusters.main_engine.thrust")
+MAIN_FUEL_FLOW = SCHEMA.index("thrusters.main_engine.fuel_flow")
+MAIN_TEMPERATURE = SCHEMA.index("thrusters.main_engine.temperature")
+RCS_A_THRUST = SCHEMA.index("thrusters.rcs_quad_a.thrust")
+RCS_B_THRUST = SCHEMA.index("thrusters.rcs_quad_b.thrust")
+GIMBAL_PITCH = SCHEMA.index("gimbal.main_engine_pitch")
+GIMBAL_YAW = SCHEMA.index("gimbal.main_engine_yaw")
 
 class ThrusterCluster(BaseSensorCluster):
-    def __init__(self):
-        super().__init__(cluster_name="Thrusters")
-        self.data.update({
-            "thrusters": {
-                "main_engine": {"thrust": 0, "fuel_flow": 0, "temperature": 15},
-                "rcs_quad_a": {"thrust": 0, "temperature": 15},
-                "rcs_quad_b": {"thrust": 0, "temperature": 15}
-            },
-            "gimbal": {"main_engine_pitch": 0, "main_engine_yaw": 0}
-        })
+    SCHEMA = SCHEMA
+    __slots__ = ()
+
+    def __init__(self, seed=None):
+        super().__init__(cluster_name="Thrusters", seed=seed)
 
     def update(self):
+        v = self.values
         # Simulate Main Engine
-        main_thrust = self._generate_value(100, 10) if random.random() < 0.05 else 0 # 5% chance of main engine burn
-        self.data["thrusters"]["main_engine"]["thrust"] = main_thrust
-        self.data["thrusters"]["main_engine"]["fuel_flow"] = main_thrust * 1.5 if main_thrust > 0 else 0
-        self.data["thrusters"]["main_engine"]["temperature"] = self._generate_value(1500, 200) if main_thrust > 0 else 15
+        main_thrust = self._generate_value(100, 10) if self.rng.random() < 0.05 else 0 # 5% chance of main engine burn
+        v[MAIN_THRUST] = main_thrust
+        v[MAIN_FUEL_FLOW] = main_thrust * 1.5 if main_thrust > 0 else 0
+        v[MAIN_TEMPERATURE] = self._generate_value(1500, 200) if main_thrust > 0 else 15
 
         # Simulate RCS
-        self.data["thrusters"]["rcs_quad_a"]["thrust"] = self._generate_value(5, 2) if random.random() < 0.3 else 0
-        self.data["thrusters"]["rcs_quad_b"]["thrust"] = self._generate_value(5, 2) if random.random() < 0.3 else 0
+        v[RCS_A_THRUST] = self._generate_value(5, 2) if self.rng.random() < 0.3 else 0
+        v[RCS_B_THRUST] = self._generate_value(5, 2) if self.rng.random() < 0.3 else 0
 
         # Simulate Gimbal
         if main_thrust > 0:
-            self.data["gimbal"]["main_engine_pitch"] = self._generate_value(0, 2.5)
-            self.data["gimbal"]["main_engine_yaw"] = self._generate_value(0, 2.5)
+            v[GIMBAL_PITCH] = self._generate_value(0, 2.5)
+            v[GIMBAL_YAW] = self._generate_value(0, 2.5)
+
+    @classmethod
+    def simulate(cls, rng, v, extras):
+        n, g = len(v), cls._generate_values
+        main_thrust = np.where(rng.random(n) < 0.05, g(rng, 100, 10, n), 0)
+        burning = main_thrust > 0
+        v[:, MAIN_THRUST] = main_thrust
+        v[:, MAIN_FUEL_FLOW] = np.where(burning, main_thrust * 1.5, 0)
+        v[:, MAIN_TEMPERATURE] = np.where(burning, g(rng, 1500, 200, n), 15)
+
+        v[:, RCS_A_THRUST] = np.where(rng.random(n) < 0.3, g(rng, 5, 2, n), 0)
+        v[:, RCS_B_THRUST] = np.where(rng.random(n) < 0.3, g(rng, 5, 2, n), 0)
+
+        v[:, GIMBAL_PITCH] = np.where(burning, g(rng, 0, 2.5, n), v[:, GIMBAL_PITCH])
+        v[:, GIMBAL_YAW] = np.where(burning, g(rng, 0, 2.5, n), v[:, GIMBAL_YAW])
 
     def validate(self):
         super().validate()
-        temp = self.data["thrusters"]["main_engine"]["temperature"]
+        temp = self.values[MAIN_TEMPERATURE]
         if temp > 2000:
             self.data["status"] = "ERROR"
             self._add_error(f"Main engine temperature critical: {temp:.0f}C")
@@ -1,8 +1,12 @@
-import json
+import argparse
+import threading
 import time
 import os
 import sys
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from typing import Dict, Optional
 
 # Add project root to sys.path for imports
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -10,6 +14,11 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from core.file_paths import SENSORS_FILE, SENSOR_LOG_FILE
+from core.sensor_delta import SensorDeltaWriter
+from core.sensor_filters import SensorFilterStage
+from core.state_store import get_state_store
+from utils.frozen import freeze
+from utils.latency import LatencyHistogram
 # Import all cluster classes
 from sensors.clusters.navigation import NavigationCluster
 from sensors.clusters.power import PowerCluster
@@ -23,24 +32,91 @@ from sensors.clusters.environment import EnvironmentCluster
 from sensors.clusters.system_health import SystemHealthCluster
 from sensors.clusters.ew import EWCluster
 
+# Cluster classes by their key in the sensors tree
+CLUSTER_CLASSES = {
+    # Core Systems
+    "navigation": NavigationCluster,
+    "power": PowerCluster,
+    "thermal": ThermalCluster,
+    "structural": StructuralCluster,
+    "system_health": SystemHealthCluster,
+    "thrusters": ThrusterCluster,
+    # External Perception
+    "rlsm": RLSMCluster,
+    "proximity": ProximityCluster,
+    "environment": EnvironmentCluster,
+    # Communication & EW
+    "communication": CommunicationCluster,
+    "ew": EWCluster,
+}
+
+# Seconds between two updates of each cluster
+CLUSTER_INTERVALS: Dict[str, float] = {
+    "navigation": 0.1,
+    "power": 1.0,
+    "thermal": 2.0,
+    "structural": 2.0,
+    "system_health": 2.0,
+    "thrusters": 0.1,
+    "rlsm": 0.5,
+    "proximity": 0.05,      # 20 Hz
+    "environment": 5.0,     # 0.2 Hz
+    "communication": 1.0,
+    "ew": 1.0,
+}
+DEFAULT_INTERVAL = 2.0
+# An update still running after this many seconds is reported as timed out
+DEFAULT_TIMEOUT = 1.0
+# Full snapshots go to the state store (sensors.json) at most this often;
+# every update in between is published as a delta (core.sensor_delta)
+SNAPSHOT_INTERVAL = 1.0
+REPORT_INTERVAL = 60.0
+
+
 class SensorBus:
-    def __init__(self):
-        self.clusters = {
-            # Core Systems
-            "navigation": NavigationCluster(),
-            "power": PowerCluster(),
-            "thermal": ThermalCluster(),
-            "structural": StructuralCluster(),
-            "system_health": SystemHealthCluster(),
-            "thrusters": ThrusterCluster(),
-            # External Perception
-            "rlsm": RLSMCluster(),
-            "proximity": ProximityCluster(),
-            "environment": EnvironmentCluster(),
-            # Communication & EW
-            "communication": CommunicationCluster(),
-            "ew": EWCluster(),
+    """Updates every cluster at its own cadence on a thread pool.
+
+    A cluster is never updated twice at the same time: if an update is still
+    running when the cluster is due again, that slot is skipped. An update
+    that overruns its timeout is reported in the published data (status
+    "TIMEOUT") and the cluster is scheduled again once the call returns.
+    Each new snapshot goes through the streaming filters (core.sensor_filters)
+    first. Changes are published as deltas as soon as updates finish (updates
+    finishing together in one record); the full tree goes to the state store
+    every ``snapshot_interval`` seconds.
+    """
+
+    def __init__(self, clusters: Optional[Dict[str, object]] = None, store=None,
+                 intervals: Optional[Dict[str, float]] = None, timeouts: Optional[Dict[str, float]] = None,
+                 workers: Optional[int] = None, deltas: Optional[SensorDeltaWriter] = None,
+                 snapshot_interval: float = SNAPSHOT_INTERVAL, filters: Optional[SensorFilterStage] = None,
+                 seed: Optional[int] = None):
+        # With a seed every cluster draws the same readings on every run
+        self.clusters = clusters if clusters is not None else {
+            name: cls(seed=None if seed is None else f"{seed}:{name}") for name, cls in CLUSTER_CLASSES.items()
         }
+        # sensors.json or the shared-memory segment, depending on config
+        self.store = store if store is not None else get_state_store()
+        self.deltas = deltas if deltas is not None else SensorDeltaWriter()
+        # Smoothing of noisy readings (config/sensor_filters.json) before anything is published
+        self.filters = filters if filters is not None else SensorFilterStage()
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot = float("-inf")
+        intervals = {**CLUSTER_INTERVALS, **(intervals or {})}
+        self.intervals = {name: intervals.get(name, DEFAULT_INTERVAL) for name in self.clusters}
+        self.timeouts = {name: (timeouts or {}).get(name, DEFAULT_TIMEOUT) for name in self.clusters}
+        self.workers = workers or len(self.clusters)
+        self.snapshots: Dict[str, dict] = {}
+        self.stats: Dict[str, Dict[str, float]] = {
+            name: {"updates": 0, "failures": 0, "timeouts": 0, "skipped": 0, "last_ms": 0.0}
+            for name in self.clusters
+        }
+        self.latency = {name: LatencyHistogram(f"{name} update") for name in self.clusters}
+        self.publishes = 0
+        self.publish_failures = 0
+        self._publish_error = None  # last publish error logged
+        self._statuses: Dict[str, str] = {}
+        self._stop = threading.Event()
         self._setup_logging()
         self._log("SensorBus initialized with all clusters.")
 
@@ -53,52 +129,191 @@ class SensorBus:
         with open(self.log_file, 'a') as f:
             f.write(f"[{timestamp}] [SensorBus] {message}\n")
 
-    def run(self):
-        self._log("SensorBus process started.")
-        while True:
-            try:
-                full_sensor_data = {}
-                active_clusters = 0
+    def _update_cluster(self, name: str):
+        """Runs on a pool thread. Returns (snapshot, duration in ms, failed)."""
+        cluster = self.clusters[name]
+        t0 = time.perf_counter()
+        failed = False
+        try:
+            cluster.update()
+            cluster.validate()  # Run validation after update
+        except Exception as e:  # noqa: BLE001
+            # No validate() here: it would reset the status to OK and drop the error
+            failed = True
+            cluster.data["status"] = "FAIL"
+            cluster._add_error(f"Update failed: {e}")
+            self._log(f"ERROR: Cluster '{cluster.get_name()}' update failed: {e}")
+        # Deep copy: the cluster keeps mutating its dict on the next update
+        snapshot = freeze(cluster.serialize())
+        return snapshot, (time.perf_counter() - t0) * 1000.0, failed
+
+    def _record(self, name: str, snapshot: dict, duration_ms: float, failed: bool) -> None:
+        stats = self.stats[name]
+        stats["updates"] += 1
+        stats["failures"] += failed
+        stats["last_ms"] = duration_ms
+        self.latency[name].record(duration_ms)
+        if not failed:  # A failed update repeats the old readings; they are no new sample
+            snapshot = self.filters.apply(name, snapshot)
+        self.snapshots[name] = snapshot
+        self._log_status(name, snapshot.get("status", "UNKNOWN"))
+
+    def _log_status(self, name: str, status: str) -> None:
+        # Only status changes are logged; fast clusters would flood the log otherwise
+        if self._statuses.get(name) == status:
+            return
+        self._statuses[name] = status
+        cluster_name = self.clusters[name].get_name()
+        if status == "ERROR":
+            self._log(f"CRITICAL: Cluster '{cluster_name}' reported an ERROR state.")
+        elif status in ("WARNING", "TIMEOUT"):
+            self._log(f"WARNING: Cluster '{cluster_name}' reported a {status} state.")
+        elif status == "OK":
+            self._log(f"Cluster '{cluster_name}' is OK.")
+
+    def _timed_out(self, name: str, elapsed: float) -> None:
+        self.stats[name]["timeouts"] += 1
+        previous = self.snapshots.get(name, {})
+        self.snapshots[name] = freeze({
+            **previous,
+            "status": "TIMEOUT",
+            "errors": [f"Update running for {elapsed:.2f}s (timeout {self.timeouts[name]:.2f}s)"],
+        })
+        self._log_status(name, "TIMEOUT")
 
-                for name, cluster in self.clusters.items():
+    def publish(self, force_snapshot: bool = False) -> None:
+        """Publishes what changed since the last call as a delta, and the full
+        tree to the state store when a snapshot is due."""
+        tree = {name: self.snapshots[name] for name in self.clusters if name in self.snapshots}
+        now = time.monotonic()
+        if force_snapshot or now - self._last_snapshot >= self.snapshot_interval:
+            # Atomically publish the snapshot (file rename or segment seqlock)
+            self.store.write("sensors", tree)
+            self._last_snapshot = now
+        # After the snapshot, so readers comparing write times prefer the replica
+        self.deltas.publish(tree)
+        self.publishes += 1
+
+    def _safe_publish(self, force_snapshot: bool = False) -> bool:
+        """``publish()`` for the run loop: a failed write (disk full, a
+        snapshot over the segment slot capacity, ...) is logged and the bus
+        keeps running; the next publish retries with the latest tree.
+        Repeats of the same error are only counted (see ``stats_report``)."""
+        try:
+            self.publish(force_snapshot)
+        except Exception as e:  # noqa: BLE001
+            self.publish_failures += 1
+            message = f"{type(e).__name__}: {e}"
+            if message != self._publish_error:
+                self._publish_error = message
+                self._log(f"CRITICAL RUNTIME ERROR while publishing: {message}\n{traceback.format_exc()}")
+            return False
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, duration: Optional[float] = None):
+        """Schedules cluster updates until ``stop()``, Ctrl+C or ``duration`` seconds.
+
+        Returns the names of clusters whose update was still running at the
+        end. Such a hung driver call cannot be interrupted, and the pool's
+        threads are joined at interpreter exit, so a process that must end
+        anyway has to leave with ``os._exit`` (see ``__main__``).
+        """
+        self._log(f"SensorBus process started ({self.workers} workers).")
+        self._stop.clear()
+        started = time.monotonic()
+        next_due = {name: started for name in self.clusters}
+        running = {}   # future -> (name, start time, timed out)
+        busy = set()   # clusters with an update in flight
+        last_report = started
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sensor")
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if duration is not None and now - started >= duration:
+                    break
+                for name, due in next_due.items():
+                    if now < due:
+                        continue
+                    if name in busy:
+                        self.stats[name]["skipped"] += 1
+                    else:
+                        busy.add(name)
+                        running[pool.submit(self._update_cluster, name)] = (name, now, False)
+                    # Keep the cadence, but do not try to catch up on missed slots
+                    next_due[name] = max(due + self.intervals[name], now)
+
+                deadline = min(next_due.values())
+                for name, began, flagged in running.values():
+                    if not flagged:
+                        deadline = min(deadline, began + self.timeouts[name])
+                if duration is not None:
+                    deadline = min(deadline, started + duration)
+                timeout = max(0.0, deadline - time.monotonic())
+                if running:
+                    done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    # wait() returns at once on no futures; sleep until the next slot (or stop())
+                    self._stop.wait(timeout)
+                    done = ()
+
+                changed = False
+                for future in done:
+                    name, _, _ = running.pop(future)
+                    busy.discard(name)
                     try:
-                        cluster.update()
+                        self._record(name, *future.result())
+                        changed = True
                     except Exception as e:  # noqa: BLE001
-                        cluster.data["status"] = "FAIL"
-                        cluster._add_error(f"Update failed: {e}")
-                        self._log(
-                            f"ERROR: Cluster '{cluster.get_name()}' update failed: {e}"
-                        )
-
-                    cluster.validate()  # Run validation after update
-                    full_sensor_data[name] = cluster.serialize()
-                    
-                    status = cluster.data.get("status", "UNKNOWN")
-                    if status == "ERROR":
-                        self._log(f"CRITICAL: Cluster '{cluster.get_name()}' reported an ERROR state.")
-                    elif status == "WARNING":
-                        self._log(f"WARNING: Cluster '{cluster.get_name()}' reported a WARNING state.")
-                    
-                    active_clusters += 1
-
-                # Atomically write to the main sensors file
-                temp_filepath = f"{SENSORS_FILE}.tmp"
-                with open(temp_filepath, 'w') as f:
-                    json.dump(full_sensor_data, f, indent=4)
-                os.rename(temp_filepath, SENSORS_FILE)
-                
-                self._log(f"Successfully updated and validated {active_clusters}/{len(self.clusters)} clusters.")
-                time.sleep(2) # Update interval
-
-            except KeyboardInterrupt:
-                self._log("SensorBus process terminated by user.")
-                break
-            except Exception as e:
-                self._log(f"CRITICAL RUNTIME ERROR: {e}")
-                import traceback
-                self._log(traceback.format_exc())
-                time.sleep(10) # Wait before retrying
+                        self._log(f"CRITICAL RUNTIME ERROR in '{name}': {e}")
+                now = time.monotonic()
+                for future, (name, began, flagged) in list(running.items()):
+                    if not flagged and now - began >= self.timeouts[name]:
+                        running[future] = (name, began, True)
+                        self._timed_out(name, now - began)
+                        changed = True
+                if changed:
+                    self._safe_publish()
+
+                if now - last_report >= REPORT_INTERVAL:
+                    self._log(self.stats_report())
+                    last_report = now
+        except KeyboardInterrupt:
+            self._log("SensorBus process terminated by user.")
+        finally:
+            if self.snapshots:
+                self._safe_publish(force_snapshot=True)  # Leave the latest values in sensors.json
+            # Hung driver calls cannot be interrupted; do not wait for them
+            pool.shutdown(wait=False, cancel_futures=True)
+        return sorted(name for name, _, _ in running.values())
+
+    def stats_report(self) -> str:
+        lines = ["Cluster update stats:"]
+        for name, stats in self.stats.items():
+            lines.append(
+                f"  every {self.intervals[name]:g}s failures={stats['failures']} timeouts={stats['timeouts']} "
+                f"skipped={stats['skipped']} | {self.latency[name].summary()}"
+            )
+        lines.append(f"  deltas: {self.deltas.stats}")
+        lines.append(f"  publishes: {self.publishes}, failed: {self.publish_failures}")
+        return "\n".join(lines)
 
 if __name__ == "__main__":
-    bus = SensorBus()
-    bus.run()
+    parser = argparse.ArgumentParser(description="Sensor cluster scheduler")
+    parser.add_argument("--workers", type=int, default=None, help="Update threads (default: one per cluster)")
+    parser.add_argument("--interval", action="append", default=[], metavar="CLUSTER=SECONDS",
+                        help="Override a cluster's update interval, e.g. --interval proximity=0.02")
+    parser.add_argument("--seed", type=int, default=None, help="Seed the simulated readings for a reproducible run")
+    args = parser.parse_args()
+    overrides = {}
+    for item in args.interval:
+        name, _, seconds = item.partition("=")
+        overrides[name] = float(seconds)
+    bus = SensorBus(intervals=overrides, workers=args.workers, seed=args.seed)
+    hung = bus.run()
+    if hung:
+        # Exit without joining the pool threads stuck in a driver call
+        bus._log(f"Exiting with updates still running: {', '.join(hung)}")
+        os._exit(1)
@@ -8,7 +8,7 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(project_root)
 
-from core.telemetry import TelemetryManager
+from core.telemetry import get_telemetry_manager
 from core.fsm_core import FiniteStateMachine
 from core.fsm_client import FSMClient
 from core.file_paths import TELEMETRY_FILE, FSM_STATE_FILE
@@ -27,6 +27,10 @@ class PhysicsEngine:
         self.consumption_w = 0.0
         self.battery_percent = 100.0
 
+        # Long-lived handles: update_physics() only re-reads files that changed
+        self.telemetry_manager = get_telemetry_manager()
+        self.fsm_client = FSMClient()
+
         print("PhysicsEngine initialized with specs:", self.specs)
 
     def _load_specs(self):
@@ -65,12 +69,12 @@ class PhysicsEngine:
         print("PhysicsEngine initialized.")
 
     def update_physics(self):
-        # Load current state from files
-        telemetry_manager = TelemetryManager()
-        fsm_client = FSMClient()
+        # Pick up changes other processes made to the files since the last tick
+        self.telemetry_manager.refresh_if_changed()
+        self.fsm_client.refresh_if_changed()
 
-        current_telemetry = telemetry_manager.get()
-        current_fsm_state_obj = fsm_client.get_state()
+        current_telemetry = self.telemetry_manager.get()
+        current_fsm_state_obj = self.fsm_client.get_state()
         current_fsm_state = current_fsm_state_obj.get("mode", "unknown") # Assuming 'mode' is the key for the current state
 
         # Update internal state from loaded telemetry
@@ -138,8 +142,8 @@ class PhysicsEngine:
             "battery_percent": round(self.battery_percent, 1)
         }
 
-        # Update TelemetryManager
-        telemetry_manager.update(telemetry_data)
+        # Update TelemetryManager (written only when values changed, rate-limited)
+        self.telemetry_manager.update(telemetry_data)
         print(f"Physics update for FSM state '{current_fsm_state}': {telemetry_data}")
 
 # Main execution block
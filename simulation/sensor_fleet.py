@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+QIKI Bot
+Sensor Fleet - seeded, vectorized sensor simulation for many virtual bots.
+
+Every cluster of every bot lives in one array per cluster (a row of SCHEMA
+slots per bot). A step advances simulated time by ``tick`` seconds and runs
+the vectorized ``simulate()`` of each cluster that is due (the SensorBus
+cadences from CLUSTER_INTERVALS), drawing all random numbers from one
+seeded NumPy Generator. The same seed, bot count and clusters give the same
+readings on every run and every machine; ``digest()`` fingerprints the
+state so runs can be compared.
+
+Each bot publishes its sensors tree (the shape of the "sensors" topic) to
+its own state topic, "sensors.bot000", "sensors.bot001", ..., through
+either store backend, to load the bus, rule engine and dashboards with
+many agents:
+
+    python simulation/sensor_fleet.py --bots 200 --seed 7 --duration 60
+    python simulation/sensor_fleet.py --bots 200 --steps 500 --fast
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core.file_paths import BASE_DIR, STATE_SEGMENT_FILE
+from core.state_store import JsonFileStore, SegmentStore, configured_backend
+from sensors.sensor_bus import CLUSTER_CLASSES, CLUSTER_INTERVALS, DEFAULT_INTERVAL
+
+FLEET_TOPIC = "sensors.bot{:03d}"
+DEFAULT_TICK = 0.05               # simulated seconds per step: the fastest cluster cadence
+FLEET_DIR = os.path.join(BASE_DIR, "logs", "fleet")  # per-bot JSON files (json backend)
+FLEET_SEGMENT_FILE = os.path.join(os.path.dirname(STATE_SEGMENT_FILE), "qiki_fleet.seg")
+FLEET_SLOT_CAPACITY = 32 * 1024   # bytes per bot topic in the segment
+
+
+def fleet_topics(bots: int) -> List[str]:
+    return [FLEET_TOPIC.format(i) for i in range(bots)]
+
+
+def open_fleet_store(topics: Sequence[str], backend: Optional[str] = None, location: Optional[str] = None):
+    """A state store holding ``topics``: per-bot JSON files in ``location``
+    or slots of a separate segment file (the main segment has fixed topics)."""
+    backend = backend or configured_backend()
+    if backend == "segment":
+        return SegmentStore(location or FLEET_SEGMENT_FILE, {topic: FLEET_SLOT_CAPACITY for topic in topics})
+    if backend == "json":
+        directory = location or FLEET_DIR
+        os.makedirs(directory, exist_ok=True)
+        return JsonFileStore({topic: os.path.join(directory, f"{topic}.json") for topic in topics})
+    raise ValueError(f"Unknown state backend: {backend}")
+
+
+class SensorFleet:
+    """Sensor readings of ``bots`` virtual bots, advanced together."""
+
+    def __init__(self, bots: int, seed: int = 0, clusters: Mapping[str, type] = CLUSTER_CLASSES,
+                 intervals: Optional[Dict[str, float]] = None, tick: float = DEFAULT_TICK):
+        self.bots = bots
+        self.seed = seed
+        self.tick = tick
+        self.rng = np.random.default_rng(seed)
+        self.clusters = dict(clusters)
+        intervals = {**CLUSTER_INTERVALS, **(intervals or {})}
+        self.intervals = {name: intervals.get(name, DEFAULT_INTERVAL) for name in self.clusters}
+        self.values = {name: np.tile(cls.SCHEMA.defaults, (bots, 1)) for name, cls in self.clusters.items()}
+        self.extras = {name: [cls.SCHEMA.new_extra() for _ in range(bots)] for name, cls in self.clusters.items()}
+        # One instance per cluster runs the scalar validate() and serialize() on each bot's row
+        self._validators = {name: cls() for name, cls in self.clusters.items()}
+        self.snapshots: Dict[str, List[Dict[str, Any]]] = {}
+        self.steps = 0
+        self._next_due = {name: 0 for name in self.clusters}  # step number
+        self.stats = {"cluster_updates": 0, "simulate_s": 0.0, "snapshot_s": 0.0}
+
+    @property
+    def time(self) -> float:
+        """Simulated seconds since the start."""
+        return self.steps * self.tick
+
+    def step(self) -> List[str]:
+        """Advances one tick. Returns the clusters that were updated."""
+        updated = []
+        for name, cls in self.clusters.items():
+            if self.steps < self._next_due[name]:
+                continue
+            t0 = time.perf_counter()
+            cls.simulate(self.rng, self.values[name], self.extras[name])
+            t1 = time.perf_counter()
+            self.snapshots[name] = self._snapshot(name)
+            self.stats["simulate_s"] += t1 - t0
+            self.stats["snapshot_s"] += time.perf_counter() - t1
+            self.stats["cluster_updates"] += 1
+            self._next_due[name] = self.steps + max(1, round(self.intervals[name] / self.tick))
+            updated.append(name)
+        self.steps += 1
+        return updated
+
+    def _snapshot(self, name: str) -> List[Dict[str, Any]]:
+        validator = self._validators[name]
+        snapshots = []
+        for row, extra in zip(self.values[name].tolist(), self.extras[name]):
+            validator.values = row
+            validator.extra = extra
+            validator.validate()
+            snapshots.append(validator.serialize())
+        return snapshots
+
+    def frame(self, bot: int) -> Dict[str, Any]:
+        """The sensors tree of one bot."""
+        return {name: snapshots[bot] for name, snapshots in self.snapshots.items()}
+
+    def publish(self, store, topics: Optional[Sequence[str]] = None) -> None:
+        """Writes every bot's tree to its topic."""
+        for bot, topic in enumerate(topics or fleet_topics(self.bots)):
+            store.write(topic, self.frame(bot))
+
+    def digest(self) -> str:
+        """Fingerprint of the current readings of all bots."""
+        h = hashlib.sha256()
+        for name in self.clusters:
+            h.update(name.encode())
+            h.update(self.values[name].tobytes())
+            if self.extras[name] and self.extras[name][0]:
+                h.update(json.dumps(self.extras[name], sort_keys=True).encode())
+        return h.hexdigest()[:16]
+
+
+def run_fleet(bots: int, seed: int, duration: Optional[float] = None, steps: Optional[int] = None,
+              tick: float = DEFAULT_TICK, fast: bool = False, backend: Optional[str] = None) -> SensorFleet:
+    """Steps the fleet in real time (or as fast as possible) and publishes every step."""
+    fleet = SensorFleet(bots, seed=seed, tick=tick)
+    topics = fleet_topics(bots)
+    store = open_fleet_store(topics, backend)
+    print(f"[Fleet] {bots} bots, seed {seed}, {store.backend} backend, topics {topics[0]}..{topics[-1]}")
+    started = time.monotonic()
+    publish_s = 0.0
+    try:
+        while (steps is None or fleet.steps < steps) and (duration is None or fleet.time < duration):
+            fleet.step()
+            t0 = time.perf_counter()
+            fleet.publish(store, topics)
+            publish_s += time.perf_counter() - t0
+            if not fast:
+                delay = started + fleet.time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+    except KeyboardInterrupt:
+        print("[Fleet] Stopped by user.")
+    finally:
+        store.close()
+    elapsed = time.monotonic() - started
+    n = max(fleet.steps, 1)
+    print(f"[Fleet] {fleet.steps} steps ({fleet.time:.1f} simulated s) in {elapsed:.2f}s: "
+          f"{fleet.steps * bots / elapsed:.0f} bot frames/s published")
+    print(f"[Fleet] per step: simulate {fleet.stats['simulate_s'] / n * 1000:.2f} ms, "
+          f"validate+serialize {fleet.stats['snapshot_s'] / n * 1000:.2f} ms, publish {publish_s / n * 1000:.2f} ms")
+    print(f"[Fleet] digest {fleet.digest()}")
+    return fleet
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulates the sensors of many bots for load tests")
+    parser.add_argument("--bots", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=None, help="Simulated seconds to run")
+    parser.add_argument("--steps", type=int, default=None, help="Steps to run")
+    parser.add_argument("--tick", type=float, default=DEFAULT_TICK, help="Simulated seconds per step")
+    parser.add_argument("--fast", action="store_true", help="Do not wait for real time between steps")
+    parser.add_argument("--backend", choices=("json", "segment"), default=None,
+                        help="State store backend (default: the configured one)")
+    args = parser.parse_args()
+    run_fleet(args.bots, args.seed, args.duration, args.steps, args.tick, args.fast, args.backend)
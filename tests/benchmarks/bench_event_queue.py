@@ -0,0 +1,116 @@
+"""
+Throughput benchmark for the FSM request queue.
+
+Many producer processes enqueue events while one gatekeeper-style consumer
+drains them. Compares the old read-modify-write fsm_requests.json queue
+with the append-only core.event_log queue.
+
+    python tests/benchmarks/bench_event_queue.py --producers 8 --events 500
+"""
+import argparse
+import fcntl
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.event_log import EventLog
+
+
+class JsonFileQueue:
+    """Reference copy of the old queue: flock, load, append, rewrite."""
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                json.dump([], f)
+
+    def append(self, record):
+        with open(self.path, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                try:
+                    queue = json.load(f)
+                except json.JSONDecodeError:
+                    queue = []
+                queue.append(record)
+                f.seek(0)
+                f.truncate()
+                json.dump(queue, f, indent=4)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def read_batch(self, max_records=None):
+        with open(self.path, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                content = f.read()
+                records = json.loads(content) if content else []
+                f.seek(0)
+                f.truncate()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return records
+
+    def commit(self):
+        pass
+
+
+def _make_queue(kind, location):
+    if kind == "json":
+        return JsonFileQueue(os.path.join(location, "fsm_requests.json"))
+    return EventLog(os.path.join(location, "fsm_queue"), segment_bytes=256 * 1024)
+
+
+def _produce(kind, location, worker, events, start_barrier):
+    queue = _make_queue(kind, location)
+    start_barrier.wait()
+    for i in range(events):
+        queue.append({"event": "PING", "from": f"producer_{worker}", "seq": i, "metadata": None})
+
+
+def run(kind, producers, events):
+    with tempfile.TemporaryDirectory() as location:
+        consumer = _make_queue(kind, location)
+        barrier = multiprocessing.Barrier(producers + 1)
+        procs = [multiprocessing.Process(target=_produce, args=(kind, location, w, events, barrier))
+                 for w in range(producers)]
+        for p in procs:
+            p.start()
+        barrier.wait()
+        t0 = time.perf_counter()
+        received = 0
+        total = producers * events
+        while received < total:
+            batch = consumer.read_batch(1000)
+            consumer.commit()
+            received += len(batch)
+            if not batch:
+                time.sleep(0.001)
+        elapsed = time.perf_counter() - t0
+        for p in procs:
+            p.join()
+    return total, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FSM request queue throughput benchmark")
+    parser.add_argument("--producers", type=int, default=8)
+    parser.add_argument("--events", type=int, default=500, help="Events per producer")
+    args = parser.parse_args()
+
+    print(f"{args.producers} producers x {args.events} events, one consumer")
+    for kind, name in (("json", "fsm_requests.json (before)"), ("log", "append-only log (after)")):
+        total, elapsed = run(kind, args.producers, args.events)
+        print(f"  {name:<28} {total} events in {elapsed:6.2f}s  ->  {total / elapsed:10.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Transition throughput benchmark for the FSM core.
+
+Drives FiniteStateMachine (nested dict lookups, dict entries per
+transition) and CompiledStateMachine (integer IDs, dense table, slot
+entries) through the same event sequence and reports transitions per
+second, plus the cost of export_state() for each.
+
+    python tests/benchmarks/bench_fsm_transitions.py --transitions 500000
+"""
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.fsm_core import CompiledStateMachine, FiniteStateMachine
+
+TRANSITIONS = {
+    "IDLE": {"START_MISSION": "MISSION_ACTIVE", "CHARGE": "CHARGING"},
+    "MISSION_ACTIVE": {"PAUSE_MISSION": "IDLE", "END_MISSION": "IDLE", "OBSTACLE_DETECTED": "AVOIDING"},
+    "CHARGING": {"CHARGE_COMPLETE": "IDLE"},
+    "AVOIDING": {"OBSTACLE_CLEARED": "MISSION_ACTIVE"},
+    "ERROR": {"RESET": "IDLE"},
+}
+
+# A cycle that returns to IDLE, with one rejected event per lap
+CYCLE = ["START_MISSION", "OBSTACLE_DETECTED", "CHARGE", "OBSTACLE_CLEARED", "END_MISSION", "CHARGE", "CHARGE_COMPLETE"]
+
+
+def run(fsm_class, transitions):
+    fsm = fsm_class(initial_state="IDLE", transitions=TRANSITIONS)
+    events = (CYCLE * (transitions // len(CYCLE) + 1))[:transitions]
+    trigger = fsm.trigger_event
+    t0 = time.perf_counter()
+    for event in events:
+        trigger(event)
+    elapsed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        fsm.export_state()
+    export_us = (time.perf_counter() - t0) * 1000.0
+    return elapsed, export_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FSM transition throughput benchmark")
+    parser.add_argument("--transitions", type=int, default=500_000, help="Events fed to each FSM")
+    args = parser.parse_args()
+
+    print(f"{args.transitions} events ({len(CYCLE) - 1} of every {len(CYCLE)} change state)")
+    results = {}
+    for fsm_class, name in ((FiniteStateMachine, "dict FSM (before)"), (CompiledStateMachine, "compiled FSM (after)")):
+        elapsed, export_us = run(fsm_class, args.transitions)
+        results[name] = elapsed
+        print(f"  {name:<22} {args.transitions / elapsed:12.0f} events/s   export_state {export_us:7.1f} us")
+    before, after = results.values()
+    print(f"  speed-up: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Contention benchmark for SharedJsonCache.
+
+N reader threads call get_json() on fsm_state.json while one writer keeps
+rewriting telemetry.json. Reports p50/p99 get_json latency for the old
+design (one global lock, dict.copy per read, json.dump inside the lock)
+and for the current SharedJsonCache.
+
+    python tests/benchmarks/bench_json_cache_contention.py --readers 8 --duration 2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.shared_json_cache import SharedJsonCache
+
+
+class GlobalLockCache:
+    """Reference copy of the pre-striping cache: everything under one lock."""
+
+    def __init__(self, file_paths):
+        self._lock = threading.Lock()
+        self._cache = {}
+        for path in file_paths:
+            with open(path) as f:
+                self._cache[path] = json.load(f)
+
+    def get_json(self, path):
+        with self._lock:
+            return self._cache.get(path, {}).copy()
+
+    def set_json(self, path, data):
+        with self._lock:
+            if data != self._cache.get(path):
+                self._cache[path] = data
+                temp_path = path + ".tmp"
+                with open(temp_path, "w") as f:
+                    json.dump(data, f, indent=4)
+                os.rename(temp_path, path)
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(cache, read_path, write_path, readers, duration, payload_size):
+    stop = threading.Event()
+    samples = [[] for _ in range(readers)]
+
+    def reader(out):
+        clock = time.perf_counter_ns
+        while not stop.is_set():
+            t0 = clock()
+            cache.get_json(read_path)
+            out.append(clock() - t0)
+
+    def writer():
+        tick = 0
+        while not stop.is_set():
+            tick += 1
+            payload = {f"field_{i}": tick * 0.001 + i for i in range(payload_size)}
+            cache.set_json(write_path, payload)
+
+    threads = [threading.Thread(target=reader, args=(samples[i],)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    merged = [s for chunk in samples for s in chunk]
+    return len(merged), _percentile(merged, 50) / 1000.0, _percentile(merged, 99) / 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SharedJsonCache reader/writer contention benchmark")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--payload-size", type=int, default=2000, help="Keys in the telemetry payload")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        read_path = os.path.join(tmp, "fsm_state.json")
+        write_path = os.path.join(tmp, "telemetry.json")
+        with open(read_path, "w") as f:
+            json.dump({"state": "IDLE", "context": {f"k{i}": i for i in range(50)}}, f)
+        with open(write_path, "w") as f:
+            json.dump({}, f)
+
+        SharedJsonCache._instance = None
+        caches = [
+            ("global lock (before)", GlobalLockCache([read_path, write_path])),
+            ("per-path + snapshots (after)", SharedJsonCache(file_paths=[read_path, write_path])),
+        ]
+        print(f"{args.readers} readers vs 1 writer, {args.duration}s, payload {args.payload_size} keys")
+        for name, cache in caches:
+            count, p50, p99 = run(cache, read_path, write_path, args.readers, args.duration, args.payload_size)
+            print(f"  {name:<30} reads={count:>10}  p50={p50:8.2f} us  p99={p99:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
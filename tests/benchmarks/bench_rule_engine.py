@@ -0,0 +1,169 @@
+"""
+Rule evaluation benchmark.
+
+Generates N rules over the numeric fields of sensors.json (plus telemetry
+and FSM state) and measures rule evaluations per second for the old
+string-parsing evaluator, a full pass over compiled conditions, and the
+incremental RuleEngine when only --changes sensor values move per cycle.
+
+    python tests/benchmarks/bench_rule_engine.py --rules 1000 --cycles 50 --changes 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.file_paths import SENSORS_FILE
+from core.rule_compiler import compile_condition
+from core.rule_engine import RuleEngine
+
+
+class StringRuleEvaluator:
+    """Reference copy of the old evaluator: parses conditions on every call."""
+
+    def _get_value_from_path(self, data, path):
+        current_data = data
+        for part in path.split('.'):
+            if isinstance(current_data, dict) and part in current_data:
+                current_data = current_data[part]
+            else:
+                return None
+        return current_data
+
+    def _evaluate_single_condition(self, condition_str, data_context):
+        operators = {'>': lambda a, b: a > b, '<': lambda a, b: a < b, '==': lambda a, b: a == b,
+                     '!=': lambda a, b: a != b, '>=': lambda a, b: a >= b, '<=': lambda a, b: a <= b}
+        op = None
+        for operator_str in sorted(operators.keys(), key=len, reverse=True):
+            if operator_str in condition_str:
+                parts = condition_str.split(operator_str, 1)
+                if len(parts) == 2:
+                    field_path = parts[0].strip()
+                    value_str = parts[1].strip()
+                    op = operator_str
+                    break
+        if not op:
+            return False
+        actual_value = self._get_value_from_path(data_context, field_path)
+        if actual_value is None:
+            return False
+        try:
+            if isinstance(actual_value, (int, float)):
+                target_value = float(value_str)
+            elif isinstance(actual_value, bool):
+                target_value = value_str.lower() == 'true'
+            else:
+                target_value = value_str.strip("'\"")
+        except ValueError:
+            return False
+        return operators[op](actual_value, target_value)
+
+    def check_condition(self, condition_str, data_context):
+        if " and " in condition_str:
+            return all(self._evaluate_single_condition(s.strip(), data_context) for s in condition_str.split(" and "))
+        elif " or " in condition_str:
+            return any(self._evaluate_single_condition(s.strip(), data_context) for s in condition_str.split(" or "))
+        return self._evaluate_single_condition(condition_str, data_context)
+
+    def evaluate(self, rules, data_context):
+        return [rule for rule in rules if self.check_condition(rule["condition"], data_context)]
+
+
+def _numeric_paths(data, prefix):
+    for key, value in data.items():
+        path = f"{prefix}.{key}"
+        if isinstance(value, dict):
+            yield from _numeric_paths(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def make_rules(sensors, count, seed=1):
+    rng = random.Random(seed)
+    paths = list(_numeric_paths(sensors, "sensors")) + [("telemetry.battery_percent", 50.0), ("telemetry.velocity", 0.5)]
+    rules = []
+    for i in range(count):
+        clauses = []
+        for _ in range(rng.choice((1, 2, 2, 3))):
+            path, value = rng.choice(paths)
+            threshold = round(value * rng.uniform(0.5, 1.5) + rng.uniform(-1, 1), 2)
+            clauses.append(f"{path} {rng.choice(('<', '>', '<=', '>='))} {threshold}")
+        if rng.random() < 0.3:
+            clauses.append(f"fsm.state == '{rng.choice(('idle', 'charging', 'moving'))}'")
+        joiner = " and " if rng.random() < 0.7 else " or "
+        rules.append({"name": f"Rule{i}", "condition": joiner.join(clauses), "action": "noop", "priority": i})
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule evaluation throughput benchmark")
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=50, help="Full passes over all rules")
+    parser.add_argument("--changes", type=int, default=5, help="Sensor values changed per cycle")
+    args = parser.parse_args()
+
+    with open(SENSORS_FILE, "r") as f:
+        sensors = json.load(f)
+    telemetry = {"battery_percent": 64.0, "velocity": 0.4}
+    rules = make_rules(sensors, args.rules)
+    context = {"telemetry": telemetry, "sensors": sensors, "fsm": {"state": "idle"}}
+
+    with tempfile.TemporaryDirectory() as location:
+        rules_path = os.path.join(location, "rules.json")
+        with open(rules_path, "w") as f:
+            json.dump(rules, f)
+        t0 = time.perf_counter()
+        engine = RuleEngine(rule_path=rules_path)
+        compile_ms = (time.perf_counter() - t0) * 1000.0
+
+    old = StringRuleEvaluator()
+    compiled = [(rule, compile_condition(rule["condition"])) for rule in rules]
+    expected = [r["name"] for r in old.evaluate(rules, context)]
+    assert [r["name"] for r in engine.evaluate(telemetry, "idle", sensors)] == expected
+
+    # The same sequence of small changes is replayed for every variant
+    rng = random.Random(2)
+    leaves = []
+    for path, _ in _numeric_paths(sensors, "sensors"):
+        keys = path.split(".")[1:]
+        parent = sensors
+        for key in keys[:-1]:
+            parent = parent[key]
+        leaves.append((parent, keys[-1]))
+    changes = [[(rng.randrange(len(leaves)), rng.uniform(0.8, 1.2)) for _ in range(args.changes)]
+               for _ in range(args.cycles)]
+    originals = [parent[key] for parent, key in leaves]
+
+    def replay(evaluate):
+        for i, (parent, key) in enumerate(leaves):
+            parent[key] = originals[i]
+        t0 = time.perf_counter()
+        for cycle in changes:
+            for leaf, factor in cycle:
+                parent, key = leaves[leaf]
+                parent[key] = parent[key] * factor
+            result = evaluate()
+        return time.perf_counter() - t0, [r["name"] for r in result]
+
+    print(f"{args.rules} rules x {args.cycles} cycles, {args.changes} of {len(leaves)} sensor values change per cycle")
+    print(f"  RuleEngine load + compile: {compile_ms:.1f} ms, {engine._matcher.node_count} shared nodes")
+    before, expected = replay(lambda: old.evaluate(rules, context))
+    full, result_full = replay(lambda: [rule for rule, predicate in compiled if predicate(context)])
+    after, result_after = replay(lambda: engine.evaluate(telemetry, "idle", sensors))
+    assert result_full == expected and result_after == expected
+
+    total = args.rules * args.cycles
+    for name, elapsed in (("string parsing (before)", before), ("compiled, full pass", full),
+                          ("incremental (after)", after)):
+        print(f"  {name:<26} {total / elapsed:12.0f} rule evaluations/s   {elapsed / args.cycles * 1000:7.3f} ms/cycle")
+    print(f"  speed-up: {before / full:.1f}x compiled, {before / after:.1f}x incremental")
+
+
+if __name__ == "__main__":
+    main()
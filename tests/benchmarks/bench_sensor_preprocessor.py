@@ -0,0 +1,144 @@
+"""
+Sensor preprocessor throughput benchmark.
+
+Generates frames from the simulated sensor clusters and measures frames per
+second for the old per-key range checks, the table-driven preprocessor on
+single frames, and batch checks over stacked frames and over columnar data
+(the shape of a loaded recording). Every bounded field of the cluster
+schemas is range-checked on top of the configured ranges.
+
+    python tests/benchmarks/bench_sensor_preprocessor.py --frames 2000 --batch 100000
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.sensor_preprocessor import RangeTable, SensorPreprocessor, get_default_config
+from sensors.clusters.communication import CommunicationCluster
+from sensors.clusters.environment import EnvironmentCluster
+from sensors.clusters.ew import EWCluster
+from sensors.clusters.navigation import NavigationCluster
+from sensors.clusters.power import PowerCluster
+from sensors.clusters.proximity import ProximityCluster
+from sensors.clusters.rlsm import RLSMCluster
+from sensors.clusters.structural import StructuralCluster
+from sensors.clusters.system_health import SystemHealthCluster
+from sensors.clusters.thermal import ThermalCluster
+from sensors.clusters.thrusters import ThrusterCluster
+
+CLUSTERS = {
+    "navigation": NavigationCluster, "power": PowerCluster, "thermal": ThermalCluster,
+    "structural": StructuralCluster, "system_health": SystemHealthCluster, "thrusters": ThrusterCluster,
+    "rlsm": RLSMCluster, "proximity": ProximityCluster, "environment": EnvironmentCluster,
+    "communication": CommunicationCluster, "ew": EWCluster,
+}
+
+
+def legacy_filter_noise(data):
+    """Reference copy of the old hard-coded checks (prints removed)."""
+    if "navigation" in data and "gyroscope" in data["navigation"]:
+        gyro = data["navigation"]["gyroscope"]
+        for key in ["pitch_rate", "yaw_rate", "roll_rate"]:
+            if key in gyro and not (-500 <= gyro[key] <= 500):
+                gyro[key] = None
+    if "proximity" in data and "collision_avoidance" in data["proximity"]:
+        min_dist = data["proximity"]["collision_avoidance"].get("min_distance")
+        if min_dist is not None and not (0.0 <= min_dist <= 10.0):
+            data["proximity"]["collision_avoidance"]["min_distance"] = None
+    if "thermal" in data and "core_temp" in data["thermal"]:
+        core_temp = data["thermal"]["core_temp"]
+        for key in ["cpu", "gpu"]:
+            if key in core_temp and not (-50 <= core_temp[key] <= 150):
+                core_temp[key] = None
+    if "rlsm" in data and "magnetometer" in data["rlsm"]:
+        field_strength = data["rlsm"]["magnetometer"].get("field_strength")
+        if field_strength is not None and not (0 <= field_strength <= 1000):
+            data["rlsm"]["magnetometer"]["field_strength"] = None
+
+
+def make_frames(count, seed=1):
+    random.seed(seed)
+    clusters = {name: cls() for name, cls in CLUSTERS.items()}
+    frames = []
+    for _ in range(count):
+        frame = {}
+        for name, cluster in clusters.items():
+            cluster.update()
+            cluster.validate()
+            frame[name] = cluster.serialize()
+        frames.append(frame)
+    return clusters, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensor preprocessor throughput benchmark")
+    parser.add_argument("--frames", type=int, default=2000, help="Frames for the per-frame runs")
+    parser.add_argument("--batch", type=int, default=100000, help="Rows for the columnar batch run")
+    args = parser.parse_args()
+
+    clusters, frames = make_frames(args.frames)
+    config, configured = get_default_config()
+    schema_table = RangeTable.from_schemas({name: cluster.SCHEMA for name, cluster in clusters.items()})
+    table = RangeTable(config["ranges"] + [
+        {"field": column, "min": lo, "max": hi, "action": "flag"}
+        for column, lo, hi in zip(schema_table.columns, schema_table.lo.tolist(), schema_table.hi.tolist())
+        if column not in configured.columns
+    ])
+    print(f"{args.frames} frames, {len(configured)} configured ranges, {len(table)} ranges with the schema limits")
+
+    copies = [copy.deepcopy(frame) for frame in frames]
+    t0 = time.perf_counter()
+    for frame in copies:
+        legacy_filter_noise(frame)
+    legacy = time.perf_counter() - t0
+
+    def run_single(range_table):
+        t0 = time.perf_counter()
+        for frame in frames:
+            proc = SensorPreprocessor(frame, config=config, table=range_table)
+            proc.filter_noise()
+            proc.validate()
+        return time.perf_counter() - t0
+
+    single = run_single(configured)
+    single_all = run_single(table)
+
+    t0 = time.perf_counter()
+    mask, violations = table.check(table.stack(frames))
+    stacked = time.perf_counter() - t0
+
+    # Columns as RecordingReader.load returns them: recorded frames with 1% jitter
+    # and a few spikes (0.1% of the readings)
+    rng = np.random.default_rng(2)
+    picks = rng.integers(0, len(frames), args.batch)
+    recorded = table.stack(frames)[picks] * rng.normal(1.0, 0.01, (args.batch, len(table)))
+    spikes = rng.random(recorded.shape) < 0.001
+    recorded[spikes] = 1e6
+    columns = {f"sensors.{c}": recorded[:, i] for i, c in enumerate(table.columns)}
+    batch = table.from_columns(columns, "sensors.")
+    t0 = time.perf_counter()
+    mask, violations = table.check(batch, max_violations=1000)
+    columnar = time.perf_counter() - t0
+
+    for name, rows, elapsed in (
+        ("per-key checks (before)", args.frames, legacy),
+        (f"single frame, {len(configured)} ranges", args.frames, single),
+        (f"single frame, {len(table)} ranges", args.frames, single_all),
+        (f"stacked frames, {len(table)} ranges", args.frames, stacked),
+        (f"columnar batch, {len(table)} ranges", args.batch, columnar),
+    ):
+        print(f"  {name:<32} {rows / elapsed:12.0f} frames/s")
+    print(f"  columnar batch: {int(mask.any(axis=1).sum())} of {args.batch} rows flagged, "
+          f"{int(mask.sum())} readings out of range")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.event_log import EventLog
+
+
+def _segment_files(directory):
+    return sorted(p for p in os.listdir(directory) if p.endswith(".jsonl"))
+
+
+def test_append_read_and_commit(tmp_path):
+    producer = EventLog(str(tmp_path))
+    for i in range(5):
+        producer.append({"event": "E", "i": i})
+
+    consumer = EventLog(str(tmp_path))
+    assert [r["i"] for r in consumer.read_batch(max_records=3)] == [0, 1, 2]
+    consumer.commit()
+
+    # A restarted consumer resumes from the committed cursor
+    restarted = EventLog(str(tmp_path))
+    assert [r["i"] for r in restarted.read_batch()] == [3, 4]
+    assert restarted.read_batch() == []
+
+
+def test_uncommitted_records_are_redelivered(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.append({"event": "E"})
+    assert len(EventLog(str(tmp_path)).read_batch()) == 1
+    assert len(EventLog(str(tmp_path)).read_batch()) == 1
+
+
+def test_segments_rotate_and_compact(tmp_path):
+    producer = EventLog(str(tmp_path), segment_bytes=200)
+    consumer = EventLog(str(tmp_path), segment_bytes=200)
+    received = []
+    for i in range(100):
+        producer.append({"event": "E", "i": i})
+        if i % 10 == 9:
+            received += consumer.read_batch()
+            consumer.commit()
+    received += consumer.read_batch()
+    consumer.commit()
+
+    assert [r["i"] for r in received] == list(range(100))
+    # Consumed segments are deleted; only the active one is left
+    assert len(_segment_files(tmp_path)) == 1
+    with open(tmp_path / "cursor.json") as f:
+        assert json.load(f)["segment"] > 1
+
+
+def test_concurrent_producers(tmp_path):
+    consumer = EventLog(str(tmp_path), segment_bytes=1024)
+
+    def produce(worker):
+        log = EventLog(str(tmp_path), segment_bytes=1024)
+        for i in range(200):
+            log.append({"event": "E", "worker": worker, "i": i})
+
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    received = []
+    while any(t.is_alive() for t in threads):
+        received += consumer.read_batch()
+        consumer.commit()
+    for t in threads:
+        t.join()
+    received += consumer.read_batch()
+    consumer.commit()
+
+    assert len(received) == 800
+    for worker in range(4):
+        assert [r["i"] for r in received if r["worker"] == worker] == list(range(200))
+
+
+def test_consumer_wakes_on_append(tmp_path):
+    consumer = EventLog(str(tmp_path))
+    consumer.listen()
+    assert consumer.wait(timeout=0.05) is False
+
+    producer = EventLog(str(tmp_path))
+    threading.Timer(0.05, producer.append, args=({"event": "E"},)).start()
+    assert consumer.wait(timeout=2.0) is True
+    assert len(consumer.read_batch()) == 1
+    consumer.close()
+    producer.close()
+
+
+def test_record_longer_than_read_chunk(tmp_path):
+    log = EventLog(str(tmp_path))
+    log.append({"event": "BIG", "payload": "x" * 600 * 1024})
+    log.append({"event": "E"})
+    consumer = EventLog(str(tmp_path))
+    received = consumer.read_batch()
+    assert [r["event"] for r in received] == ["BIG", "E"]
+    assert len(received[0]["payload"]) == 600 * 1024
+
+
+def test_torn_record_is_skipped(tmp_path):
+    producer = EventLog(str(tmp_path), segment_bytes=100)
+    consumer = EventLog(str(tmp_path), segment_bytes=100)
+    producer.append({"event": "A"})
+    segment = tmp_path / _segment_files(tmp_path)[0]
+    with open(segment, "ab") as f:
+        f.write(b'{"event": "TORN", "data": {"x"')  # producer crashed mid-write
+    assert [r["event"] for r in consumer.read_batch()] == ["A"]
+    assert consumer.read_batch() == []
+
+    # The next append lands right after the torn bytes and is still delivered
+    producer.append({"event": "B", "data": {"y": 1}})
+    assert [r["event"] for r in consumer.read_batch()] == ["B"]
+
+    # A torn tail past the rotation size is dropped when the segment is sealed
+    with open(segment, "ab") as f:
+        f.write(b'{"event": "TORN"' + b" " * 100)
+    assert consumer.read_batch() == []
+    producer.append({"event": "C"})
+    assert [r["event"] for r in consumer.read_batch()] == ["C"]
+    consumer.commit()
+    assert not segment.exists()
@@ -4,7 +4,7 @@ import sys
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(PROJECT_ROOT)
 
-from core.fsm_core import FiniteStateMachine
+from core.fsm_core import CompiledStateMachine, FiniteStateMachine
 
 
 TRANSITIONS = {
@@ -29,3 +29,57 @@ def test_export_and_load():
     new_fsm.load_state(exported)
     assert new_fsm.get_current_state() == "MISSION_ACTIVE"
     assert new_fsm.history[0]["event"] == "START_MISSION"
+
+
+def test_history_is_bounded():
+    evicted = []
+    fsm = FiniteStateMachine(initial_state="IDLE", transitions=TRANSITIONS, history_size=4, on_history_evict=evicted.append)
+    for _ in range(5):
+        assert fsm.trigger_event("START_MISSION")
+        assert fsm.trigger_event("PAUSE_MISSION")
+
+    assert len(fsm.history) == 4
+    assert len(fsm.export_state()["history"]) == 4
+    assert len(evicted) == 6
+    assert evicted[0].event == "START_MISSION"
+    assert [e["timestamp"] for e in fsm.history] == sorted(e["timestamp"] for e in fsm.history)
+
+
+def test_compiled_matches_dict_fsm():
+    plain = FiniteStateMachine(initial_state="IDLE", transitions=TRANSITIONS)
+    compiled = CompiledStateMachine(initial_state="IDLE", transitions=TRANSITIONS)
+    events = ["START_MISSION", "CHARGE", "OBSTACLE_DETECTED", "UNKNOWN_EVENT", "OBSTACLE_CLEARED", "END_MISSION", "CHARGE"]
+    for event in events:
+        assert compiled.trigger_event(event) == plain.trigger_event(event)
+        assert compiled.get_current_state() == plain.get_current_state()
+        assert sorted(compiled.get_possible_transitions()) == sorted(plain.get_possible_transitions())
+
+    exported, expected = compiled.export_state(), plain.export_state()
+    assert exported.keys() == expected.keys()
+    assert [(h["from_state"], h["to_state"], h["event"]) for h in exported["history"]] == \
+        [(h["from_state"], h["to_state"], h["event"]) for h in expected["history"]]
+    assert exported["state_register"].keys() == expected["state_register"].keys()
+    assert exported["state_register"]["CHARGING"]["triggered_by"] == "CHARGE"
+
+
+def test_compiled_state_round_trip():
+    fsm = CompiledStateMachine(initial_state="IDLE", transitions=TRANSITIONS)
+    assert fsm.trigger_event("START_MISSION", {"source": "test"})
+
+    # State exported by either class loads into the other
+    plain = FiniteStateMachine()
+    plain.load_state(fsm.export_state())
+    assert plain.trigger_event("OBSTACLE_DETECTED")
+    restored = CompiledStateMachine()
+    restored.load_state(plain.export_state())
+    assert restored.get_current_state() == "AVOIDING"
+    assert restored.last_event == "OBSTACLE_DETECTED"
+    assert [h["event"] for h in restored.history] == ["START_MISSION", "OBSTACLE_DETECTED"]
+    assert restored.trigger_event("OBSTACLE_CLEARED")
+
+
+def test_compiled_unknown_initial_state():
+    fsm = CompiledStateMachine()
+    assert fsm.get_current_state() == "UNKNOWN"
+    assert not fsm.trigger_event("START_MISSION")
+    assert fsm.get_possible_transitions() == []
@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+
+# Add the project root to the sys.path so core modules can be imported
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+import pytest
+
+import core.fsm_interface as fsm_interface_module
+from core.fsm_client import FSMClient
+from core.fsm_core import HISTORY_SIZE
+from core.fsm_history_log import FSMHistoryLog
+from core.fsm_interface import FSMInterface
+
+
+@pytest.fixture
+def interface(tmp_path, monkeypatch):
+    """FSMInterface on a temporary state file, with logging captured."""
+    logged = []
+    monkeypatch.setattr(fsm_interface_module, "log_transitions", logged.extend)
+    monkeypatch.setattr(FSMClient, "log_error", lambda self, msg: None)
+    monkeypatch.setattr(FSMClient, "log_transition", lambda self, *args: logged.append(args))
+    iface = FSMInterface(
+        fsm_state_file=str(tmp_path / "fsm_state.json"),
+        history_file=str(tmp_path / "logs" / "fsm_history.jsonl"),
+    )
+    iface.logged = logged
+    return iface
+
+
+def test_batch_is_persisted_once(interface, monkeypatch):
+    saves = []
+    original_save = FSMClient.save_state
+    monkeypatch.setattr(FSMClient, "save_state", lambda self: (saves.append(1), original_save(self)))
+
+    events = [("START_MISSION", None), ("PAUSE_MISSION", None)] * 25
+    results = interface.apply_events(events)
+
+    assert results == [True] * 50
+    assert len(saves) == 1
+    assert len(interface.logged) == 50
+    with open(interface.fsm_state_file) as f:
+        state = json.load(f)
+    assert state["state"] == "IDLE"
+    assert len(state["context"]["history"]) == 50
+
+
+def test_rejected_events_do_not_write(interface, monkeypatch):
+    saves = []
+    monkeypatch.setattr(FSMClient, "save_state", lambda self: saves.append(1))
+
+    assert interface.apply_events([("CHARGE_COMPLETE", None), ("RESET", None)]) == [False, False]
+    assert saves == []
+    assert interface.logged == []
+
+
+def test_state_survives_restart(interface):
+    assert interface.trigger_event("START_MISSION", {"source": "test"})
+    assert interface.trigger_event("OBSTACLE_DETECTED")
+
+    restarted = FSMInterface(fsm_state_file=interface.fsm_state_file, history_file=interface.history_log.path)
+    assert restarted.fsm.get_current_state() == "AVOIDING"
+    assert restarted.trigger_event("OBSTACLE_CLEARED")
+
+
+def test_history_spills_to_log(interface):
+    events = [("START_MISSION", None), ("PAUSE_MISSION", None)] * HISTORY_SIZE
+    interface.apply_events(events)
+
+    with open(interface.fsm_state_file) as f:
+        exported = json.load(f)["context"]["history"]
+    assert len(exported) == HISTORY_SIZE
+    archived = interface.history_log.query()
+    assert len(archived) == len(events) - HISTORY_SIZE
+    assert archived[-1]["timestamp"] <= exported[0]["timestamp"]
+
+    full = interface.get_history()
+    assert len(full) == len(events)
+    assert [e["event"] for e in full[:2]] == ["START_MISSION", "PAUSE_MISSION"]
+
+
+def test_history_log_rotation_and_query(tmp_path):
+    history = FSMHistoryLog(str(tmp_path / "fsm_history.jsonl"), max_bytes=2048, backup_count=3)
+    for i in range(200):
+        history.append({"timestamp": float(i), "from_state": "IDLE", "to_state": "CHARGING", "event": "CHARGE", "meta": None})
+
+    assert len(history.files()) == 4
+    window = history.query(150.0, 159.0)
+    assert [e["timestamp"] for e in window] == [float(i) for i in range(150, 160)]
+    # The oldest records were rotated out of the retained files
+    assert history.query()[0]["timestamp"] > 0
@@ -0,0 +1,35 @@
+import logging
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core import fsm_logger
+from core.fsm_logger import BatchFileHandler, log_transitions
+
+
+def test_batched_transitions_go_through_the_handler_api(tmp_path, monkeypatch, caplog):
+    path = tmp_path / "fsm_log.txt"
+    handler = BatchFileHandler(str(path), delay=True)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    handler.addFilter(lambda record: "source=noise" not in record.getMessage())
+    monkeypatch.setattr(fsm_logger.logger, "handlers", [handler])
+
+    writes = []
+    with caplog.at_level(logging.INFO, logger="fsm_logger"):
+        log_transitions([
+            ({"state": "IDLE"}, {"state": "CHARGING"}, "CHARGE", "auto_controller"),
+            ({"state": "CHARGING"}, {"state": "IDLE"}, "CHARGE_COMPLETE", "noise"),
+            ({"state": "IDLE"}, {"state": "MISSION_ACTIVE"}, "START_MISSION", "cli"),
+        ])
+        original_write = handler.stream.write
+        handler.stream.write = lambda text: writes.append(text) or original_write(text)
+        log_transitions([({"state": "MISSION_ACTIVE"}, {"state": "IDLE"}, "END_MISSION", "cli")] * 3)
+    handler.close()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 5 and all(line.startswith("INFO ") for line in lines)  # filtered, formatted
+    assert lines[0].startswith("INFO IDLE -> CHARGING | trigger=CHARGE")
+    assert len(writes) == 1  # one write per batch
+    assert len(caplog.records) == 6  # propagated like logger.info
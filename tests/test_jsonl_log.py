@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from utils.jsonl_log import AsyncJsonlWriter
+
+
+def _read_records(path):
+    records = []
+    for name in sorted(os.listdir(os.path.dirname(path)), reverse=True):
+        with open(os.path.join(os.path.dirname(path), name)) as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+def test_records_written_in_order_with_rotation(tmp_path):
+    path = str(tmp_path / "rules_log.jsonl")
+    writer = AsyncJsonlWriter(path, max_bytes=1024, backup_count=50)
+    for i in range(300):
+        assert writer.write({"rule": "Low", "seq": i})
+    writer.flush()
+
+    stats = writer.stats()
+    assert stats["written"] == 300 and stats["dropped"] == 0
+    assert stats["rotations"] > 0
+    assert os.path.exists(path + ".1")
+    # Oldest rotated file first (path.N ... path.1, then path)
+    files = [path + f".{i}" for i in range(stats["rotations"], 0, -1)] + [path]
+    seqs = []
+    for name in files:
+        if os.path.exists(name):
+            with open(name) as f:
+                seqs.extend(json.loads(line)["seq"] for line in f)
+    assert seqs == list(range(300))
+    writer.close()
+
+
+def test_overflow_drops_and_counts(tmp_path, monkeypatch):
+    path = str(tmp_path / "rules_log.jsonl")
+    release = threading.Event()
+    writer = AsyncJsonlWriter(path, buffer_size=10, batch_size=1)
+    original_append = writer._append
+    # Stall the disk so the buffer fills up
+    monkeypatch.setattr(writer, "_append", lambda lines: (release.wait(5), original_append(lines)))
+
+    results = [writer.write({"seq": i}) for i in range(50)]
+    assert not all(results)
+    dropped = results.count(False)
+    assert writer.stats()["dropped"] == dropped
+
+    release.set()
+    writer.close()
+    assert writer.stats()["written"] == results.count(True)
+    assert len(_read_records(path)) == results.count(True)
+    assert writer.write({"seq": "late"}) is False
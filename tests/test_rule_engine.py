@@ -2,6 +2,8 @@ import os
 import sys
 import json
 
+import pytest
+
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(PROJECT_ROOT)
 
@@ -37,3 +39,207 @@ def test_rule_evaluate(tmp_path):
     triggered = engine.evaluate({"battery_percent": 40}, "idle")
     assert triggered and triggered[0]["action"] == "charge"
 
+
+
+def test_compiled_conditions():
+    from core.rule_compiler import compile_condition
+
+    context = {
+        "telemetry": {"battery_percent": 40.0, "velocity": 0},
+        "sensors": {"thermal": {"core_temp": {"cpu": 90.5}}, "navigation": {"star_tracker": {"is_locked": True}}},
+        "fsm": {"state": "idle"},
+    }
+    cases = {
+        "telemetry.battery_percent < 50": True,
+        "telemetry.battery_percent >= 40 and fsm.state == 'idle'": True,
+        "fsm.state == idle": True,
+        "fsm.state == 'moving' or telemetry.velocity == 0 and telemetry.battery_percent > 90": False,
+        "(fsm.state == 'moving' or telemetry.velocity == 0) and telemetry.battery_percent < 90": True,
+        "not fsm.state == 'error'": True,
+        "sensors.thermal.core_temp.cpu > 85": True,
+        "sensors.navigation.star_tracker.is_locked == true": True,
+        "sensors.thermal.missing.cpu > 1": False,
+        "fsm.state > 5": False,
+        "sensors.thermal > 1": False,
+    }
+    for condition, expected in cases.items():
+        assert compile_condition(condition)(context) is expected, condition
+
+
+def test_invalid_condition_is_skipped(tmp_path):
+    from core.rule_compiler import RuleSyntaxError, compile_condition
+
+    for condition in ["telemetry.battery_percent <", "(fsm.state == 'idle'", "and fsm.state == 'idle'", "50 < telemetry.x"]:
+        with pytest.raises(RuleSyntaxError):
+            compile_condition(condition)
+
+    rules_path = tmp_path / "rules.json"
+    with open(rules_path, "w") as f:
+        json.dump([
+            {"name": "Broken", "condition": "telemetry.battery_percent <", "action": "charge", "priority": 1},
+            {"name": "Low", "condition": "telemetry.battery_percent < 50", "action": "charge", "priority": 2},
+        ], f)
+    engine = RuleEngine(rule_path=str(rules_path))
+    assert [r["name"] for r in engine.evaluate({"battery_percent": 10}, "idle")] == ["Low"]
+    assert engine.check_condition("telemetry.battery_percent <", {"telemetry": {"battery_percent": 1}}) is False
+
+
+def test_incremental_matcher():
+    from core.rule_matcher import RuleMatcher
+
+    rules = [
+        {"name": "Hot", "condition": "sensors.cpu > 80"},
+        {"name": "HotAndMoving", "condition": "sensors.cpu > 80 and telemetry.velocity > 0"},
+        {"name": "NotIdle", "condition": "not fsm.state == 'idle'"},
+        {"name": "Slow", "condition": "telemetry.velocity == 0 or telemetry.missing > 1"},
+    ]
+    matcher = RuleMatcher(rules)
+    # "sensors.cpu > 80" is shared by two rules
+    assert matcher.node_count == 8
+
+    context = {"sensors": {"cpu": 50.0}, "telemetry": {"velocity": 0}, "fsm": {"state": "idle"}}
+    assert [r["name"] for r in matcher.update(context)] == ["Slow"]
+
+    # Only the velocity comparisons and their parents are re-evaluated
+    context = {"sensors": {"cpu": 50.0}, "telemetry": {"velocity": 1.5}, "fsm": {"state": "idle"}}
+    assert matcher.update(context) == []
+    assert matcher.last_evaluated == 4
+
+    context = {"sensors": {"cpu": 95.0}, "telemetry": {"velocity": 1.5}, "fsm": {"state": "moving"}}
+    assert [r["name"] for r in matcher.update(context)] == ["Hot", "HotAndMoving", "NotIdle"]
+
+    matcher.update(context)
+    assert matcher.last_evaluated == 0
+
+    # Same answers as evaluating every compiled condition from scratch
+    from core.rule_compiler import compile_condition
+    context = {"sensors": {}, "telemetry": {"velocity": 0}, "fsm": {"state": "idle"}}
+    expected = [r for r in rules if compile_condition(r["condition"])(context)]
+    assert matcher.update(context) == expected
+
+
+def test_backtest_matches_evaluate(tmp_path):
+    import random
+
+    from core.rule_backtest import condition_paths, frames_from_contexts
+
+    rules = [
+        {"name": "HighTemperature", "condition": "sensors.thermal.cpu > 85", "action": "error", "priority": 1},
+        {"name": "LowBattery", "condition": "telemetry.battery_percent < 20", "action": "charge", "priority": 10},
+        {"name": "Charged", "condition": "telemetry.battery_percent > 95 and fsm.state == 'charging'", "action": "idle", "priority": 20},
+        {"name": "Move", "condition": "fsm.state == 'idle' and (telemetry.battery_percent > 30 or not sensors.thermal.cpu < 10)", "action": "start_move", "priority": 30},
+    ]
+    rules_path = tmp_path / "rules.json"
+    with open(rules_path, "w") as f:
+        json.dump(rules, f)
+    engine = RuleEngine(rule_path=str(rules_path))
+
+    rng = random.Random(3)
+    contexts = []
+    for _ in range(300):
+        sensors = {"thermal": {"cpu": rng.uniform(0, 100)}} if rng.random() > 0.1 else {}
+        contexts.append({
+            "telemetry": {"battery_percent": rng.uniform(0, 100)},
+            "sensors": sensors,
+            "fsm": {"state": rng.choice(["idle", "charging", "moving"])},
+        })
+    frames = frames_from_contexts(contexts, condition_paths(r["condition"] for r in rules))
+    result = engine.backtest(frames)
+
+    assert result.fired.shape == (4, 300)
+    actions = result.winning_actions()
+    for i, context in enumerate(contexts):
+        triggered = engine.evaluate(context["telemetry"], context["fsm"]["state"], context["sensors"])
+        assert [r["name"] for r in triggered] == [n for n, fired in zip(result.names, result.fired[:, i]) if fired]
+        assert actions[i] == (triggered[0]["action"] if triggered else None)
+    assert sum(result.fire_counts().values()) == int(result.fired.sum())
+
+
+def test_rules_hot_reload(tmp_path):
+    import time
+
+    rules_path = tmp_path / "rules.json"
+    low = {"name": "Low", "condition": "telemetry.battery_percent < 50", "action": "charge", "priority": 1}
+    with open(rules_path, "w") as f:
+        json.dump([low], f)
+    engine = RuleEngine(rule_path=str(rules_path))
+    engine.start_rule_watcher(mode="poll", interval=0.02)
+    try:
+        def write_and_wait(content, key):
+            before = engine.reload_stats[key]
+            temp_path = str(rules_path) + ".tmp"
+            with open(temp_path, "w") as f:
+                f.write(content)
+            os.replace(temp_path, rules_path)
+            deadline = time.time() + 5
+            while engine.reload_stats[key] == before and time.time() < deadline:
+                time.sleep(0.01)
+            assert engine.reload_stats[key] == before + 1
+
+        high = {"name": "High", "condition": "telemetry.battery_percent > 90", "action": "stop", "priority": 0}
+        write_and_wait(json.dumps([low, high]), "reloads")
+        assert engine.reload_stats["rule_count"] == 2
+        # Staged rule sets are swapped in at the start of the next cycle
+        assert [r["name"] for r in engine.evaluate({"battery_percent": 95}, "idle")] == ["High"]
+        assert [r["name"] for r in engine.rules] == ["High", "Low"]
+
+        # Broken files are rejected and the last good set stays active
+        write_and_wait("[{\"name\": \"Bad\"", "failures")
+        write_and_wait(json.dumps([{"name": "Bad", "condition": "telemetry.x <", "action": "a"}]), "failures")
+        assert "telemetry.x" in engine.reload_stats["last_error"]
+        assert [r["name"] for r in engine.evaluate({"battery_percent": 10}, "idle")] == ["Low"]
+        assert len(engine.rules) == 2
+    finally:
+        engine.stop_rule_watcher()
+
+
+def test_rule_fire_logs_only_the_inputs_it_read(tmp_path):
+    from utils.jsonl_log import AsyncJsonlWriter
+
+    rules_path = tmp_path / "rules.json"
+    rule = {"name": "HotIdle", "condition": "sensors.thermal.cpu > 80 and not fsm.state == 'error'",
+            "action": "error", "priority": 1}
+    with open(rules_path, "w") as f:
+        json.dump([rule], f)
+    engine = RuleEngine(rule_path=str(rules_path))
+    engine.rule_log = AsyncJsonlWriter(str(tmp_path / "rules_log.jsonl"))
+
+    telemetry = {"battery_percent": 50.0, "velocity": 1.0, "history": list(range(100))}
+    assert engine.run_once(telemetry=telemetry, sensors={"thermal": {"cpu": 90.0}}, fsm_state="idle") == "error"
+    engine.rule_log.flush()
+    with open(tmp_path / "rules_log.jsonl") as f:
+        record = json.loads(f.readline())
+    assert record["rule"] == "HotIdle" and record["event"] == "error" and record["source"] == "rule_engine"
+    assert record["value"] == {"sensors.thermal.cpu": 90.0, "fsm.state": "idle"}
+    engine.rule_log.close()
+
+
+def test_held_condition_sends_its_event_once(tmp_path):
+    from core.auto_controller import EventLatch
+    from utils.jsonl_log import AsyncJsonlWriter
+
+    rules_path = tmp_path / "rules.json"
+    rule = {"name": "Low", "condition": "telemetry.battery_percent < 20", "action": "charge", "priority": 1}
+    with open(rules_path, "w") as f:
+        json.dump([rule], f)
+    engine = RuleEngine(rule_path=str(rules_path))
+    engine.rule_log = AsyncJsonlWriter(str(tmp_path / "rules_log.jsonl"))
+    latch = EventLatch(resend_interval=2.0)
+
+    # 20 cycles a second, as on every proximity delta; the battery recovers at 1.0 s and drops again
+    sent = []
+    for i in range(60):
+        battery = 50.0 if 20 <= i < 25 else 15.0
+        event = latch.update(engine.run_once(telemetry={"battery_percent": battery}, sensors={},
+                                             fsm_state="idle"), now=i * 0.05)
+        if event:
+            sent.append((i, event))
+    assert sent == [(0, "charge"), (25, "charge")]
+
+    sent = [i for i in range(60, 120) if latch.update("charge", now=i * 0.05)]
+    assert sent == [65, 105]  # a held event is repeated every resend_interval, not every cycle
+
+    engine.rule_log.flush()
+    with open(tmp_path / "rules_log.jsonl") as f:
+        assert len(f.readlines()) == 2  # logged when the rule starts firing
+    engine.rule_log.close()
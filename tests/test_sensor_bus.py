@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+import sensors.sensor_bus as sensor_bus_module
+from core.sensor_delta import SensorDeltaWriter, SensorReplica
+from sensors.clusters.base_cluster import BaseSensorCluster
+from sensors.sensor_bus import SensorBus
+
+
+class CountingCluster(BaseSensorCluster):
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__(cluster_name=name)
+        self.delay = delay
+        self.fail = fail
+        self.data["count"] = 0
+
+    def update(self):
+        if self.fail:
+            raise RuntimeError("driver offline")
+        time.sleep(self.delay)
+        self.data["count"] += 1
+
+
+class RecordingStore:
+    def __init__(self):
+        self.writes = []
+        self.lock = threading.Lock()
+
+    def write(self, topic, data):
+        with self.lock:
+            self.writes.append((time.monotonic(), topic, data))
+
+
+def test_clusters_run_at_their_own_cadence(tmp_path, monkeypatch):
+    monkeypatch.setattr(sensor_bus_module, "SENSOR_LOG_FILE", str(tmp_path / "sensor_log.txt"))
+    store = RecordingStore()
+    bus = SensorBus(
+        clusters={"fast": CountingCluster("Fast"), "slow": CountingCluster("Slow"),
+                  "hung": CountingCluster("Hung", delay=0.5), "broken": CountingCluster("Broken", fail=True)},
+        store=store,
+        intervals={"fast": 0.02, "slow": 0.25, "hung": 0.02, "broken": 0.1},
+        timeouts={"hung": 0.1},
+        deltas=SensorDeltaWriter(str(tmp_path / "sensor_deltas.jsonl")),
+    )
+    replica = SensorReplica(str(tmp_path / "sensor_deltas.jsonl"))
+    bus.run(duration=0.6)
+
+    stats = bus.stats
+    assert stats["fast"]["updates"] >= 15        # ~30 slots; not held up by "hung"
+    assert 2 <= stats["slow"]["updates"] <= 4    # t = 0, 0.25, 0.5
+    assert stats["hung"]["updates"] == 1 and stats["hung"]["timeouts"] >= 1
+    assert stats["hung"]["skipped"] > 0
+    assert stats["broken"]["failures"] == stats["broken"]["updates"] > 0
+    assert bus.latency["hung"].max_ms >= 500
+
+    # Deltas go out as updates finish; full snapshots only once per second
+    # (the first publish and the final one when the bus stops)
+    assert bus.publishes >= stats["fast"]["updates"]
+    assert len(store.writes) == 2
+    assert bus.deltas.stats["deltas"] >= stats["fast"]["updates"] - 1
+    assert replica.poll() and replica.data == store.writes[-1][2]
+    last = store.writes[-1][2]
+    assert last["fast"]["count"] == stats["fast"]["updates"]
+    assert last["broken"]["status"] == "ERROR"
+    assert "Update failed: driver offline" in last["broken"]["errors"][0]
+    assert stats["hung"]["timeouts"] and bus.snapshots["hung"]["count"] == 1
+    assert "fast" in bus.stats_report()
+
+
+class FailingStore(RecordingStore):
+    def write(self, topic, data):
+        raise OSError("No space left on device")
+
+
+def test_failed_publish_does_not_stop_the_bus(tmp_path, monkeypatch):
+    log_path = tmp_path / "sensor_log.txt"
+    monkeypatch.setattr(sensor_bus_module, "SENSOR_LOG_FILE", str(log_path))
+    bus = SensorBus(
+        clusters={"fast": CountingCluster("Fast")},
+        store=FailingStore(),
+        intervals={"fast": 0.02},
+        deltas=SensorDeltaWriter(str(tmp_path / "sensor_deltas.jsonl")),
+        snapshot_interval=0.1,
+    )
+    bus.run(duration=0.4)
+
+    assert bus.stats["fast"]["updates"] >= 10  # kept scheduling after the first failure
+    assert bus.publish_failures >= 3           # every due snapshot failed, incl. the final one
+    assert bus.publishes >= bus.stats["fast"]["updates"] - bus.publish_failures
+    assert log_path.read_text().count("CRITICAL RUNTIME ERROR while publishing") == 1  # repeats are counted
+    assert "failed: " in bus.stats_report()
+
+
+def test_idle_scheduler_sleeps_between_slots(tmp_path, monkeypatch):
+    monkeypatch.setattr(sensor_bus_module, "SENSOR_LOG_FILE", str(tmp_path / "sensor_log.txt"))
+    bus = SensorBus(
+        clusters={"a": CountingCluster("A"), "b": CountingCluster("B")},
+        store=RecordingStore(),
+        intervals={"a": 0.3, "b": 0.3},
+        deltas=SensorDeltaWriter(str(tmp_path / "sensor_deltas.jsonl")),
+    )
+    cpu = time.thread_time()
+    hung = bus.run(duration=1.0)  # The loop runs on this thread; updates run on the pool
+
+    assert time.thread_time() - cpu < 0.2  # a busy wait burns ~1 s here
+    assert bus.stats["a"]["updates"] >= 3 and hung == []
+
+
+def test_run_reports_updates_still_hung(tmp_path, monkeypatch):
+    monkeypatch.setattr(sensor_bus_module, "SENSOR_LOG_FILE", str(tmp_path / "sensor_log.txt"))
+    bus = SensorBus(
+        clusters={"hung": CountingCluster("Hung", delay=0.5), "fast": CountingCluster("Fast")},
+        store=RecordingStore(),
+        intervals={"hung": 1.0, "fast": 0.05},
+        deltas=SensorDeltaWriter(str(tmp_path / "sensor_deltas.jsonl")),
+    )
+    assert bus.run(duration=0.2) == ["hung"]
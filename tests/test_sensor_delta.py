@@ -0,0 +1,91 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.sensor_delta import SensorDeltaWriter, SensorReplica, apply_changes, diff
+from utils.frozen import FrozenDict, freeze
+
+
+def test_diff_and_apply_share_unchanged_subtrees():
+    old = freeze({"power": {"battery_main": {"soc": 74.9, "voltage": 12.5}, "status": "OK"},
+                  "thermal": {"core_temp": {"cpu": 44.1}}, "ew": {"jamming": False}})
+    new = {"power": {"battery_main": {"soc": 74.8, "voltage": 12.5}, "status": "OK"},
+           "thermal": old["thermal"], "ew": {"jamming": 0, "threats": [1, 2]}}
+    sets, deleted = diff(old, new)
+    assert sorted(sets) == [(("ew", "jamming"), 0), (("ew", "threats"), [1, 2]),
+                            (("power", "battery_main", "soc"), 74.8)]
+    assert deleted == []
+    assert diff(new, {"power": new["power"]}) == ([], [("thermal",), ("ew",)])
+
+    result = apply_changes(old, sets, [("power", "status")])
+    assert isinstance(result, FrozenDict) and isinstance(result["power"]["battery_main"], FrozenDict)
+    assert result["power"] == {"battery_main": {"soc": 74.8, "voltage": 12.5}}
+    assert result["thermal"] is old["thermal"]
+    assert old["power"]["battery_main"]["soc"] == 74.9  # the input is untouched
+
+
+def test_replica_follows_deltas_keyframes_and_rotation(tmp_path):
+    path = str(tmp_path / "sensor_deltas.jsonl")
+    writer = SensorDeltaWriter(path, keyframe_interval=3, max_bytes=300)
+    replica = SensorReplica(path)
+    assert replica.poll() is False and replica.data == {}
+
+    tree = {"proximity": freeze({"min_distance": 999}), "power": freeze({"soc": 80.0})}
+    assert writer.publish(tree) == 1                      # keyframe
+    assert writer.publish(dict(tree)) is None             # nothing changed
+    for i in range(10):
+        tree = {**tree, "proximity": freeze({"min_distance": 50 + i})}
+        writer.publish(tree)
+        if i == 4:
+            assert replica.poll()
+            assert replica.data == tree and replica.seq == writer.seq
+            power = replica.data["power"]
+    assert writer.stats["keyframes"] >= 3 and writer.stats["deltas"] >= 6
+
+    # The log outgrew max_bytes, so a keyframe started a new file
+    assert replica.poll()
+    assert replica.data == tree and replica.stats["reopens"] == 2
+    assert replica.data["power"] == power
+
+    # A late joiner starts from the keyframe at the head of the file
+    late = SensorReplica(path)
+    assert late.poll() and late.data == tree
+
+    # A torn last line is kept until it is complete
+    with open(path, "ab") as f:
+        f.write(b'{"seq": %d, "ts": 0, "set": [[["power", "soc"], 79.5]]' % (writer.seq + 1))
+    assert replica.poll() is False
+    with open(path, "ab") as f:
+        f.write(b"}\n")
+    assert replica.poll() and replica.data["power"]["soc"] == 79.5
+
+    # A gap is skipped until the next keyframe
+    with open(path, "ab") as f:
+        f.write(b'{"seq": %d, "ts": 0, "set": [[["power", "soc"], 1.0]]}\n' % (writer.seq + 5))
+    assert replica.poll() is False and not replica.synced and replica.stats["gaps"] == 1
+    replica.close()
+    late.close()
+
+
+def test_replica_resyncs_after_a_corrupt_record(tmp_path):
+    path = str(tmp_path / "sensor_deltas.jsonl")
+    writer = SensorDeltaWriter(path, keyframe_interval=3)
+    replica = SensorReplica(path)
+    writer.publish({"power": {"soc": 80.0}})
+    assert replica.poll() and replica.synced
+
+    with open(path, "ab") as f:
+        f.write(b'{"seq": 2, "ts": 0, "set": [[["power", "soc"], 7\x00\n')
+        f.write(b'{"ts": 0}\n')
+    writer.seq += 1  # the corrupt record took a sequence number
+    writer.publish({"power": {"soc": 79.0}})
+    assert replica.poll() is False
+    assert not replica.synced and replica.stats["corrupt"] == 2
+    assert replica.data["power"]["soc"] == 80.0
+
+    for soc in (78.0, 77.0, 76.0):  # the third publish is the next keyframe
+        writer.publish({"power": {"soc": soc}})
+    assert replica.poll() and replica.synced and replica.data["power"]["soc"] == 76.0
+    replica.close()
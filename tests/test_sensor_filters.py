@@ -0,0 +1,71 @@
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.sensor_filters import SensorFilterStage
+from core.sensor_preprocessor import SensorPreprocessor
+from utils.frozen import FrozenDict, freeze
+
+SPECS = [
+    {"field": "nav.gyro.yaw", "type": "ema", "alpha": 0.5},
+    {"field": "nav.temp", "type": "kalman", "process_var": 0.001, "measurement_var": 4.0},
+    {"field": "prox.min_distance", "type": "median", "window": 3},
+]
+
+
+def nav(yaw, temp=20.0):
+    return freeze({"status": "OK", "errors": [], "gyro": {"yaw": yaw}, "temp": temp, "imu": {"x": 1.0}})
+
+
+def test_filters_keep_state_across_snapshots():
+    stage = SensorFilterStage(SPECS)
+    first = nav(10.0)
+    assert stage.apply("nav", first)["gyro"]["yaw"] == 10.0
+    second = stage.apply("nav", nav(20.0))
+    assert second["gyro"]["yaw"] == 15.0 and isinstance(second, FrozenDict)
+    assert stage.apply("nav", nav(None))["gyro"]["yaw"] is None  # missing passes through
+    assert stage.apply("nav", nav(15.0))["gyro"]["yaw"] == 15.0   # state unchanged by the gap
+
+    distances = [999.0, 999.0, 40.0, 999.0, 30.0, 31.0, 29.0]
+    out = [stage.apply("prox", freeze({"min_distance": d}))["min_distance"] for d in distances]
+    assert out == [999.0, 999.0, 999.0, 999.0, 40.0, 31.0, 30.0]  # the single spike is dropped
+
+    random.seed(3)
+    raw = [20.0 + random.gauss(0, 2.0) for _ in range(300)]
+    smooth = [stage.apply("nav", nav(0.0, t))["temp"] for t in raw]
+    assert np.std(smooth[100:]) < np.std(raw[100:]) / 3
+    assert abs(np.mean(smooth[100:]) - 20.0) < 0.5
+
+    snapshot = nav(1.0)
+    assert stage.apply("nav", snapshot)["imu"] is snapshot["imu"]  # untouched subtrees are shared
+    assert stage.apply("power", snapshot) is snapshot
+
+
+def test_invalid_specs_and_frame_filtering():
+    with pytest.raises(ValueError):
+        SensorFilterStage([{"field": "nav.yaw", "type": "lowpass"}])
+    with pytest.raises(ValueError):
+        SensorFilterStage([{"field": "nav.q.0", "type": "ema"}])
+    assert not SensorFilterStage([])
+
+    stage = SensorFilterStage(SPECS)
+    frames = [{"nav": {"status": "OK", "errors": [], "gyro": {"yaw": yaw}}} for yaw in (0.0, 8.0)]
+    config = {"expected_clusters": ["nav"], "ranges": []}
+    for frame in frames:
+        proc = SensorPreprocessor(frame, config=config, filters=stage)
+        proc.normalize()
+    assert proc.get_clean_data()["nav"]["gyro"]["yaw"] == 4.0
+    assert frames[1]["nav"]["gyro"]["yaw"] == 8.0
+
+
+def test_median_ignores_missing_readings():
+    stage = SensorFilterStage(SPECS)
+    out = [stage.apply("prox", freeze({"min_distance": d}))["min_distance"]
+           for d in (None, 5.0, 6.0, None, 100.0, 7.0)]
+    assert out == [None, 5.0, 5.5, None, 6.0, 7.0]
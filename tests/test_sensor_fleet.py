@@ -0,0 +1,59 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from sensors.clusters.power import PowerCluster
+from sensors.sensor_bus import CLUSTER_CLASSES
+from simulation.sensor_fleet import SensorFleet, fleet_topics, open_fleet_store
+
+
+def run(bots, seed, steps):
+    fleet = SensorFleet(bots, seed=seed)
+    for _ in range(steps):
+        fleet.step()
+    return fleet
+
+
+def test_same_seed_same_run():
+    a, b = run(20, seed=7, steps=40), run(20, seed=7, steps=40)
+    assert a.digest() == b.digest()
+    assert a.frame(13) == b.frame(13)
+    assert run(20, seed=8, steps=40).digest() != a.digest()
+    assert a.frame(0) != a.frame(1)  # bots draw their own readings
+
+    first, second = PowerCluster(seed=3), PowerCluster(seed=3)
+    for cluster in (first, second):
+        for _ in range(5):
+            cluster.update()
+    assert first.serialize() == second.serialize()
+
+
+def test_cadence_and_frame_shape():
+    fleet = SensorFleet(5, seed=1)
+    assert set(fleet.step()) == set(CLUSTER_CLASSES)  # everything at t = 0
+    updated = [fleet.step() for _ in range(20)]  # up to t = 1.0 s
+    assert sum("proximity" in names for names in updated) == 20
+    assert sum("power" in names for names in updated) == 1
+    assert not any("environment" in names for names in updated)
+
+    frame = fleet.frame(4)
+    single = {name: cls() for name, cls in CLUSTER_CLASSES.items()}
+    for name, cluster in single.items():
+        cluster.update()
+        cluster.validate()
+        expected = cluster.serialize()
+        assert list(frame[name]) == list(expected)
+        for key, value in expected.items():
+            if isinstance(value, dict):
+                assert set(frame[name][key]) == set(value), (name, key)
+
+
+def test_publishes_one_topic_per_bot(tmp_path):
+    fleet = run(3, seed=2, steps=2)
+    topics = fleet_topics(3)
+    store = open_fleet_store(topics, backend="json", location=str(tmp_path))
+    fleet.publish(store, topics)
+    assert topics[2] == "sensors.bot002"
+    assert store.read("sensors.bot002")["power"] == fleet.frame(2)["power"]
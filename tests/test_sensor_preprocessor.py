@@ -1,10 +1,14 @@
+import json
 import os
 import sys
 
+import numpy as np
+
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(PROJECT_ROOT)
 
-from core.sensor_preprocessor import SensorPreprocessor
+from core.sensor_preprocessor import RangeTable, SensorPreprocessor, load_config
+from sensors.clusters.power import PowerCluster
 
 
 def test_collect_statuses():
@@ -15,3 +19,44 @@ def test_collect_statuses():
     proc = SensorPreprocessor(raw)
     statuses = proc.collect_statuses()
     assert statuses == {"cluster1": "OK", "cluster2": "ERROR"}
+
+
+def test_ranges_from_config_filter_frames_and_batches(tmp_path):
+    path = tmp_path / "ranges.json"
+    path.write_text(json.dumps({
+        "expected_clusters": ["thermal"],
+        "ranges": [
+            {"field": "thermal.core_temp.cpu", "min": -50, "max": 150},
+            {"field": "thermal.fans.0", "max": 5000, "action": "flag"},
+        ],
+    }))
+    config = load_config(str(path))
+    table = RangeTable.from_config(config)
+    frame = {"thermal": {"status": "OK", "errors": [], "core_temp": {"cpu": 200.0}, "fans": [6000, 100]}}
+
+    proc = SensorPreprocessor(frame, config=config)
+    assert proc.filter_noise().tolist() == [True, True]
+    clean = proc.get_clean_data()
+    assert clean["thermal"]["core_temp"]["cpu"] is None
+    assert clean["thermal"]["fans"] == [6000, 100]  # flagged, not filtered
+    assert frame["thermal"]["core_temp"]["cpu"] == 200.0
+    assert [v.field for v in proc.range_errors] == ["thermal.core_temp.cpu", "thermal.fans.0"]
+    assert proc.validate() == []
+
+    batch = table.stack([frame, {"thermal": {"core_temp": {"cpu": 40.0}}}, {}])
+    mask, violations = table.check(batch)
+    assert mask.tolist() == [[True, True], [False, False], [False, False]]  # missing readings are NaN
+    assert {v.row for v in violations} == {0}
+
+    columns = {"sensors.thermal.core_temp.cpu": np.array([20.0, -60.0, 30.0])}
+    mask, violations = table.check(table.from_columns(columns, "sensors."))
+    assert mask[:, 0].tolist() == [False, True, False]
+    assert str(violations[0]) == "thermal.core_temp.cpu out of range (-60 not in [-50, 150])"
+
+
+def test_ranges_from_cluster_schemas():
+    table = RangeTable.from_schemas({"power": PowerCluster.SCHEMA})
+    assert "power.battery_main.soc" in table.columns
+    power = PowerCluster()
+    mask, violations = table.check(table.vector({"power": power.serialize()}))
+    assert not mask.any() and not violations
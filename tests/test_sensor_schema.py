@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from sensors.clusters.navigation import NavigationCluster, PITCH_RATE
+from sensors.clusters.rlsm import RLSMCluster
+from sensors.clusters.schema import ClusterSchema, Extra, Field
+
+SCHEMA = ClusterSchema([
+    Field("battery.voltage", "V", 0, 30, default=12.5),
+    Field("battery.cells", dtype="int", default=4),
+    Field("solar.is_charging", dtype="bool", default=True),
+    Extra("solar.mode", "auto"),
+    Field("imu.q", lo=-1, hi=1, default=(1, 0, 0, 0), size=4),
+])
+
+
+def test_layout_and_serialization():
+    values, extra = SCHEMA.new_values(), SCHEMA.new_extra()
+    assert SCHEMA.size == 7 and SCHEMA.index("imu.q") == 3
+    assert SCHEMA.slot_names[3:5] == ["imu.q.0", "imu.q.1"]
+    assert SCHEMA.to_dict(values, extra) == {
+        "battery": {"voltage": 12.5, "cells": 4},
+        "solar": {"is_charging": True, "mode": "auto"},
+        "imu": {"q": [1.0, 0.0, 0.0, 0.0]},
+    }
+    out = SCHEMA.to_dict(values, extra)
+    assert type(out["battery"]["cells"]) is int and type(out["solar"]["is_charging"]) is bool
+
+    view = SCHEMA.view(values)
+    values[SCHEMA.index("battery.voltage")] = 31.0
+    assert view[0] == 31.0  # shares memory
+    assert SCHEMA.violations(values) == [("battery.voltage", 31.0)]
+    assert SCHEMA.out_of_range([values, SCHEMA.new_values()]).sum(axis=1).tolist() == [1, 0]
+
+    with pytest.raises(ValueError):
+        ClusterSchema([Field("a.b"), Field("a.b.c")])
+
+
+def test_clusters_keep_their_snapshot_shape():
+    nav = NavigationCluster()
+    nav.update()
+    nav.validate()
+    snapshot = nav.serialize()
+    assert list(snapshot)[:3] == ["status", "last_update_timestamp", "errors"]
+    assert set(snapshot["gyroscope"]) == {"pitch_rate", "yaw_rate", "roll_rate"}
+    assert len(snapshot["imu"]["orientation_q"]) == 4
+    assert snapshot["imu"]["accel_z"] == nav.reading("imu.accel_z")
+
+    nav.values[PITCH_RATE] = 900.0
+    nav.validate()
+    assert nav.data["status"] in ("WARNING", "ERROR")
+    assert "Reading out of range: gyroscope.pitch_rate = 900" in nav.data["errors"]
+    assert snapshot["gyroscope"]["pitch_rate"] != 900.0  # snapshots are copies
+
+    rlsm = RLSMCluster()
+    for _ in range(50):
+        rlsm.update()
+        assert isinstance(rlsm.serialize()["spectrometer"]["composition"], dict)
+
+
+def test_number_fields_keep_whole_defaults_as_ints():
+    from sensors.clusters.proximity import ProximityCluster
+
+    prox = ProximityCluster(seed=3)
+    snapshot = prox.serialize()
+    assert type(snapshot["docking_sensors"]["front_distance"]) is int  # 999, as the dict cluster wrote it
+    assert NavigationCluster().serialize()["imu"]["orientation_q"] == [1, 0, 0, 0]
+    assert all(type(q) is int for q in NavigationCluster().serialize()["imu"]["orientation_q"])
+
+    seen = set()
+    for _ in range(200):
+        prox.update()
+        distance = prox.serialize()["collision_avoidance"]["min_distance"]
+        seen.add(type(distance))
+        assert type(distance) is (int if distance == 999 else float)
+    assert seen == {int, float}
@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.shared_json_cache import SharedJsonCache
+from core.file_watcher import inotify_available
+
+
+@pytest.fixture
+def make_cache():
+    """Builds fresh cache instances, bypassing the module-level singleton."""
+    saved = SharedJsonCache._instance
+    created = []
+
+    def _make(*args, **kwargs):
+        SharedJsonCache._instance = None
+        cache = SharedJsonCache(*args, **kwargs)
+        created.append(cache)
+        return cache
+
+    yield _make
+    for cache in created:
+        cache.close()
+    SharedJsonCache._instance = saved
+
+
+def _write_atomic(path, data):
+    tmp = str(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.rename(tmp, path)
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.mark.parametrize("mode", ["poll", "inotify"])
+def test_watcher_reloads_changed_file(tmp_path, make_cache, mode):
+    if mode == "inotify" and not inotify_available():
+        pytest.skip("inotify not available")
+    a, b = tmp_path / "a.json", tmp_path / "b.json"
+    _write_atomic(a, {"v": 1})
+    _write_atomic(b, {"v": 1})
+
+    cache = make_cache(file_paths=[str(a), str(b)], watch_interval=0.05, watch_mode=mode)
+    cache.start_cache_watcher()
+    assert cache._watcher.mode == mode
+
+    _write_atomic(a, {"v": 2})
+    assert _wait_for(lambda: cache.get_json(str(a)).get("v") == 2)
+
+    stats = cache.get_reload_stats()
+    assert stats[str(a)]["reloads"] == 1
+    assert str(b) not in stats
+
+
+def test_own_writes_are_not_reloaded(tmp_path, make_cache):
+    path = tmp_path / "state.json"
+    _write_atomic(path, {"v": 1})
+    cache = make_cache(file_paths=[str(path)], watch_interval=0.05)
+    cache.start_cache_watcher()
+
+    cache.set_json(str(path), {"v": 2})
+    time.sleep(0.2)
+    assert cache.get_reload_stats() == {}
+    with open(path) as f:
+        assert json.load(f) == {"v": 2}
+
+
+def test_snapshots_are_read_only_and_versioned(tmp_path, make_cache):
+    path = tmp_path / "state.json"
+    _write_atomic(path, {"nested": {"items": [1, 2]}})
+    cache = make_cache(file_paths=[str(path)])
+
+    first = cache.get_snapshot(str(path))
+    assert first.generation > 0
+    assert cache.get_json(str(path)) is first.data  # no copy per read
+    with pytest.raises(TypeError):
+        first.data["nested"]["items"].append(3)
+    with pytest.raises(TypeError):
+        first.data["nested"]["x"] = 1
+    assert json.loads(json.dumps(first.data)) == {"nested": {"items": [1, 2]}}
+
+    assert cache.get_json_if_newer(str(path), first.generation) is None
+    cache.set_json(str(path), {"nested": {"items": [1, 2, 3]}})
+    newer = cache.get_json_if_newer(str(path), first.generation)
+    assert newer is not None and newer.generation > first.generation
+    assert newer.data["nested"]["items"] == [1, 2, 3]
+    # The old snapshot is untouched
+    assert first.data["nested"]["items"] == [1, 2]
+
+
+def test_concurrent_writers_keep_disk_and_snapshot_consistent(tmp_path, make_cache):
+    import threading
+
+    paths = [str(tmp_path / "a.json"), str(tmp_path / "b.json")]
+    cache = make_cache(file_paths=paths)
+
+    def writer(path, worker):
+        for i in range(50):
+            cache.set_json(path, {"worker": worker, "i": i})
+
+    threads = [threading.Thread(target=writer, args=(p, w)) for p in paths for w in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for path in paths:
+        with open(path) as f:
+            assert json.load(f) == cache.get_json(path)
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+
+def test_write_behind_coalesces_updates(tmp_path, make_cache):
+    path = str(tmp_path / "telemetry.json")
+    cache = make_cache(file_paths=[path], write_behind=True, flush_window=0.1)
+
+    for i in range(20):
+        cache.set_json(path, {"tick": i})
+    # Readers see the latest value before it reaches the disk
+    assert cache.get_json(path) == {"tick": 19}
+    assert not os.path.exists(path)
+
+    assert _wait_for(lambda: os.path.exists(path))
+    with open(path) as f:
+        assert json.load(f) == {"tick": 19}
+    stats = cache.get_write_stats()
+    assert stats["writes_requested"] == 20
+    assert stats["writes_performed"] == 1
+    assert stats["writes_saved"] == 19
+
+
+def test_write_behind_flush_and_close(tmp_path, make_cache):
+    path = str(tmp_path / "telemetry.json")
+    cache = make_cache(file_paths=[path], write_behind=True, flush_window=60)
+
+    cache.set_json(path, {"tick": 1})
+    cache.flush()
+    with open(path) as f:
+        assert json.load(f) == {"tick": 1}
+
+    cache.set_json(path, {"tick": 2})
+    cache.close()
+    with open(path) as f:
+        assert json.load(f) == {"tick": 2}
+    assert cache.get_write_stats()["pending"] == 0
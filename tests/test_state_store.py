@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.state_segment import StateSegment
+from core.state_store import JsonFileStore, SegmentStore, TopicWatcher
+
+
+def test_segment_roundtrip_between_attachments(tmp_path):
+    path = str(tmp_path / "state.seg")
+    writer = StateSegment(path, {"telemetry": 1024, "sensors": 4096})
+    reader = StateSegment(path)  # attaches to the existing layout
+
+    assert reader.read("telemetry") == (0, {})
+    assert writer.write("telemetry", {"battery_percent": 80.5, "impulse_active": False}) == 1
+    generation, data = reader.read("telemetry")
+    assert generation == 1 and data == {"battery_percent": 80.5, "impulse_active": False}
+    # Unchanged topic returns the cached snapshot object
+    assert reader.read("telemetry")[1] is data
+
+    writer.write("telemetry", data)  # frozen snapshots can be written back
+    assert reader.generation("telemetry") == 2
+
+    with pytest.raises(ValueError):
+        writer.write("telemetry", {"blob": "x" * 2048})
+    with pytest.raises(KeyError):
+        reader.read("missing")
+    reader.close()
+    writer.close()
+
+
+def test_backends_share_the_same_api(tmp_path):
+    stores = [
+        JsonFileStore({"sensors": str(tmp_path / "sensors.json")}),
+        SegmentStore(str(tmp_path / "state.seg"), {"sensors": 4096}),
+    ]
+    for store in stores:
+        assert store.read("sensors") == {}
+        store.write("sensors", {"thermal": {"core_temp": {"cpu": 70.0}}})
+        generation, data = store.read_with_generation("sensors")
+        assert data["thermal"]["core_temp"]["cpu"] == 70.0
+        assert store.read_if_newer("sensors", generation) is None
+        store.write("sensors", {"thermal": {"core_temp": {"cpu": 71.0}}})
+        newer = store.read_if_newer("sensors", generation)
+        assert newer is not None and newer[1]["thermal"]["core_temp"]["cpu"] == 71.0
+        store.close()
+
+    with open(tmp_path / "sensors.json") as f:
+        assert json.load(f)["thermal"]["core_temp"]["cpu"] == 71.0
+
+
+@pytest.mark.parametrize("backend", ["json", "segment"])
+def test_topic_watcher_wakes_on_write(tmp_path, backend):
+    import threading
+    import time
+
+    if backend == "json":
+        store = JsonFileStore({"telemetry": str(tmp_path / "telemetry.json"), "sensors": str(tmp_path / "sensors.json")})
+    else:
+        store = SegmentStore(str(tmp_path / "state.seg"), {"telemetry": 1024, "sensors": 1024})
+    watcher = TopicWatcher(store, ["telemetry", "sensors"])
+    assert store.written_at("telemetry") is None
+    assert watcher.wait(timeout=0.05) == []
+
+    writer = threading.Timer(0.05, store.write, args=("telemetry", {"battery_percent": 15.0}))
+    writer.start()
+    t0 = time.monotonic()
+    assert watcher.wait(timeout=5) == ["telemetry"]
+    assert time.monotonic() - t0 < 2
+    assert abs(store.written_at("telemetry") - time.time()) < 5
+    assert watcher.changed() == []
+
+    writer.join()
+    watcher.close()
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "segment"])
+def test_topic_watcher_wakes_on_sensor_deltas(tmp_path, backend):
+    import threading
+    import time
+    from core.sensor_delta import SensorDeltaWriter
+
+    if backend == "json":
+        store = JsonFileStore({"telemetry": str(tmp_path / "telemetry.json")})
+    else:
+        store = SegmentStore(str(tmp_path / "state.seg"), {"telemetry": 1024})
+    delta_path = str(tmp_path / "sensor_deltas.jsonl")
+    deltas = SensorDeltaWriter(delta_path)
+    watcher = TopicWatcher(store, ["telemetry"], files={"sensor_deltas": delta_path})
+
+    cpu = time.thread_time()
+    assert watcher.wait(timeout=0.3) == []
+    if backend == "json":
+        assert time.thread_time() - cpu < 0.05  # slept on the file watcher, no polling
+
+    for publish in (deltas.publish, deltas.publish):  # the keyframe (a rename), then an append
+        writer = threading.Timer(0.05, publish, args=({"proximity": {"min_distance": time.time()}},))
+        writer.start()
+        assert watcher.wait(timeout=5) == ["sensor_deltas"]
+        writer.join()
+    assert watcher.wait(timeout=0.05) == []
+
+    watcher.close()
+    store.close()
+
+
+def test_auto_controller_context_from_segment(tmp_path, monkeypatch):
+    from core.auto_controller import WATCHED_TOPICS, read_context
+    from core.fsm_client import FSMClient
+    from core.sensor_delta import SensorDeltaWriter, SensorReplica
+    from core.state_store import SEGMENT_CAPACITY
+
+    monkeypatch.setattr(FSMClient, "log_error", lambda self, msg: None)
+    store = SegmentStore(str(tmp_path / "state.seg"), SEGMENT_CAPACITY)
+    watcher = TopicWatcher(store, WATCHED_TOPICS)
+    fsm = FSMClient(path=str(tmp_path / "fsm_state.json"), store=store)
+    reader = FSMClient(path=str(tmp_path / "fsm_state.json"), store=store)
+
+    assert fsm.set_state("CHARGING", {"trigger": "charge", "source": "test"}, log=False)
+    store.write("telemetry", {"battery_percent": 15.0})
+    assert sorted(watcher.changed()) == ["fsm_state", "telemetry"]
+    assert not os.path.exists(tmp_path / "fsm_state.json")  # nothing bypasses the store
+    assert reader.refresh_if_changed() and reader.get_state()["state"] == "CHARGING"
+    assert reader.refresh_if_changed() is False
+
+    delta_path = str(tmp_path / "sensor_deltas.jsonl")
+    SensorDeltaWriter(delta_path).publish({"thermal": {"core_temp": {"cpu": 91.0}}})
+    replica = SensorReplica(delta_path)
+    assert replica.poll()
+    telemetry, sensors, fsm_state = read_context(store, replica)
+    assert telemetry == {"battery_percent": 15.0}
+    assert sensors["thermal"]["core_temp"]["cpu"] == 91.0
+    assert fsm_state == "CHARGING"
+    replica.close()
+    watcher.close()
+    store.close()
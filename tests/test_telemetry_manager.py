@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.telemetry import TelemetryManager
+
+
+def test_saves_only_changes_and_rate_limits(tmp_path):
+    path = str(tmp_path / "telemetry.json")
+    tm = TelemetryManager(path=path, min_save_interval=3600)
+    assert tm.stats["saves"] == 1  # defaults written on first start
+    inode = os.stat(path).st_ino
+
+    assert tm.update({"battery_percent": 100.0, "velocity": 0}) is False
+    assert not tm.dirty and tm.stats["saves"] == 1
+
+    assert tm.update({"battery_percent": 75.5}) is True
+    assert tm.dirty and tm.stats["saves"] == 1  # within the rate limit
+    assert tm.flush() is True and not tm.dirty
+    assert tm.flush() is False
+    with open(path) as f:
+        assert json.load(f)["battery_percent"] == 75.5
+    assert os.stat(path).st_ino != inode  # replaced via temp file + rename
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    tm.min_save_interval = 0
+    tm.update({"velocity": "0.4"})
+    assert tm.get()["velocity"] == 0.4 and tm.stats["saves"] == 3
+
+
+def test_refresh_if_changed_keeps_pending_values(tmp_path):
+    path = str(tmp_path / "telemetry.json")
+    writer = TelemetryManager(path=path, min_save_interval=0)
+    reader = TelemetryManager(path=path, min_save_interval=3600)
+    data = reader.get()
+    assert reader.refresh_if_changed() is False
+    reader.update({"velocity": 0.5})  # the first change is written right away
+    assert reader.refresh_if_changed() is False
+
+    writer.update({"battery_percent": 42.0, "power_wh": 210.0})
+    reader.update({"velocity": 0.7})  # pending, not written yet
+    assert reader.refresh_if_changed() is True
+    assert reader.get() is data  # updated in place
+    assert data["battery_percent"] == 42.0 and data["power_wh"] == 210.0
+    assert data["velocity"] == 0.7 and reader.dirty
+    assert reader.refresh_if_changed() is False
+    assert reader.stats["reloads"] == 1
+
+    with open(path, "w") as f:
+        f.write("{broken")
+    assert reader.refresh_if_changed() is False
+    assert data["battery_percent"] == 42.0
+
+
+def test_trailing_flush_writes_the_last_update(tmp_path):
+    path = str(tmp_path / "telemetry.json")
+    with open(path, "w") as f:
+        json.dump({"battery_percent": 90.0}, f)
+    tm = TelemetryManager(path=path, min_save_interval=0.1)
+    assert tm.stats["saves"] == 0
+
+    tm.update({"battery_percent": 80.0})  # nothing written recently: saved right away
+    assert tm.stats["saves"] == 1 and not tm.dirty
+    tm.update({"battery_percent": 70.0})
+    tm.update({"battery_percent": 60.0})
+    assert tm.dirty and tm.stats["saves"] == 1
+    deadline = time.monotonic() + 5
+    while tm.dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not tm.dirty and tm.stats["saves"] == 2
+    with open(path) as f:
+        assert json.load(f)["battery_percent"] == 60.0
+
+
+def test_publishes_through_the_segment_store(tmp_path):
+    from core.state_store import SEGMENT_CAPACITY, SegmentStore
+
+    store = SegmentStore(str(tmp_path / "state.seg"), SEGMENT_CAPACITY)
+    writer = TelemetryManager(min_save_interval=0, store=store)
+    reader = TelemetryManager(min_save_interval=3600, store=SegmentStore(str(tmp_path / "state.seg")))
+    assert store.read("telemetry")["battery_percent"] == 100.0
+
+    writer.update({"battery_percent": 33.0})
+    assert store.read("telemetry")["battery_percent"] == 33.0
+    assert reader.refresh_if_changed() and reader.get()["battery_percent"] == 33.0
+    assert reader.refresh_if_changed() is False
+    reader.store.close()
+    store.close()
+
+
+def test_save_does_not_read_back_the_file(tmp_path, monkeypatch):
+    import core.state_store as state_store_module
+
+    path = str(tmp_path / "telemetry.json")
+    tm = TelemetryManager(path=path, min_save_interval=0)
+    other = TelemetryManager(path=path, min_save_interval=3600)
+    loads = []
+    original_load = state_store_module.json.load
+    monkeypatch.setattr(state_store_module.json, "load", lambda f: loads.append(f.name) or original_load(f))
+
+    for velocity in (0.1, 0.2, 0.3):
+        assert tm.update({"velocity": velocity})
+    assert tm.stats["saves"] == 4 and loads == []
+    assert tm.refresh_if_changed() is False  # its own write is no outside change
+
+    assert other.refresh_if_changed() and other.get()["velocity"] == 0.3
+    assert loads == [path]
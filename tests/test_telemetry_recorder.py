@@ -0,0 +1,114 @@
+import os
+import signal
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+import core.telemetry_recorder as recorder_module
+from core.telemetry_recorder import RecordingReader, RecordingWriter, flatten
+
+
+def test_flatten_keeps_numbers_and_flags():
+    row = flatten({"power": {"status": "OK", "battery_main": {"soc": 74.5}, "solar_panels": {"is_charging": False}},
+                   "imu": {"orientation_q": [1, 0, 0, 0]}}, "sensors", {})
+    assert row == {"sensors.power.battery_main.soc": 74.5, "sensors.power.solar_panels.is_charging": 0.0,
+                   "sensors.imu.orientation_q.0": 1.0, "sensors.imu.orientation_q.1": 0.0,
+                   "sensors.imu.orientation_q.2": 0.0, "sensors.imu.orientation_q.3": 0.0}
+
+
+def test_segments_roundtrip_selected_columns(tmp_path, monkeypatch):
+    directory = str(tmp_path / "run")
+    writer = RecordingWriter(directory, rows_per_segment=100)
+    for i in range(250):
+        row = {"telemetry.battery_percent": 50.0 + i * 0.01, "telemetry.velocity": 0.5}
+        if i >= 120:
+            row["sensors.thermal.core_temp.cpu"] = 40.0 + i  # column appears mid-run
+        writer.append(1000.0 + i * 0.1, row)
+    writer.close()
+    assert writer.stats["segments"] == 3
+    assert writer.stats["compressed_bytes"] < writer.stats["raw_bytes"] / 4
+
+    reader = RecordingReader(directory)
+    assert [s["rows"] for s in reader.segments] == [100, 100, 50]
+    assert reader.time_range == (1000.0, 1000.0 + 249 * 0.1)
+    assert reader.columns()[:3] == ["time", "telemetry.battery_percent", "telemetry.velocity"]
+
+    decoded = []
+    original_decode = recorder_module._decode
+    monkeypatch.setattr(recorder_module, "_decode", lambda block, rows: decoded.append(rows) or original_decode(block, rows))
+    data = reader.load(["sensors.thermal.core_temp.cpu"], start=1011.0, end=1013.0)
+    # Only the middle segment overlaps; only its time and cpu blocks are decoded
+    assert decoded == [100, 100]
+    assert np.allclose(data["time"], 1000.0 + np.arange(110, 131) * 0.1)
+    cpu = data["sensors.thermal.core_temp.cpu"]
+    assert np.isnan(cpu[:10]).all() and np.array_equal(cpu[10:], 40.0 + np.arange(120, 131))
+    assert "telemetry.velocity" not in data
+
+    everything = reader.load(["telemetry.battery_percent", "missing.column"])
+    assert len(everything["time"]) == 250 and np.isnan(everything["missing.column"]).all()
+    assert np.allclose(everything["telemetry.battery_percent"], 50.0 + np.arange(250) * 0.01)
+
+
+def test_rows_follow_sensor_deltas_between_snapshots(tmp_path):
+    from core.sensor_delta import SensorDeltaWriter, SensorReplica
+    from core.state_store import JsonFileStore
+
+    store = JsonFileStore({"telemetry": str(tmp_path / "telemetry.json"), "sensors": str(tmp_path / "sensors.json")})
+    deltas = SensorDeltaWriter(str(tmp_path / "sensor_deltas.jsonl"))
+    replica = SensorReplica(str(tmp_path / "sensor_deltas.jsonl"))
+    store.write("telemetry", {"velocity": 0.5})
+    store.write("sensors", {"thermal": {"cpu": 40.0}})
+    deltas.publish({"thermal": {"cpu": 40.0}})
+
+    rows = []
+    for cpu in (41.0, 42.0, 43.0):  # updates between two full snapshots
+        deltas.publish({"thermal": {"cpu": cpu}})
+        assert replica.poll()
+        rows.append(recorder_module.read_row(store, ["telemetry", "sensors"], replica))
+    assert [row["sensors.thermal.cpu"] for row in rows] == [41.0, 42.0, 43.0]
+    assert rows[0]["telemetry.velocity"] == 0.5
+    assert recorder_module.read_row(store, ["sensors"])["sensors.thermal.cpu"] == 40.0
+    replica.close()
+
+
+def test_segments_are_written_at_least_every_segment_seconds(tmp_path):
+    directory = str(tmp_path / "run")
+    writer = RecordingWriter(directory, rows_per_segment=6000, segment_seconds=5.0)
+    for i in range(12):
+        writer.append(1000.0 + i, {"telemetry.velocity": float(i)})
+    assert writer.stats["segments"] == 2  # rows 0-5 and 6-11
+    assert writer.flush_if_due(1016.0) is None
+    writer.append(1016.0, {"telemetry.velocity": 16.0})
+    assert writer.flush_if_due(1021.0) is not None  # no new data, the idle check writes it
+    assert [s["rows"] for s in RecordingReader(directory).segments] == [6, 6, 1]
+
+
+def test_sigterm_writes_the_buffered_rows(tmp_path, monkeypatch):
+    import core.state_store as state_store_module
+
+    store = state_store_module.JsonFileStore({"telemetry": str(tmp_path / "telemetry.json")})
+    monkeypatch.setattr(state_store_module, "get_state_store", lambda: store)
+
+    def drive():
+        for velocity in (0.5, 0.6, 0.7):
+            time.sleep(0.15)
+            store.write("telemetry", {"velocity": velocity})
+        time.sleep(0.15)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    handler = signal.getsignal(signal.SIGTERM)
+    driver = threading.Thread(target=drive)
+    driver.start()
+    with pytest.raises(SystemExit):
+        recorder_module.run_recorder(str(tmp_path / "run"), rate_hz=100.0, topics=["telemetry"])
+    driver.join()
+
+    data = RecordingReader(str(tmp_path / "run")).load(["telemetry.velocity"])
+    assert list(data["telemetry.velocity"]) == [0.5, 0.6, 0.7]
+    assert signal.getsignal(signal.SIGTERM) is handler
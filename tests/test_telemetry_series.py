@@ -0,0 +1,64 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from core.telemetry import TelemetryManager
+from core.telemetry_series import TelemetrySeries, open_telemetry_series
+
+T0 = 1_699_999_980.0  # a whole minute, so the 1 s / 10 s / 1 min buckets line up
+
+
+def test_rings_downsample_and_wrap(tmp_path):
+    path = str(tmp_path / "telemetry.ts")
+    series = TelemetrySeries(path, fields=["battery_percent", "velocity"],
+                             resolutions=[(1.0, 30), (10.0, 30), (60.0, 10)])
+    # Two samples per second for two minutes, battery rising 0.5 %/s
+    for i in range(240):
+        series.record({"battery_percent": 20.0 + i * 0.25, "velocity": None}, timestamp=T0 + i * 0.5)
+
+    reader = open_telemetry_series(path)
+    fine = reader.window("battery_percent", resolution=1.0)
+    assert len(fine.times) == 30  # wrapped: only the last 30 s are kept
+    assert fine.times[0] == T0 + 90 and fine.times[-1] == T0 + 119
+    assert np.all(fine.count == 2)
+    assert fine.mean[-1] == pytest.approx(20.0 + 238.5 * 0.25)
+
+    coarse = reader.window("battery_percent", start=T0, end=T0 + 60, resolution=10.0)
+    assert list(coarse.times) == [T0 + 10 * k for k in range(7)]
+    assert coarse.min[0] == 20.0 and coarse.max[0] == 20.0 + 19 * 0.25
+    assert np.isnan(reader.window("velocity", resolution=60.0).mean).all()
+
+    # Finest ring covering the start: 1 s for the last 20 s, 10 s further back
+    assert reader.window("battery_percent", start=T0 + 100).resolution == 1.0
+    assert reader.window("battery_percent", start=T0 + 30).resolution == 10.0
+
+    summary = reader.stats("battery_percent", start=T0, end=T0 + 59, resolution=60.0)
+    assert summary["count"] == 120
+    assert summary["min"] == 20.0 and summary["max"] == 20.0 + 119 * 0.25
+    assert summary["mean"] == pytest.approx(20.0 + 59.5 * 0.25)
+    assert reader.rate("battery_percent", start=T0 + 90) == pytest.approx(0.5)
+    assert reader.rate("battery_percent", start=T0 + 200) is None
+    assert reader.stats("velocity") is None
+    with pytest.raises(KeyError):
+        reader.window("missing")
+    reader.close()
+    series.close()
+
+
+def test_telemetry_manager_records_updates(tmp_path):
+    series_path = str(tmp_path / "telemetry.ts")
+    assert open_telemetry_series(series_path) is None
+    assert open_telemetry_series(str(tmp_path / "logs" / "telemetry.ts")) is None
+    assert os.listdir(tmp_path) == []  # a miss leaves no file (or directory) behind
+    tm = TelemetryManager(path=str(tmp_path / "telemetry.json"), series_path=series_path)
+    for percent in (50.0, 51.0, 52.0):
+        tm.update({"battery_percent": percent})
+    reader = open_telemetry_series(series_path)
+    assert reader.stats("battery_percent")["max"] == 52.0
+    assert reader.latest("battery_percent") is not None
+    reader.close()
@@ -5,6 +5,7 @@ System Consistency Checker
 """
 import json
 import os
+import sys
 import time
 import argparse
 import logging
@@ -16,6 +17,7 @@ from typing import Dict, Any, List
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from core.file_paths import FSM_STATE_FILE, SENSORS_FILE, TELEMETRY_FILE, MISSION_STATUS_FILE
 from core.fsm_client import FSMClient
+from core.telemetry_series import open_telemetry_series
 
 # --- Log Setup ---
 LOG_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
@@ -40,6 +42,7 @@ class ConsistencyChecker:
         self.verbose = verbose
         self.issues = []
         self.fsm_client = FSMClient()
+        self.series = None  # Telemetry history, attached once a writer created it
 
     def log_issue(self, level: str, check_type: str, message: str, details: Dict[str, Any]):
         """Logs a consistency issue."""
@@ -102,6 +105,9 @@ class ConsistencyChecker:
         if fsm_state and mission:
             self.check_fsm_vs_mission(fsm_state, mission)
 
+        if fsm_state:
+            self.check_battery_trend(fsm_state)
+
         if telemetry:
             self.check_staleness(telemetry, "telemetry.json")
         
@@ -139,6 +145,20 @@ class ConsistencyChecker:
         if fsm_s == "IDLE" and mission_s == "active":
             self.log_issue("WARNING", "fsm_vs_mission", "FSM is IDLE but mission status is 'active'.", {"fsm_state": fsm_s, "mission_status": mission_s})
 
+    def check_battery_trend(self, fsm: Dict[str, Any], window_sec: int = 60):
+        """Checks that the battery actually charges while the FSM is CHARGING."""
+        fsm_s = str(fsm.get("state", "UNKNOWN"))
+        if fsm_s.upper() != "CHARGING":  # FSMClient writes "CHARGING", older writers "charging"
+            return
+        if self.series is None:
+            self.series = open_telemetry_series()
+            if self.series is None:
+                return
+        rate = self.series.rate("battery_percent", start=time.time() - window_sec)
+        if rate is not None and rate <= 0:
+            self.log_issue("WARNING", "telemetry_trend", "FSM is CHARGING but battery is not rising.",
+                           {"fsm_state": fsm_s, "battery_rate_pct_per_min": round(rate * 60.0, 3), "window_sec": window_sec})
+
     def write_log_file(self):
         """Writes the collected issues to the consistency log."""
         log_data = []
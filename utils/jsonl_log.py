@@ -0,0 +1,127 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+def rotate_file(path: str, backup_count: int) -> None:
+    """Renames ``path`` -> ``path.1`` -> ``path.2`` ... like RotatingFileHandler,
+    keeping ``backup_count`` old files (none: the file is just removed)."""
+    if backup_count < 1:
+        os.remove(path)
+        return
+    for i in range(backup_count - 1, 0, -1):
+        source = f"{path}.{i}"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+
+class AsyncJsonlWriter:
+    """Appends JSON-lines records to a size-rotated file from a background thread.
+
+    ``write()`` only puts the record on a bounded queue, so callers never wait
+    for the disk. When the queue is full the record is dropped and counted.
+    Records must not be mutated after they are handed over.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024, backup_count: int = 5,
+                 buffer_size: int = 10000, batch_size: int = 500):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=buffer_size)
+        self._stats = {"written": 0, "dropped": 0, "rotations": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name=f"jsonl-writer:{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """Queues one record. Returns False if it was dropped."""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["dropped"] += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Blocks until every record queued so far is on disk."""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    def close(self) -> None:
+        """Writes out what is queued and stops the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            waiters = []
+            for item in batch:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    try:
+                        lines.append(json.dumps(item, separators=(",", ":"), default=str))
+                    except (TypeError, ValueError) as e:
+                        log.warning(f"Dropping unserializable log record: {e}")
+            if lines:
+                self._append(lines)
+            for waiter in waiters:
+                waiter.set()
+
+    def _append(self, lines) -> None:
+        try:
+            with open(self.path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+                size = f.tell()
+            if size >= self.max_bytes:
+                rotate_file(self.path, self.backup_count)
+                rotated = 1
+            else:
+                rotated = 0
+        except OSError as e:
+            log.error(f"Could not write {self.path}: {e}")
+            with self._stats_lock:
+                self._stats["errors"] += 1
+                self._stats["dropped"] += len(lines)
+            return
+        with self._stats_lock:
+            self._stats["written"] += len(lines)
+            self._stats["rotations"] += rotated
@@ -0,0 +1,58 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence
+
+# Upper bucket bounds in milliseconds; the last bucket is open-ended
+DEFAULT_BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; recording is O(log buckets) and allocation free."""
+
+    def __init__(self, name: str, bounds_ms: Sequence[float] = DEFAULT_BOUNDS_MS):
+        self.name = name
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts: List[int] = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float) -> None:
+        index = bisect.bisect_left(self.bounds_ms, latency_ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += latency_ms
+            if latency_ms > self.max_ms:
+                self.max_ms = latency_ms
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the ``pct`` percentile."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = self.count * pct / 100.0
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= target:
+                    return self.bounds_ms[index] if index < len(self.bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, object]:
+        mean = self.total_ms / self.count if self.count else 0.0
+        return {
+            "name": self.name,
+            "count": self.count,
+            "mean_ms": round(mean, 3),
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip([f"<={b}" for b in self.bounds_ms] + ["inf"], self.counts)),
+        }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+        return (f"{self.name}: n={s['count']} mean={s['mean_ms']}ms p50<={s['p50_ms']}ms "
+                f"p99<={s['p99_ms']}ms max={s['max_ms']}ms")